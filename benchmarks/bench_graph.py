@@ -0,0 +1,70 @@
+"""
+Graph Lookup Benchmark
+
+Measures how predecessor and root lookups scale with the graph size. The baseline functions repeat the former
+implementation which scanned the successor sets of every node, the indexed variant uses the reverse adjacency index and
+the in-degree counters of `DirectAcyclicGraph`.
+
+Usage:
+    python benchmarks/bench_graph.py
+    python benchmarks/bench_graph.py --sizes 1000 2000 4000 --skip-baseline
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from graph import DirectAcyclicGraph
+
+def build_layered_graph(size, width=10, seed=0):
+    """Creates layers of `width` nodes where each node depends on two random nodes of the previous layer."""
+    rng = random.Random(seed)
+    dag = DirectAcyclicGraph()
+    for node in range(size):
+        dag.add_node(node)
+        if node >= width:
+            layer_start = (node // width - 1) * width
+            for parent in rng.sample(range(layer_start, layer_start + width), 2):
+                dag.add_edge(parent, node)
+    return dag
+
+def baseline_get_input_nodes(dag, node):
+    return [u for u in dag.nodes if node in dag.nodes[u]]
+
+def baseline_get_nodes_without_input_edge(dag):
+    return [node for node in dag.nodes if not any(node in dag.nodes[u] for u in dag.nodes)]
+
+def scheduling_round(dag, get_input_nodes, get_nodes_without_input_edge):
+    """One pass of the former scheduling loop: roots plus predecessors of every node."""
+    get_nodes_without_input_edge(dag)
+    for node in dag.get_nodes():
+        get_input_nodes(dag, node)
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000, 4000])
+    parser.add_argument('--skip-baseline', action='store_true', help="Measure only the indexed lookups")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'baseline [s]':>14} {'indexed [s]':>14} {'speedup':>10}")
+    for size in args.sizes:
+        dag = build_layered_graph(size)
+        indexed = measure(scheduling_round, dag, DirectAcyclicGraph.get_input_nodes,
+                          DirectAcyclicGraph.get_nodes_without_input_edge)
+        if args.skip_baseline:
+            print(f"{size:>8} {'-':>14} {indexed:>14.6f} {'-':>10}")
+            continue
+        baseline = measure(scheduling_round, dag, baseline_get_input_nodes, baseline_get_nodes_without_input_edge)
+        print(f"{size:>8} {baseline:>14.6f} {indexed:>14.6f} {baseline / indexed:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
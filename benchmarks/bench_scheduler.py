@@ -0,0 +1,152 @@
+"""
+Scheduler Overhead Benchmark
+
+Runs pipelines of synthetic DAG shapes (see `shapes.py`) and measures what the Pipeline and Executor machinery costs on
+top of the work of the tasks. Tasks are no-ops, sleep or burn CPU for a fixed time. For every combination of shape,
+size and workload one JSON line is written with:
+
+- build time and traced memory per task of the pipeline construction,
+- makespan of the run and ideal makespan given by the critical path and the number of workers,
+- scheduling overhead per task, i.e. (makespan - ideal makespan) / tasks.
+
+Usage:
+    python benchmarks/bench_scheduler.py
+    python benchmarks/bench_scheduler.py --shapes chain tree --sizes 10 1000 1000000 --workloads noop
+    python benchmarks/bench_scheduler.py --output results.jsonl
+    python benchmarks/bench_scheduler.py --workloads noop --sizes 100000 --batch-tasks
+    python benchmarks/bench_scheduler.py --workloads noop --sizes 100000 --compile
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from pipeline import Pipeline
+from shapes import SHAPES
+
+def noop(*args):
+    return None
+
+def make_sleep(duration):
+    def sleep(*args):
+        time.sleep(duration)
+    return sleep
+
+def make_cpu(duration):
+    def cpu(*args):
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            pass
+    return cpu
+
+def make_workload(name, duration):
+    if name == "noop":
+        return noop, 0.0
+    if name == "sleep":
+        return make_sleep(duration), duration
+    if name == "cpu":
+        return make_cpu(duration), duration
+    raise ValueError(f"Unknown workload '{name}'.")
+
+def build_pipeline(shape, size, function, max_workers, batch_tasks=False, compile=False):
+    pipeline = Pipeline(max_workers=max_workers, batch_tasks=batch_tasks)
+    tasks = [pipeline.create_task(function) for _ in range(size)]
+    for u, v in SHAPES[shape](size):
+        pipeline.set_dependency(tasks[u], tasks[v])
+    if compile:
+        pipeline.compile()
+    return pipeline
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(shape, size, workload, duration, max_workers, trace_memory, batch_tasks=False, compile=False):
+    function, task_duration = make_workload(workload, duration)
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    pipeline = build_pipeline(shape, size, function, max_workers, batch_tasks, compile)
+    build_time = time.perf_counter() - start
+    memory_per_task = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory_per_task = peak / size
+
+    critical_path = len(pipeline.graph.levels())
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    if workload == "cpu":
+        # CPU bound Python tasks are serialized by the GIL
+        ideal_makespan = size * task_duration
+    else:
+        ideal_makespan = max(critical_path, size / workers) * task_duration
+
+    start = time.perf_counter()
+    pipeline.run()
+    makespan = time.perf_counter() - start
+    pipeline.executor.shutdown()
+
+    return {
+        "shape": shape,
+        "size": size,
+        "workload": workload,
+        "task_duration": task_duration,
+        "workers": workers,
+        "batch_tasks": batch_tasks,
+        "compiled": compile,
+        "critical_path": critical_path,
+        "build_time": build_time,
+        "memory_per_task": memory_per_task,
+        "makespan": makespan,
+        "ideal_makespan": ideal_makespan,
+        "overhead_per_task": (makespan - ideal_makespan) / size,
+        "tasks_per_second": size / makespan,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shapes', nargs='+', default=list(SHAPES), choices=list(SHAPES))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--workloads', nargs='+', default=["noop", "sleep", "cpu"], choices=["noop", "sleep", "cpu"])
+    parser.add_argument('--duration', type=float, default=0.001, help="Duration of sleep and cpu tasks in seconds")
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--max-work', type=float, default=10.0,
+                        help="Skip sleep and cpu runs whose ideal makespan exceeds this many seconds")
+    parser.add_argument('--batch-tasks', action='store_true', help="Submit ready tasks in adaptive batches")
+    parser.add_argument('--compile', action='store_true', help="Run the graph frozen by Pipeline.compile()")
+    parser.add_argument('--no-memory', action='store_true', help="Don't trace memory of pipeline construction")
+    parser.add_argument('--output', help="Append results to this JSON lines file instead of printing them")
+    args = parser.parse_args()
+
+    environment = {"commit": get_commit(), "python": platform.python_version(), "cpus": os.cpu_count()}
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for shape in args.shapes:
+            for size in args.sizes:
+                for workload in args.workloads:
+                    if workload != "noop" and size * args.duration > args.max_work * (args.max_workers or 1):
+                        continue
+                    result = measure(shape, size, workload, args.duration, args.max_workers, not args.no_memory,
+                                     args.batch_tasks, args.compile)
+                    output.write(json.dumps({**environment, **result}) + "\n")
+                    output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Task Representation Benchmark
+
+Measures memory per task object and construction time of tasks and of large generated chains. The baseline class
+repeats the former Task with a per-instance dict, the slotted variant is the current Task with shared options and the columnar variant
+stores states and results of all tasks in TaskColumns owned by the pipeline. Memory of a whole pipeline per node is
+measured for the mutable chain and for the chain frozen by `Pipeline.compile()`.
+
+Usage:
+    python benchmarks/bench_tasks.py
+    python benchmarks/bench_tasks.py --sizes 100000 1000000 --skip-baseline
+"""
+
+import argparse
+import gc
+import inspect
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from pipeline import Pipeline
+from task import ColumnarTask, Task, TaskColumns, TaskState, get_callable_name
+
+def increment(x):
+    return x + 1
+
+class BaselineTask:
+    """Former task representation with a per-instance dict."""
+    def __init__(self, callable, backend=None, transport=None, cacheable=True, output=False, resources=None):
+        self.id = get_callable_name(callable)
+        self.callable = callable
+        self.backend = backend
+        self.transport = transport
+        self.cacheable = cacheable
+        self.output = output
+        self.resources = resources
+        self.dirty = True
+        self.coroutine = inspect.iscoroutinefunction(callable)
+        self.state = TaskState.PENDING
+        self.result = None
+
+def build_tasks(size, variant):
+    if variant == "baseline":
+        return [BaselineTask(increment) for _ in range(size)]
+    if variant == "slotted":
+        return [Task(increment) for _ in range(size)]
+    columns = TaskColumns()
+    return [ColumnarTask(increment, columns) for _ in range(size)], columns
+
+def build_chain(size, variant):
+    pipeline = Pipeline(columnar=variant == "columnar")
+    previous = pipeline.create_task(increment)
+    for _ in range(size - 1):
+        task = pipeline.create_task(increment)
+        pipeline.set_dependency(previous, task)
+        previous = task
+    return pipeline
+
+def build_compiled_chain(size, variant):
+    return build_chain(size, variant).compile()
+
+def measure_memory(function, *args):
+    """Returns bytes allocated by the objects the function builds and keeps."""
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return allocated
+
+def measure_time(function, *args):
+    gc.collect()
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--skip-baseline', action='store_true', help="Measure only the current task representations")
+    args = parser.parse_args()
+
+    variants = ["slotted", "columnar"] if args.skip_baseline else ["baseline", "slotted", "columnar"]
+    print(f"{'tasks':>9} {'variant':>10} {'bytes/task':>11} {'tasks [s]':>10} {'chain [s]':>10} "
+          f"{'bytes/node':>11} {'compiled bytes/node':>20}")
+    for size in args.sizes:
+        for variant in variants:
+            per_task = measure_memory(build_tasks, size, variant) / size
+            tasks_time = measure_time(build_tasks, size, variant)
+            if variant == "baseline":
+                # the baseline task can't be added to the pipeline
+                print(f"{size:>9} {variant:>10} {per_task:>11.1f} {tasks_time:>10.3f} {'-':>10} {'-':>11} {'-':>20}")
+                continue
+            chain_time = measure_time(build_chain, size, variant)
+            per_node = measure_memory(build_chain, size, variant) / size
+            per_compiled_node = measure_memory(build_compiled_chain, size, variant) / size
+            print(f"{size:>9} {variant:>10} {per_task:>11.1f} {tasks_time:>10.3f} {chain_time:>10.3f} "
+                  f"{per_node:>11.1f} {per_compiled_node:>20.1f}")
+
+if __name__ == "__main__":
+    main()
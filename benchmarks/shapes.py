@@ -0,0 +1,52 @@
+"""
+Synthetic DAG shapes for benchmarks. Every generator returns list of edges between node indices 0..size-1, nodes are
+created in index order so edges always go from a lower to a higher index.
+"""
+
+import math
+import random
+
+def chain(size):
+    return [(node, node + 1) for node in range(size - 1)]
+
+def fan_out_in(size):
+    """One source feeding size-2 independent tasks which all feed one sink."""
+    if size < 3:
+        return chain(size)
+    sink = size - 1
+    return [(0, node) for node in range(1, sink)] + [(node, sink) for node in range(1, sink)]
+
+def diamond_lattice(size):
+    """Square grid where every node depends on its upper and left neighbour."""
+    width = max(1, math.isqrt(size))
+    edges = []
+    for node in range(size):
+        row, column = divmod(node, width)
+        if column > 0:
+            edges.append((node - 1, node))
+        if row > 0:
+            edges.append((node - width, node))
+    return edges
+
+def layered_random(size, width=None, fan_in=2, seed=0):
+    """Layers of `width` nodes, every node depends on `fan_in` random nodes of the previous layer."""
+    rng = random.Random(seed)
+    width = width or max(1, math.isqrt(size))
+    edges = []
+    for node in range(width, size):
+        layer_start = (node // width - 1) * width
+        for parent in rng.sample(range(layer_start, layer_start + width), min(fan_in, width)):
+            edges.append((parent, node))
+    return edges
+
+def tree(size, branching=2):
+    """Out-tree where node i is a parent of nodes branching*i+1 .. branching*i+branching."""
+    return [((node - 1) // branching, node) for node in range(1, size)]
+
+SHAPES = {
+    "chain": chain,
+    "fan_out_in": fan_out_in,
+    "diamond_lattice": diamond_lattice,
+    "layered_random": layered_random,
+    "tree": tree,
+}
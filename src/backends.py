@@ -0,0 +1,123 @@
+import atexit
+import concurrent.futures
+import threading
+from multiprocessing import resource_tracker
+
+class Backend:
+    """ The Backend class is an interface of a worker pool which executes submitted functions. """
+    def submit(self, function, *args):
+        raise NotImplementedError
+
+    def shutdown(self, wait=True):
+        raise NotImplementedError
+
+    def resolve(self, values):
+        """Returns values of results kept by the backend (e.g. on remote workers), other values are unchanged."""
+        return values
+
+    def release(self, result):
+        """Drops the result kept by the backend, it is not needed any more."""
+
+    def terminate(self):
+        """
+        Kills all running functions and replaces the workers. Returns False when the backend can't kill its workers,
+        running functions are left to finish then.
+        """
+        return False
+
+class ThreadBackend(Backend):
+    """ Executes tasks in a pool of threads, suitable for I/O bound tasks and tasks releasing the GIL. """
+    def __init__(self, max_workers=None):
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, function, *args):
+        return self.pool.submit(function, *args)
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+
+class ProcessBackend(Backend):
+    """
+    Executes tasks in a pool of worker processes, suitable for CPU bound pure Python tasks. Task callables, inputs and
+    results are pickled, so callables have to be defined at module level. Errors are raised with the original traceback
+    of the worker attached as their cause.
+    """
+    def __init__(self, max_workers=None):
+        # workers have to share the resource tracker of this process, otherwise shared memory blocks created by
+        # workers would be reported as leaked by their own trackers
+        resource_tracker.ensure_running()
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    def submit(self, function, *args):
+        with self.lock:
+            return self.pool.submit(function, *args)
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+
+    def terminate(self):
+        with self.lock:
+            # the pool has no public way to kill its workers, futures of killed workers fail with BrokenProcessPool
+            processes = list(self.pool._processes.values())
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.kill()
+            self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+        return True
+
+class DedicatedThreadBackend(ThreadBackend):
+    """
+    Runs every function in its own thread, so it never waits for a free worker. Stages of streams run here, a producer
+    and its consumers have to run at the same time whatever the size of the pools is.
+    """
+    def __init__(self, max_workers=None):
+        pass
+
+    def submit(self, function, *args):
+        future = concurrent.futures.Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = function(*args)
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        threading.Thread(target=run, name="stream", daemon=True).start()
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+STREAM_BACKEND = "stream"
+
+BACKENDS = {
+    "thread": ThreadBackend,
+    "process": ProcessBackend,
+    STREAM_BACKEND: DedicatedThreadBackend,
+}
+
+shared_backends = {}
+shared_backends_lock = threading.Lock()
+
+def get_shared_backend(name):
+    """Returns the process wide worker pool of the named backend, it is created on first use and kept until exit."""
+    with shared_backends_lock:
+        if name not in shared_backends:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown execution backend '{name}'.")
+            shared_backends[name] = BACKENDS[name]()
+        return shared_backends[name]
+
+def shutdown_shared_backends(wait=True):
+    with shared_backends_lock:
+        for backend in shared_backends.values():
+            backend.shutdown(wait=wait)
+        shared_backends.clear()
+
+atexit.register(shutdown_shared_backends)
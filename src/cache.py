@@ -0,0 +1,246 @@
+import functools
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from sizes import result_size
+
+class CacheStatistics:
+    """ Hit and miss counters of the ResultCache. """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def __str__(self):
+        return (f"hits: {self.hits} (memory: {self.memory_hits}, disk: {self.disk_hits}), misses: {self.misses}, "
+                f"evictions: {self.evictions}")
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+def update_with_callable(digest, callable):
+    if isinstance(callable, functools.partial):
+        update_with_callable(digest, callable.func)
+        update_with_value(digest, (callable.args, sorted(callable.keywords.items())))
+        return
+
+    digest.update(f"{getattr(callable, '__module__', '')}.{getattr(callable, '__qualname__', '')}".encode())
+    code = getattr(callable, "__code__", None)
+    if code is not None:
+        update_with_code(digest, code)
+        update_with_value(digest, getattr(callable, "__defaults__", None))
+        for cell in getattr(callable, "__closure__", None) or ():
+            update_with_value(digest, cell.cell_contents)
+
+def update_with_code(digest, code):
+    digest.update(code.co_code)
+    for constant in code.co_consts:
+        if hasattr(constant, "co_code"):
+            update_with_code(digest, constant)
+        else:
+            digest.update(repr(constant).encode())
+    digest.update(repr(code.co_names).encode())
+
+def update_with_value(digest, value):
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        digest.update(f"ndarray{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            update_with_value(digest, item)
+    elif callable(value) and hasattr(value, "__code__"):
+        # functions referenced by closures are identified by name, their code may refer back to the closure
+        digest.update(f"{value.__module__}.{value.__qualname__}".encode())
+    else:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+def hash_computation(identity, inputs):
+    """Returns hex digest of the identity of a computation and its inputs, or None when they can't be hashed."""
+    digest = hashlib.sha256()
+    try:
+        for part in identity if isinstance(identity, tuple) else (identity,):
+            if callable(part):
+                update_with_callable(digest, part)
+            else:
+                update_with_value(digest, part)
+        update_with_value(digest, tuple(inputs))
+    except (pickle.PicklingError, TypeError, AttributeError, ValueError):
+        return None
+    return digest.hexdigest()
+
+def save_result(path, result):
+    """
+    Writes the result next to the path, NumPy arrays as `.npy` files and other values pickled as `.pkl` files. Returns
+    path of the written file, or None when the result can't be pickled.
+    """
+    if isinstance(result, np.ndarray) and not result.dtype.hasobject:
+        path += ".npy"
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.save(file, result)
+    else:
+        path += ".pkl"
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_path, "wb") as file:
+                pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            os.remove(temporary_path)
+            return None
+    os.replace(temporary_path, path)
+    return path
+
+def load_result(path):
+    """Returns tuple (found, result) of the result written by save_result, arrays are loaded as memory maps."""
+    for extension in (".npy", ".pkl"):
+        try:
+            if extension == ".npy":
+                result = np.load(path + extension, mmap_mode="r")
+            else:
+                with open(path + extension, "rb") as file:
+                    result = pickle.load(file)
+        except FileNotFoundError:
+            continue
+        return True, result
+    return False, None
+
+class ResultCache:
+    """
+    Content addressed cache of task results. Results are keyed by a hash of the task callable (its name and code) and
+    a hash of its input values. Recently used results are kept in a size bounded in-memory LRU tier, optionally backed
+    by a size bounded on-disk tier where NumPy arrays are stored as `.npy` files loaded as memory maps. Files of the
+    disk tier are scanned once when the cache is created, afterwards their sizes and order of use are tracked in memory.
+    """
+    def __init__(self, directory=None, memory_size=256 * 2**20, disk_size=2**30):
+        self.directory = directory
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        self.stats = CacheStatistics()
+        self.lock = threading.Lock()
+        # paths of the files of the disk tier and their sizes, least recently used first
+        self.disk = OrderedDict()
+        self.disk_used = 0
+        self.disk_lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.scan_disk()
+
+    def scan_disk(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".npy", ".pkl")):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self.disk[path] = size
+            self.disk_used += size
+
+    def get_key(self, identity, inputs):
+        """
+        Returns the cache key of a callable, or of a tuple of callables and values identifying the computation, and its
+        inputs. Returns None when the inputs can't be hashed.
+        """
+        return hash_computation(identity, inputs)
+
+    def get(self, key):
+        """Returns tuple (hit, result)."""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.stats.hits += 1
+                self.stats.memory_hits += 1
+                return True, self.memory[key][0]
+
+        hit, result = self.load(key)
+        with self.lock:
+            if hit:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                self.store_in_memory(key, result)
+            else:
+                self.stats.misses += 1
+        return hit, result
+
+    def put(self, key, result):
+        with self.lock:
+            self.store_in_memory(key, result)
+        if self.directory is not None:
+            self.save(key, result)
+
+    def store_in_memory(self, key, result):
+        size = result_size(result)
+        if size > self.memory_size:
+            return
+        if key in self.memory:
+            self.memory_used -= self.memory.pop(key)[1]
+        self.memory[key] = (result, size)
+        self.memory_used += size
+        while self.memory_used > self.memory_size:
+            _, (_, evicted_size) = self.memory.popitem(last=False)
+            self.memory_used -= evicted_size
+            self.stats.evictions += 1
+
+    def load(self, key):
+        if self.directory is None:
+            return False, None
+        path = os.path.join(self.directory, key)
+        hit, result = load_result(path)
+        if hit:
+            path += ".npy" if isinstance(result, np.ndarray) else ".pkl"
+            # modification time is the last use of the entry for eviction by later caches
+            os.utime(path)
+            with self.disk_lock:
+                if path in self.disk:
+                    self.disk.move_to_end(path)
+        return hit, result
+
+    def save(self, key, result):
+        path = save_result(os.path.join(self.directory, key), result)
+        if path is None:
+            return
+        size = os.path.getsize(path)
+        with self.disk_lock:
+            if path in self.disk:
+                self.disk_used -= self.disk.pop(path)
+            self.disk[path] = size
+            self.disk_used += size
+            evicted = self.evict_from_disk()
+        if evicted:
+            with self.lock:
+                self.stats.evictions += evicted
+
+    def evict_from_disk(self):
+        """Removes least recently used files until the disk tier fits, returns their number."""
+        evicted = 0
+        while self.disk_used > self.disk_size and self.disk:
+            path, size = self.disk.popitem(last=False)
+            self.disk_used -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.memory_used = 0
+        if self.directory is not None:
+            with self.disk_lock:
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith((".npy", ".pkl")):
+                        os.remove(entry.path)
+                self.disk.clear()
+                self.disk_used = 0
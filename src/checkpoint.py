@@ -0,0 +1,90 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from cache import hash_computation, load_result, save_result
+
+logger = logging.getLogger(__name__)
+
+class CheckpointStore:
+    """
+    Local store of finished task results, so a run interrupted by a crash can be resumed. Results are written as soon as
+    tasks finish by a single background writer thread, NumPy arrays as `.npy` files which are memory-mapped when the
+    run is resumed and other values pickled.
+
+    Tasks are identified across processes by a hash of their callable, parameter and the keys of their inputs, so a
+    checkpoint of a task whose code, parameter or any ancestor changed is not restored.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self.pending = set()
+        self.keys = {}
+
+    def prepare(self, pipeline):
+        """Computes checkpoint keys of the tasks of the pipeline."""
+        self.keys = {}
+        for task in pipeline.graph.topological_order():
+            self.get_key(pipeline, task)
+
+    def get_key(self, pipeline, task):
+        key = self.keys.get(task)
+        if key is None:
+            input_keys = [self.get_key(pipeline, dependency) for dependency in pipeline.graph.get_input_nodes(task)]
+            param = [pipeline.params[task]] if task in pipeline.params else []
+            digest = hash_computation(task.get_cache_identity(), param + input_keys)
+            if digest is None:
+                # callable or parameter can't be hashed, the task is identified by its name
+                digest = hash_computation(task.name, input_keys)
+            name = re.sub(r"\W", "_", task.name)[:32]
+            key = self.keys[task] = f"{name}-{digest[:24]}"
+        return key
+
+    def save(self, pipeline, task):
+        """Writes the result of the finished task in the background."""
+        future = self.writer.submit(self.write, pipeline, task, task.result)
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+
+    def write(self, pipeline, task, result):
+        if not save_result(os.path.join(self.directory, self.get_key(pipeline, task)), result):
+            logger.warning("Result of task %s can't be checkpointed.", task.name)
+
+    def flush(self):
+        """Waits until all results are written."""
+        wait(list(self.pending))
+
+    def restore(self, pipeline):
+        """Finishes unfinished tasks of the pipeline with their checkpointed results. Returns the restored tasks."""
+        self.flush()
+        self.prepare(pipeline)
+        stored = {entry.name.rsplit(".", 1)[0] for entry in os.scandir(self.directory)
+                  if entry.name.endswith((".npy", ".pkl"))}
+        restored = []
+        for task in pipeline.get_tasks():
+            # items of streams can't be replayed, so streaming tasks and their consumers are executed again
+            if task.is_finished() or task.is_streaming() or any(
+                    dependency.is_streaming() for dependency in pipeline.graph.get_input_nodes(task)):
+                continue
+            key = self.get_key(pipeline, task)
+            if key not in stored:
+                continue
+            found, result = load_result(os.path.join(self.directory, key))
+            if found:
+                task.result = result
+                task.dirty = False
+                task.set_state_to_finished()
+                restored.append(task)
+        logger.info("Restored %d tasks from checkpoint %s.", len(restored), self.directory)
+        return restored
+
+    def clear(self):
+        self.flush()
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".npy", ".pkl")):
+                os.remove(entry.path)
+
+    def close(self):
+        self.writer.shutdown(wait=True)
@@ -0,0 +1,141 @@
+from array import array
+
+from graph import DirectAcyclicGraph
+
+class Adjacency:
+    """
+    Read-only mapping of tasks to tuples of adjacent tasks stored in compressed sparse row buffers. The tuples are built
+    once, so the scheduler, which works with task objects and not dense ids, looks up adjacent tasks without allocating.
+    Traversals run over the buffers.
+    """
+    def __init__(self, graph, offsets, ids):
+        self.graph = graph
+        self.offsets = offsets
+        self.ids = ids
+        tasks = graph.tasks
+        self.adjacent = [tuple(tasks[adjacent] for adjacent in ids[offsets[id]:offsets[id + 1]])
+                         for id in range(len(offsets) - 1)]
+
+    def __getitem__(self, task):
+        return self.adjacent[self.graph.index[task]]
+
+    def get(self, task, default=None):
+        if task not in self.graph.index:
+            return default
+        return self[task]
+
+    def __contains__(self, task):
+        return task in self.graph.index
+
+    def __len__(self):
+        return len(self.graph.tasks)
+
+def build_csr(adjacency_lists):
+    offsets = array("q", [0])
+    ids = array("q")
+    for adjacent in adjacency_lists:
+        ids.extend(adjacent)
+        offsets.append(len(ids))
+    return offsets, ids
+
+def degrees(offsets):
+    return array("q", (offsets[id + 1] - offsets[id] for id in range(len(offsets) - 1)))
+
+class CompiledGraph:
+    """
+    Immutable compact form of a DirectAcyclicGraph. Tasks get dense integer ids in the order they were created,
+    successors and predecessors of a task are slices of shared `array` buffers (compressed sparse row format) and
+    degrees and the topological order are stored as arrays as well. Only the id of a task is looked up in a dict.
+
+    The graph is validated once when compiled, it answers the same queries as DirectAcyclicGraph, so the scheduler runs
+    off it unchanged. Use `thaw()` to get a mutable graph back.
+    """
+    def __init__(self, graph):
+        self.tasks = sorted(graph.get_nodes(), key=graph.order.__getitem__)
+        self.index = {task: id for id, task in enumerate(self.tasks)}
+        levels = graph.levels()
+
+        successor_offsets, successor_ids = build_csr(
+            sorted(self.index[successor] for successor in graph.get_output_nodes(task)) for task in self.tasks)
+        predecessor_offsets, predecessor_ids = build_csr(
+            sorted(self.index[dependency] for dependency in graph.predecessors[task]) for task in self.tasks)
+        self.successors = Adjacency(self, successor_offsets, successor_ids)
+        self.predecessors = Adjacency(self, predecessor_offsets, predecessor_ids)
+        self.in_degree = degrees(predecessor_offsets)
+        self.out_degree = degrees(successor_offsets)
+        self.level_offsets, self.level_ids = build_csr([self.index[task] for task in level] for level in levels)
+        # creation order is the id itself
+        self.order = self.index
+
+    def __str__(self):
+        graph_str = ""
+        for task in self.tasks:
+            graph_str += f"{task} -> {', '.join(map(str, self.successors[task]))}\n"
+        return graph_str
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def get_nodes(self):
+        return self.tasks
+
+    def get_output_nodes(self, node):
+        return self.successors[node]
+
+    def get_input_nodes(self, node):
+        return list(self.predecessors.get(node, ()))
+
+    def get_in_degree(self, node):
+        return self.in_degree[self.index[node]]
+
+    def get_out_degree(self, node):
+        return self.out_degree[self.index[node]]
+
+    def get_descendants(self, nodes):
+        """Returns all nodes reachable from the given nodes, the given nodes are not included."""
+        offsets, ids = self.successors.offsets, self.successors.ids
+        visited = set()
+        stack = [self.index[node] for node in nodes]
+        while stack:
+            id = stack.pop()
+            for successor in ids[offsets[id]:offsets[id + 1]]:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append(successor)
+        return {self.tasks[id] for id in visited}
+
+    def get_ancestors(self, nodes):
+        """Returns all nodes from which the given nodes are reachable, the given nodes are not included."""
+        offsets, ids = self.predecessors.offsets, self.predecessors.ids
+        visited = set()
+        stack = [self.index[node] for node in nodes]
+        while stack:
+            id = stack.pop()
+            for predecessor in ids[offsets[id]:offsets[id + 1]]:
+                if predecessor not in visited:
+                    visited.add(predecessor)
+                    stack.append(predecessor)
+        return {self.tasks[id] for id in visited}
+
+    def get_nodes_without_input_edge(self):
+        return [task for task, degree in zip(self.tasks, self.in_degree) if degree == 0]
+
+    def levels(self):
+        return [[self.tasks[id] for id in self.level_ids[self.level_offsets[level]:self.level_offsets[level + 1]]]
+                for level in range(len(self.level_offsets) - 1)]
+
+    def topological_order(self):
+        return [self.tasks[id] for id in self.level_ids]
+
+    def is_acyclic(self):
+        return True
+
+    def thaw(self):
+        """Returns a mutable DirectAcyclicGraph with the same nodes, created in the same order, and edges."""
+        graph = DirectAcyclicGraph()
+        for task in self.tasks:
+            graph.add_node(task)
+        for task in self.tasks:
+            for successor in self.successors[task]:
+                graph.add_edge(task, successor)
+        return graph
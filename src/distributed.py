@@ -0,0 +1,450 @@
+import argparse
+import collections
+import concurrent.futures
+import functools
+import itertools
+import os
+import threading
+import time
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from backends import Backend, BACKENDS
+from task import Task
+
+# environment variable with the authentication key shared by workers and coordinators
+AUTHKEY_VARIABLE = "DAG_EXECUTOR_AUTHKEY"
+
+# handle of a result kept in the memory of the worker listening on the address
+RemoteResult = collections.namedtuple("RemoteResult", ["address", "key"])
+
+class RemoteTraceback(Exception):
+    """ Traceback of an error raised by a remote worker, attached as the cause of the error. """
+    def __init__(self, text):
+        super().__init__(text)
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+def parse_address(address):
+    """Address is given either as a (host, port) tuple or as a 'host:port' string."""
+    if isinstance(address, str):
+        host, _, port = address.rpartition(":")
+        return host, int(port)
+    return tuple(address)
+
+def get_authkey(authkey=None):
+    """
+    Returns the given authentication key, or the key from the environment. Workers execute pickled payloads, so there
+    is no default key.
+    """
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_VARIABLE, "").encode()
+    if not authkey:
+        raise ValueError(f"Authentication key is required, pass authkey or set {AUTHKEY_VARIABLE}.")
+    return authkey
+
+def is_task_execution(function):
+    return isinstance(getattr(function, "__self__", None), Task)
+
+class Worker:
+    """
+    Worker daemon executing jobs sent by coordinators. Jobs are run by a thread or process pool of the worker. Results of
+    task executions are either sent back, or kept in the memory of the worker and only a RemoteResult handle is sent
+    back. Jobs resolve handles among their arguments, results kept by other workers are pulled directly from them.
+    A heartbeat is sent to every coordinator in a regular interval.
+    """
+    def __init__(self, address=("127.0.0.1", 0), authkey=None, backend="thread", max_workers=None, advertise=None):
+        authkey = get_authkey(authkey)
+        self.listener = Listener(parse_address(address), authkey=authkey)
+        self.address = parse_address(advertise) if advertise is not None else self.listener.address
+        self.authkey = authkey
+        self.pool = BACKENDS[backend](max_workers)
+        self.results = {}
+        self.keys = itertools.count()
+        self.peers = {}
+        self.lock = threading.Lock()
+        self.connections = []
+        self.closed = False
+
+    def serve_forever(self):
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                if self.closed:
+                    break
+                continue
+            if self.closed:
+                connection.close()
+                break
+            with self.lock:
+                self.connections.append(connection)
+            threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+    def start(self):
+        """Serves in a background thread of this process."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            # wakes up the accepting thread
+            Client(self.listener.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self.listener.close()
+        with self.lock:
+            for connection in self.connections + [peer for peer, _ in self.peers.values()]:
+                connection.close()
+        self.pool.shutdown(wait=False)
+
+    def handle(self, connection):
+        send_lock = threading.Lock()
+        stopped = threading.Event()
+
+        def send(message):
+            with send_lock:
+                connection.send(message)
+
+        try:
+            while True:
+                message = connection.recv()
+                kind = message[0]
+                if kind == "hello":
+                    threading.Thread(target=self.send_heartbeats, args=(send, message[1], stopped), daemon=True).start()
+                elif kind == "run":
+                    self.run(*message[1:], send)
+                elif kind == "fetch":
+                    key = message[1]
+                    send(("value", key, self.results[key]) if key in self.results else ("missing", key))
+                elif kind == "drop":
+                    self.results.pop(message[1], None)
+        except (EOFError, OSError, TypeError):
+            # TypeError is raised when the connection was closed by another thread while receiving
+            pass
+        finally:
+            stopped.set()
+            connection.close()
+            with self.lock:
+                if connection in self.connections:
+                    self.connections.remove(connection)
+
+    def send_heartbeats(self, send, interval, stopped):
+        while not stopped.wait(interval):
+            try:
+                send(("heartbeat",))
+            except OSError:
+                break
+
+    def run(self, job, function, args, keep, send):
+        if any(isinstance(arg, RemoteResult) for arg in args):
+            # pulling inputs from other workers must not block receiving of further messages
+            threading.Thread(target=self.submit, args=(job, function, args, keep, send), daemon=True).start()
+        else:
+            self.submit(job, function, args, keep, send)
+
+    def submit(self, job, function, args, keep, send):
+        try:
+            args = [self.resolve(arg) for arg in args]
+        except Exception as error:
+            self.send_error(job, error, send)
+            return
+        future = self.pool.submit(function, *args)
+        future.add_done_callback(lambda future: self.on_job_done(job, future, keep, send))
+
+    def on_job_done(self, job, future, keep, send):
+        error = future.exception()
+        if error is not None:
+            self.send_error(job, error, send)
+            return
+        result = future.result()
+        if keep:
+            key = f"{os.getpid()}-{next(self.keys)}"
+            self.results[key] = result
+            result = RemoteResult(self.address, key)
+        try:
+            send(("result", job, result))
+        except OSError:
+            pass
+        except Exception as error:
+            self.send_error(job, error, send)
+
+    def send_error(self, job, error, send):
+        text = "".join(traceback.format_exception(error))
+        try:
+            send(("error", job, error, text))
+        except OSError:
+            pass
+        except Exception:
+            # error itself can't be pickled
+            send(("error", job, RuntimeError(repr(error)), text))
+
+    def resolve(self, value):
+        if not isinstance(value, RemoteResult):
+            return value
+        if value.address == self.address:
+            if value.key not in self.results:
+                raise LookupError(f"Result {value.key} is not kept by worker {value.address}.")
+            return self.results[value.key]
+        return self.pull(value)
+
+    def pull(self, result):
+        with self.lock:
+            if result.address not in self.peers:
+                self.peers[result.address] = (Client(result.address, authkey=self.authkey), threading.Lock())
+            connection, lock = self.peers[result.address]
+        with lock:
+            connection.send(("fetch", result.key))
+            kind, _, *value = connection.recv()
+        if kind == "missing":
+            raise LookupError(f"Result {result.key} is not kept by worker {result.address}.")
+        return value[0]
+
+class WorkerConnection:
+    """ Connection of the coordinator to a worker together with jobs the worker is running. """
+    def __init__(self, address, connection):
+        self.address = address
+        self.connection = connection
+        self.send_lock = threading.Lock()
+        self.jobs = {}
+        self.last_seen = time.monotonic()
+        self.alive = True
+
+    def send(self, message):
+        with self.send_lock:
+            self.connection.send(message)
+
+Job = collections.namedtuple("Job", ["id", "future", "function", "args"])
+
+class DistributedBackend(Backend):
+    """
+    Coordinator executing tasks on worker daemons (see `python src/distributed.py --help`) over authenticated
+    `multiprocessing.connection` sockets. A job is sent to the worker holding most of its kept inputs, otherwise to the
+    least loaded one. Workers which stop sending heartbeats or close the connection are dropped and their jobs are
+    dispatched again to the remaining workers.
+
+    With `keep_results` results of tasks stay on the workers and pipelines hold RemoteResult handles, downstream tasks
+    pull them directly from the worker which keeps them. Results lost with a dead worker are recomputed from the job
+    which produced them. Payloads are pickled, so workers have to be trusted and able to import the task callables.
+    """
+    def __init__(self, workers, authkey=None, keep_results=False, heartbeat_interval=1.0, heartbeat_timeout=5.0):
+        authkey = self.authkey = get_authkey(authkey)
+        self.keep_results = keep_results
+        self.heartbeat_timeout = heartbeat_timeout
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.job_ids = itertools.count()
+        self.lineage = {}
+        self.recovered = {}
+        self.recovering = {}
+        self.workers = []
+        for address in workers:
+            address = parse_address(address)
+            worker = WorkerConnection(address, Client(address, authkey=authkey))
+            worker.send(("hello", heartbeat_interval))
+            self.workers.append(worker)
+            threading.Thread(target=self.receive, args=(worker,), daemon=True).start()
+        threading.Thread(target=self.monitor, args=(heartbeat_interval,), daemon=True).start()
+
+    def submit(self, function, *args):
+        future = concurrent.futures.Future()
+        self.dispatch(Job(next(self.job_ids), future, function, args))
+        return future
+
+    def dispatch(self, job):
+        args = [self.get_recovered(arg) for arg in job.args]
+        for arg in args:
+            if isinstance(arg, RemoteResult) and not self.is_available(arg):
+                self.recover(arg, lambda error: self.fail(job, error) if error is not None else self.dispatch(job))
+                return
+
+        with self.lock:
+            worker = self.choose_worker(args)
+            if worker is not None:
+                worker.jobs[job.id] = job
+        if worker is None:
+            self.fail(job, RuntimeError("No live workers to execute the job."))
+            return
+
+        keep = self.keep_results and is_task_execution(job.function)
+        try:
+            worker.send(("run", job.id, job.function, args, keep))
+        except OSError:
+            self.on_worker_lost(worker)
+        except Exception as error:
+            # job can't be pickled
+            with self.lock:
+                worker.jobs.pop(job.id, None)
+            self.fail(job, error)
+
+    def choose_worker(self, args):
+        workers = [worker for worker in self.workers if worker.alive]
+        if not workers:
+            return None
+        local_inputs = collections.Counter(arg.address for arg in args if isinstance(arg, RemoteResult))
+        return min(workers, key=lambda worker: (-local_inputs[worker.address], len(worker.jobs)))
+
+    def fail(self, job, error):
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    def receive(self, worker):
+        try:
+            while True:
+                message = worker.connection.recv()
+                worker.last_seen = time.monotonic()
+                kind = message[0]
+                if kind == "result":
+                    _, job_id, result = message
+                    with self.lock:
+                        job = worker.jobs.pop(job_id, None)
+                    if job is None:
+                        continue
+                    if isinstance(result, RemoteResult):
+                        self.lineage[result] = (job.function, job.args)
+                    if not job.future.done():
+                        job.future.set_result(result)
+                elif kind == "error":
+                    _, job_id, error, text = message
+                    with self.lock:
+                        job = worker.jobs.pop(job_id, None)
+                    if job is not None:
+                        error.__cause__ = RemoteTraceback(text)
+                        self.fail(job, error)
+        except (EOFError, OSError, TypeError):
+            # TypeError is raised when the connection was closed by another thread while receiving
+            pass
+        self.on_worker_lost(worker)
+
+    def monitor(self, interval):
+        while not self.closed.wait(interval):
+            now = time.monotonic()
+            for worker in self.workers:
+                if worker.alive and now - worker.last_seen > self.heartbeat_timeout:
+                    self.on_worker_lost(worker)
+
+    def on_worker_lost(self, worker):
+        with self.lock:
+            if not worker.alive:
+                return
+            worker.alive = False
+            jobs = list(worker.jobs.values())
+            worker.jobs.clear()
+        worker.connection.close()
+        for job in jobs:
+            if self.closed.is_set():
+                job.future.cancel()
+            else:
+                self.dispatch(job)
+
+    def is_available(self, result):
+        return any(worker.alive and worker.address == result.address for worker in self.workers)
+
+    def get_recovered(self, value):
+        """Returns the handle of the recomputed result which replaced a lost one."""
+        while isinstance(value, RemoteResult) and value in self.recovered:
+            value = self.recovered[value]
+        return value
+
+    def recover(self, result, callback):
+        """Recomputes the lost result from the job which produced it and calls the callback with an error or None."""
+        with self.lock:
+            recovery = self.recovering.get(result)
+            start = recovery is None
+            if start:
+                recovery = self.recovering[result] = concurrent.futures.Future()
+        if start:
+            if result in self.lineage:
+                function, args = self.lineage[result]
+                self.submit(function, *args).add_done_callback(functools.partial(self.on_recovered, result, recovery))
+            else:
+                recovery.set_exception(LookupError(f"Result {result.key} was lost with worker {result.address}."))
+        recovery.add_done_callback(lambda recovery: callback(recovery.exception()))
+
+    def on_recovered(self, result, recovery, recomputed):
+        error = recomputed.exception()
+        if error is None:
+            self.recovered[result] = recomputed.result()
+        with self.lock:
+            del self.recovering[result]
+        if error is None:
+            recovery.set_result(None)
+        else:
+            recovery.set_exception(error)
+
+    def resolve(self, values):
+        return [self.fetch(value) if isinstance(value, RemoteResult) else value for value in values]
+
+    def fetch(self, result):
+        """Returns value of the result kept by a worker."""
+        result = self.get_recovered(result)
+        if not self.is_available(result):
+            recovered = concurrent.futures.Future()
+            self.recover(result, lambda error: recovered.set_exception(error) if error else recovered.set_result(None))
+            recovered.result()
+            result = self.get_recovered(result)
+        connection = Client(result.address, authkey=self.authkey)
+        try:
+            connection.send(("fetch", result.key))
+            kind, _, *value = connection.recv()
+        finally:
+            connection.close()
+        if kind == "missing":
+            raise LookupError(f"Result {result.key} is not kept by worker {result.address}.")
+        return value[0]
+
+    def release(self, result):
+        """Drops the result on its worker, together with the lineage and recovered handles kept to recompute it."""
+        if not isinstance(result, RemoteResult):
+            return
+        handles = [result]
+        while handles[-1] in self.recovered:
+            handles.append(self.recovered[handles[-1]])
+        for handle in handles:
+            self.lineage.pop(handle, None)
+            self.recovered.pop(handle, None)
+        result = handles[-1]
+        for worker in self.workers:
+            if worker.alive and worker.address == result.address:
+                try:
+                    worker.send(("drop", result.key))
+                except OSError:
+                    pass
+
+    def shutdown(self, wait=True):
+        self.closed.set()
+        for worker in self.workers:
+            self.on_worker_lost(worker)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker daemon executing tasks of distributed pipelines.")
+    parser.add_argument("--listen", default="127.0.0.1:0", help="Address to listen on, port 0 picks a free port")
+    parser.add_argument("--advertise", help="Address under which other workers reach this one, if it differs")
+    parser.add_argument("--authkey", default=os.environ.get(AUTHKEY_VARIABLE),
+                        help=f"Key shared by workers and coordinators, defaults to ${AUTHKEY_VARIABLE}")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="thread", help="Pool executing the jobs")
+    parser.add_argument("--max-workers", type=int, help="Size of the pool")
+    args = parser.parse_args(argv)
+    if not args.authkey:
+        parser.error(f"authentication key is required, pass --authkey or set {AUTHKEY_VARIABLE}")
+
+    worker = Worker(args.listen, args.authkey.encode(), args.backend, args.max_workers, args.advertise)
+    host, port = worker.address
+    print(f"Listening on {host}:{port}", flush=True)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+if __name__ == "__main__":
+    # RemoteResult sent to coordinators has to be pickled as a member of this module, not of __main__
+    import distributed
+    distributed.main()
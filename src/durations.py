@@ -0,0 +1,42 @@
+import json
+import os
+import threading
+
+class DurationStore:
+    """
+    Per-task duration estimates recorded across runs. Estimates are exponentially smoothed averages of measured
+    durations keyed by task name and can be persisted to a JSON file.
+    """
+    def __init__(self, path=None, smoothing=0.5, default_duration=1.0):
+        self.path = path
+        self.smoothing = smoothing
+        self.default_duration = default_duration
+        self.durations = {}
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path) as file:
+            self.durations = json.load(file)
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            durations = dict(self.durations)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(durations, file, indent=2)
+        os.replace(temporary_path, self.path)
+
+    def record(self, task, duration):
+        with self.lock:
+            previous = self.durations.get(task.name)
+            if previous is None:
+                self.durations[task.name] = duration
+            else:
+                self.durations[task.name] = self.smoothing * duration + (1 - self.smoothing) * previous
+
+    def estimate(self, task):
+        return self.durations.get(task.name, self.default_duration)
@@ -1,21 +1,291 @@
 import concurrent.futures
+import functools
+import threading
+import time
+
+from backends import Backend, BACKENDS, ProcessBackend, ThreadBackend, get_shared_backend
+from failures import CancellationToken, TaskInterruptedError, run_cancellable
+from fusion import run_batch, run_chain
+from map_task import MapTask, run_chunk
+from tracing import report_span, traced_call
+from transport import SHARED_MEMORY, execute_with_shared_result
 
 class Executor:
-    """ The Executor class is responsible for managing task execution asynchronously. """
-    def __init__(self):
+    """
+    The Executor class is responsible for managing task execution asynchronously. Tasks are executed by a backend
+    selected per task, or by the default backend of the executor. With the shared memory transport NumPy results of
+    tasks executed in worker processes are passed in shared memory blocks instead of being pickled. Chunks of map tasks
+    are submitted to the backend in parallel and combined once the last chunk finished. Fused chains of tasks are
+    submitted as a single function running the tasks back-to-back, so are batches of independent tasks.
+
+    Shared executors take named backends from the process wide pools, which outlive the executor and are reused by all
+    shared executors, otherwise every executor creates its own pools and shuts them down.
+
+    With instrumentation hooks registered the callables are wrapped to take timestamps in the workers and a span of
+    every executed task, or chunk, is reported to the hooks. Without hooks the callables are submitted as they are.
+
+    Futures of timed out tasks are abandoned, their results are dropped. Tasks running in threads get a cancellation
+    token which is set when their run is cancelled or they are abandoned. Chunks, chains and batches are cancelled with
+    the run too. Backends able to kill their workers are terminated instead, other tasks interrupted by it are reported
+    with TaskInterruptedError.
+    """
+    def __init__(self, backend="thread", transport=None, max_workers=None, hooks=None, shared=False):
+        if transport not in (None, SHARED_MEMORY):
+            raise ValueError(f"Unknown result transport '{transport}'.")
         self.futures = {}
-        self.executor = concurrent.futures.ThreadPoolExecutor()
+        self.submitted_at = {}
+        self.hooks = hooks if hooks is not None else []
+        self.default_backend = backend
+        self.default_transport = transport
+        self.max_workers = max_workers
+        self.shared = shared
+        self.backends = {}
+        self.cancellation = threading.Event()
+        self.tokens = {}
+        self.interrupted = set()
+        self.units = set()
+
+    def get_backend(self, backend=None):
+        backend = backend or self.default_backend
+        if isinstance(backend, Backend):
+            return backend
+        if self.shared:
+            return get_shared_backend(backend)
+        if backend not in self.backends:
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown execution backend '{backend}'.")
+            self.backends[backend] = BACKENDS[backend](self.max_workers)
+        return self.backends[backend]
+
+    def submit_for_execution(self, task, inputs=(), callback=None, backend=None):
+        """Submits the task to its backend, or to the given backend which overrides it."""
+        if isinstance(task, MapTask) and callback is not None:
+            return self.submit_chunks(task, inputs, callback, backend)
+
+        task.set_state_to_started()
+        backend = self.get_backend(backend or task.backend)
+        if isinstance(backend, ProcessBackend) and (task.transport or self.default_transport) == SHARED_MEMORY:
+            function, arguments = execute_with_shared_result, (task, *inputs)
+        else:
+            function, arguments = task.execute, inputs
+        token = None
+        if isinstance(backend, ThreadBackend):
+            token = CancellationToken(self.cancellation)
+            function, arguments = run_cancellable, (token, function, *arguments)
+        if self.hooks:
+            submitted = time.perf_counter()
+            future = backend.submit(traced_call, function, *arguments)
+            self.submitted_at[future] = submitted
+        else:
+            future = backend.submit(function, *arguments)
+        self.futures[future] = task
+        if token is not None:
+            self.tokens[future] = token
+        if callback is not None:
+            future.add_done_callback(lambda future: self.on_future_done(future, callback))
+        return future
+
+    def on_future_done(self, future, callback):
+        task = self.futures.pop(future, None)
+        self.tokens.pop(future, None)
+        if task is None:
+            # abandoned future
+            return
+        if future in self.interrupted:
+            self.interrupted.discard(future)
+            error = TaskInterruptedError(f"Task {task.name} was interrupted.")
+        elif future.cancelled():
+            error = concurrent.futures.CancelledError(f"Task {task.name} was cancelled.")
+        else:
+            error = future.exception()
+        if error is None:
+            task.result = self.get_future_result(task, future)
+            task.set_state_to_finished()
+        else:
+            self.submitted_at.pop(future, None)
+        callback(task, error)
+
+    def get_future_result(self, task, future, chunk=None):
+        """Returns result of the future, result of a traced call is unwrapped and its span reported to the hooks."""
+        result = future.result()
+        submitted = self.submitted_at.pop(future, None)
+        if submitted is None:
+            return result
+        report_span(self.hooks, task, submitted, result, chunk)
+        return result.result
+
+    def submit_chunks(self, task, inputs, callback, backend=None):
+        task.set_state_to_started()
+        backend = self.get_backend(backend or task.backend)
+        # chunks are split here, so inputs kept by the backend are needed
+        chunks = task.split(backend.resolve(inputs))
+        partials = [None] * len(chunks)
+        errors = []
+        remaining = [len(chunks)]
+        lock = threading.Lock()
+
+        def finish():
+            if errors:
+                callback(task, errors[0])
+                return
+            try:
+                task.result = task.combine(partials)
+            except Exception as error:
+                callback(task, error)
+                return
+            task.set_state_to_finished()
+            callback(task, None)
+
+        def on_chunk_done(index, future):
+            error = get_error(future, task)
+            with lock:
+                if error is None:
+                    partials[index] = self.get_future_result(task, future, chunk=index)
+                else:
+                    self.submitted_at.pop(future, None)
+                    errors.append(error)
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                finish()
 
-    def submit_for_execution(self, task, inputs=()):
+        if not chunks:
+            finish()
+        for index, chunk in enumerate(chunks):
+            if self.hooks:
+                submitted = time.perf_counter()
+                future = self.submit_unit(backend, traced_call, run_chunk, task.callable, task.reducer, *chunk)
+                self.submitted_at[future] = submitted
+            else:
+                future = self.submit_unit(backend, run_chunk, task.callable, task.reducer, *chunk)
+            future.add_done_callback(functools.partial(on_chunk_done, index))
+
+    def submit_chain(self, chain, inputs, kept, params, callback):
+        """
+        Submits the chain of tasks as one unit. The callback is called for every task of the chain in order with the
+        task, its error and its measured duration.
+        """
+        head = chain[0]
+        head.set_state_to_started()
+        backend = self.get_backend(head.backend)
+        share = isinstance(backend, ProcessBackend) and (head.transport or self.default_transport) == SHARED_MEMORY
+        submitted = time.perf_counter()
+        future = self.submit_unit(backend, run_chain, chain, kept, params, share, *inputs)
+        future.add_done_callback(lambda future: self.on_chain_done(chain, submitted, future, callback))
+
+    def on_chain_done(self, chain, submitted, future, callback):
+        error = get_error(future, chain[0])
+        traced = []
+        if error is None:
+            traced, error = future.result()
+        for task, result in zip(chain, traced):
+            if task is not chain[0]:
+                task.set_state_to_started()
+            task.result = result.result
+            if self.hooks:
+                report_span(self.hooks, task, submitted, result)
+            # next task of the chain starts right after the previous one, without queueing
+            submitted = result.finished
+            task.set_state_to_finished()
+            callback(task, None, result.finished - result.started)
+        if error is not None:
+            callback(chain[len(traced)], error, None)
+
+    def submit_batch(self, tasks, inputs, callback):
+        """
+        Submits independent tasks with their inputs as one unit. The callback is called for every task with the task,
+        its error and its measured duration.
+        """
+        for task in tasks:
             task.set_state_to_started()
-            future = self.executor.submit(task.execute, *inputs)
-            self.futures[future] = task
+        backend = self.get_backend(tasks[0].backend)
+        share = isinstance(backend, ProcessBackend) and (tasks[0].transport or self.default_transport) == SHARED_MEMORY
+        submitted = time.perf_counter()
+        future = self.submit_unit(backend, run_batch, tasks, inputs, share)
+        future.add_done_callback(lambda future: self.on_batch_done(tasks, submitted, future, callback))
+
+    def submit_unit(self, backend, function, *arguments):
+        """Submits a chunk, chain or batch, its future is cancelled with the run."""
+        if isinstance(backend, ThreadBackend):
+            function, arguments = run_cancellable, (CancellationToken(self.cancellation), function, *arguments)
+        future = backend.submit(function, *arguments)
+        self.units.add(future)
+        future.add_done_callback(self.units.discard)
+        return future
+
+    def on_batch_done(self, tasks, submitted, future, callback):
+        error = get_error(future, tasks[0])
+        outcomes = [(None, error)] * len(tasks) if error is not None else future.result()
+        for task, (result, error) in zip(tasks, outcomes):
+            if error is not None:
+                callback(task, error, None)
+                continue
+            task.result = result.result
+            if self.hooks:
+                report_span(self.hooks, task, submitted, result)
+            # next task of the batch waited for the previous one
+            submitted = result.finished
+            task.set_state_to_finished()
+            callback(task, None, result.finished - result.started)
 
     def wait_for_task_finish(self):
         done, _ = concurrent.futures.wait(self.futures.keys(), return_when=concurrent.futures.FIRST_COMPLETED)
 
         for future in done:
             task = self.futures[future]
-            task.result = future.result()
+            try:
+                task.result = self.get_future_result(task, future)
+            except Exception:
+                self.cancel()
+                raise
             task.set_state_to_finished()
-            del self.futures[future]
\ No newline at end of file
+            del self.futures[future]
+
+    def cancel(self):
+        """
+        Cancels queued tasks and requests running tasks to stop. Workers of own backends which can be killed are
+        terminated, shared backends are left running for other pipelines.
+        """
+        self.cancellation.set()
+        futures = list(self.futures) + list(self.units)
+        for future in futures:
+            future.cancel()
+        if not self.shared and any(not future.done() for future in futures):
+            for backend in self.backends.values():
+                backend.terminate()
+
+    def reset_cancellation(self):
+        """New run gets a new cancellation event, tasks left running from a cancelled run keep their own."""
+        self.cancellation = threading.Event()
+
+    def abandon(self, future):
+        """Drops the future, its result won't be reported. Returns False when the future is already done."""
+        task = self.futures.pop(future, None)
+        if task is None:
+            return False
+        token = self.tokens.pop(future, None)
+        if token is not None:
+            token.cancelled = True
+        future.cancel()
+        self.submitted_at.pop(future, None)
+        return True
+
+    def terminate(self, task):
+        """Kills workers of the backend of the task, other tasks running on them are interrupted."""
+        backend = self.get_backend(task.backend)
+        running = [future for future, other in list(self.futures.items())
+                   if self.get_backend(other.backend) is backend]
+        self.interrupted.update(running)
+        if not backend.terminate():
+            self.interrupted.difference_update(running)
+
+    def shutdown(self, wait=True):
+        for backend in self.backends.values():
+            backend.shutdown(wait=wait)
+        self.backends.clear()
+
+def get_error(future, task):
+    """Returns error of the done future, cancelled future fails with CancelledError."""
+    if future.cancelled():
+        return concurrent.futures.CancelledError(f"Task {task.name} was cancelled.")
+    return future.exception()
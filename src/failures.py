@@ -0,0 +1,104 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FAIL_FAST = "fail_fast"
+CONTINUE_INDEPENDENT = "continue_independent"
+FAILURE_POLICIES = (FAIL_FAST, CONTINUE_INDEPENDENT)
+
+class TaskTimeoutError(TimeoutError):
+    """ Task didn't finish within its timeout. """
+
+class TaskInterruptedError(Exception):
+    """ Task was interrupted by killing the workers of its backend, it is submitted again. """
+
+current = threading.local()
+
+class CancellationToken:
+    """ Cancellation of a single submission of a task, or of the whole run. """
+    __slots__ = ("run", "cancelled")
+
+    def __init__(self, run):
+        self.run = run
+        self.cancelled = False
+
+    def is_set(self):
+        return self.cancelled or self.run.is_set()
+
+def run_cancellable(token, function, *args):
+    """Runs the function in a worker thread, the function can check `cancellation_requested()` while it runs."""
+    current.token = token
+    try:
+        return function(*args)
+    finally:
+        current.token = None
+
+def cancellation_requested():
+    """
+    Returns True when the task running in the current worker thread should stop, because its run failed or the task
+    timed out. Threads can't be killed, so long running tasks should check it to stop early.
+    """
+    token = getattr(current, "token", None)
+    return token is not None and token.is_set()
+
+async def await_with_timeout(coroutine, timeout, name):
+    try:
+        return await asyncio.wait_for(coroutine, timeout)
+    except TimeoutError:
+        raise TaskTimeoutError(f"Task {name} timed out after {timeout} s.") from None
+
+class Watchdog:
+    """
+    Calls functions after a delay from a single background thread, it measures task timeouts and delays retries.
+    The thread is started on first use, errors of the functions are logged and don't stop it.
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.timers = []
+        self.counter = itertools.count()
+        self.cancelled = set()
+        self.thread = None
+        self.closed = False
+
+    def schedule(self, delay, function):
+        """Calls the function after the delay in seconds, returns a handle for `cancel`."""
+        handle = next(self.counter)
+        with self.condition:
+            heapq.heappush(self.timers, (time.monotonic() + delay, handle, function))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.serve, name="watchdog", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return handle
+
+    def cancel(self, handle):
+        with self.condition:
+            self.cancelled.add(handle)
+
+    def serve(self):
+        while True:
+            with self.condition:
+                while not self.closed and (not self.timers or self.timers[0][0] > time.monotonic()):
+                    self.condition.wait(self.timers[0][0] - time.monotonic() if self.timers else None)
+                if self.closed:
+                    return
+                _, handle, function = heapq.heappop(self.timers)
+                if handle in self.cancelled:
+                    self.cancelled.discard(handle)
+                    continue
+            try:
+                function()
+            except Exception:
+                logger.exception("Scheduled function %r failed.", function)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.timers.clear()
+            self.cancelled.clear()
+            self.condition.notify()
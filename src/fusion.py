@@ -0,0 +1,130 @@
+import concurrent.futures
+import math
+import os
+import threading
+import time
+
+from failures import cancellation_requested
+from map_task import MapTask
+from tracing import TracedResult
+from transport import is_shareable, share_array
+
+def is_fusible(task, pipeline):
+    """
+    Task can be fused when it doesn't need a decision of the scheduler at its own dispatch. Map, streaming and coroutine
+    tasks and consumers of streams are submitted in their own way, resources are acquired per task, cached results are
+    looked up per task and timeouts and retries are handled per task.
+    """
+    return (not isinstance(task, MapTask) and not task.is_streaming() and not task.is_coroutine()
+            and not any(dependency.is_streaming() for dependency in pipeline.graph.predecessors[task])
+            and task.resources is None and (pipeline.cache is None or not task.cacheable)
+            and pipeline.get_timeout(task) is None and pipeline.get_retries(task) == 0)
+
+def find_chains(graph, tasks, can_fuse):
+    """
+    Returns maximal linear chains of the given tasks, every task of a chain except the first one has the previous task
+    as its single input and every task except the last one has the next task as its single consumer. Tasks of a chain
+    run on the same backend with the same transport. Chains of a single task are not returned.
+    """
+    fusible = {task for task in tasks if can_fuse(task)}
+
+    def linked(task, successor):
+        return (successor in fusible and graph.get_out_degree(task) == 1 and graph.get_in_degree(successor) == 1
+                and task.backend == successor.backend and task.transport == successor.transport)
+
+    chains = []
+    for task in graph.topological_order():
+        if task not in fusible:
+            continue
+        if graph.get_in_degree(task) == 1:
+            dependency = next(iter(graph.predecessors[task]))
+            if dependency in fusible and linked(dependency, task):
+                # task continues the chain of its dependency
+                continue
+        chain = [task]
+        while graph.get_out_degree(chain[-1]) == 1:
+            successor = next(iter(graph.get_output_nodes(chain[-1])))
+            if not linked(chain[-1], successor):
+                break
+            chain.append(successor)
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
+
+def run_chain(chain, kept, params, share, *inputs):
+    """
+    Runs tasks of the chain back-to-back in the worker, the result of a task is the input of the next one, after the
+    tuple of parameters of the task, the inputs of the first task already include its parameter. Returns tuple
+    of traced results of the executed tasks and the error of the task which failed, or None. Results not kept are not
+    returned from the worker. The chain stops before the next task when its run is cancelled.
+    """
+    thread = threading.current_thread()
+    traced = []
+    for task, keep, param in zip(chain, kept, params):
+        if cancellation_requested():
+            return traced, concurrent.futures.CancelledError(f"Task {task.name} was cancelled.")
+        started = time.perf_counter()
+        try:
+            result = task.execute(*param, *inputs)
+        except Exception as error:
+            return traced, error
+        finished = time.perf_counter()
+        # None results are not passed to consumers, see Pipeline.get_task_inputs
+        inputs = () if result is None else (result,)
+        if not keep:
+            result = None
+        elif share and is_shareable(result):
+            result = share_array(result)
+        traced.append(TracedResult(result, started, finished, os.getpid(), thread.native_id, thread.name))
+    return traced, None
+
+def run_batch(tasks, inputs, share):
+    """
+    Runs independent tasks back-to-back in the worker. Returns list of tuples (traced result, error) of the tasks, a
+    failed task doesn't stop the other ones. Tasks left when the run is cancelled fail with CancelledError.
+    """
+    thread = threading.current_thread()
+    outcomes = []
+    for task, task_inputs in zip(tasks, inputs):
+        if cancellation_requested():
+            outcomes.append((None, concurrent.futures.CancelledError(f"Task {task.name} was cancelled.")))
+            continue
+        started = time.perf_counter()
+        try:
+            result = task.execute(*task_inputs)
+        except Exception as error:
+            outcomes.append((None, error))
+            continue
+        finished = time.perf_counter()
+        if share and is_shareable(result):
+            result = share_array(result)
+        outcomes.append((TracedResult(result, started, finished, os.getpid(), thread.native_id, thread.name), None))
+    return outcomes
+
+class BatchSizer:
+    """
+    Adapts the number of ready tasks submitted as one batch to their measured durations, so a batch runs for about
+    the target duration. Batches are never larger than needed to give every worker a share of the ready tasks.
+    """
+    def __init__(self, workers, target_duration=0.001, initial_size=8, max_size=1024, smoothing=0.2):
+        self.workers = workers
+        self.target_duration = target_duration
+        self.initial_size = initial_size
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.task_duration = None
+
+    def record(self, duration):
+        """Records measured duration of a batched task."""
+        if self.task_duration is None:
+            self.task_duration = duration
+        else:
+            self.task_duration = self.smoothing * duration + (1 - self.smoothing) * self.task_duration
+
+    def get_size(self, ready):
+        """Returns size of the next batch when the given number of tasks is ready."""
+        if self.task_duration is None:
+            size = self.initial_size
+        else:
+            size = int(self.target_duration / max(self.task_duration, 1e-7))
+        return max(1, min(size, self.max_size, math.ceil(ready / self.workers)))
@@ -2,9 +2,19 @@ class DirectAcyclicGraph:
     """
     The DirectAcyclicGraph handling graph operations such as adding nodes and edges, checking for cycles, and getting
     input/output nodes. It's focused solely on representing the graph structure.
+
+    Successors are kept in `nodes`, predecessors in a reverse index next to in-degree and out-degree counters, so
+    lookups of input nodes and root nodes don't need to scan the whole graph. Topological order and level sets are
+    cached until the graph is modified.
     """
     def __init__(self):
         self.nodes = {}
+        self.predecessors = {}
+        self.in_degree = {}
+        self.out_degree = {}
+        self.order = {}
+        self.node_counter = 0
+        self.sorted_levels = None
 
     def __str__(self):
         graph_str = ""
@@ -15,6 +25,13 @@ class DirectAcyclicGraph:
     def add_node(self, node):
         if node not in self.nodes:
             self.nodes[node] = set()
+            self.predecessors[node] = set()
+            self.in_degree[node] = 0
+            self.out_degree[node] = 0
+            # insertion order keeps input nodes ordered the same way as the nodes were created
+            self.order[node] = self.node_counter
+            self.node_counter += 1
+            self.sorted_levels = None
 
     def add_edge(self, u, v):
         if u not in self.nodes:
@@ -22,21 +39,37 @@ class DirectAcyclicGraph:
         if v not in self.nodes:
             self.add_node(v)
 
-        self.nodes[u].add(v)
+        if v not in self.nodes[u]:
+            self.nodes[u].add(v)
+            self.predecessors[v].add(u)
+            self.out_degree[u] += 1
+            self.in_degree[v] += 1
+            self.sorted_levels = None
 
     def remove_edge(self, u, v):
         if u in self.nodes and v in self.nodes[u]:
             self.nodes[u].remove(v)
+            self.predecessors[v].remove(u)
+            self.out_degree[u] -= 1
+            self.in_degree[v] -= 1
+            self.sorted_levels = None
 
     def remove_node(self, node):
         # Remove a node and all edges associated with it
-        if node in self.nodes:
-            del self.nodes[node]
+        if node not in self.nodes:
+            return
+
+        for v in list(self.nodes[node]):
+            self.remove_edge(node, v)
+        for u in list(self.predecessors[node]):
+            self.remove_edge(u, node)
 
-        # Also, remove the node from all other nodes' adjacency lists
-        for u in list(self.nodes):
-            if node in self.nodes[u]:
-                self.nodes[u].remove(node)
+        del self.nodes[node]
+        del self.predecessors[node]
+        del self.in_degree[node]
+        del self.out_degree[node]
+        del self.order[node]
+        self.sorted_levels = None
 
     def get_nodes(self):
         return self.nodes.keys()
@@ -46,51 +79,92 @@ class DirectAcyclicGraph:
             return self.nodes[node]
 
     def get_input_nodes(self, node):
-        return [u for u in self.nodes if node in self.nodes[u]]
+        if node not in self.predecessors:
+            return []
+        return sorted(self.predecessors[node], key=self.order.__getitem__)
+
+    def get_in_degree(self, node):
+        return self.in_degree[node]
+
+    def get_out_degree(self, node):
+        return self.out_degree[node]
+
+    def get_descendants(self, nodes):
+        """Returns all nodes reachable from the given nodes, the given nodes are not included."""
+        descendants = set()
+        stack = list(nodes)
+        while stack:
+            for successor in self.nodes[stack.pop()]:
+                if successor not in descendants:
+                    descendants.add(successor)
+                    stack.append(successor)
+        return descendants
+
+    def get_ancestors(self, nodes):
+        """Returns all nodes from which the given nodes are reachable, the given nodes are not included."""
+        ancestors = set()
+        stack = list(nodes)
+        while stack:
+            for predecessor in self.predecessors[stack.pop()]:
+                if predecessor not in ancestors:
+                    ancestors.add(predecessor)
+                    stack.append(predecessor)
+        return ancestors
+
+    def creates_cycle(self, u, v):
+        """Returns True if an edge from u to v would close a cycle, only nodes reachable from v are visited."""
+        if u == v:
+            return True
+        visited = {v}
+        stack = [v]
+        while stack:
+            for successor in self.nodes.get(stack.pop(), ()):
+                if successor == u:
+                    return True
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append(successor)
+        return False
 
     def get_nodes_without_input_edge(self):
-        return [node for node in self.nodes if not any(node in self.nodes[u] for u in self.nodes)]
+        return [node for node, degree in self.in_degree.items() if degree == 0]
 
-    def is_acyclic(self):
+    def sort(self):
         """
-        Detects whether the graph has a cycle. Returns True if the graph is acyclic, otherwise False.
+        Sorts nodes into level sets with Kahn's algorithm, nodes of a level depend only on nodes of previous levels.
+        Nodes which are part of a cycle, or depend on a cycle, are left out. Result is cached until the graph changes.
 
-        Depth-First Search (DFS) algorithm:
-        1. For each node, perform DFS if it hasn't been visited.
-        2. Once you visit a node, recursively visit all its neighbors.
-        3. If a node has no unvisited neighbors, mark it as fully processed.
+        1. First level is formed by nodes without input edges.
+        2. Removing edges of a level decrements in-degrees of successors.
+        3. Successors whose in-degree drops to zero form the next level.
         """
+        if self.sorted_levels is None:
+            in_degree = dict(self.in_degree)
+            levels = []
+            level = [node for node, degree in in_degree.items() if degree == 0]
+            while level:
+                levels.append(level)
+                next_level = []
+                for node in level:
+                    for successor in self.nodes[node]:
+                        in_degree[successor] -= 1
+                        if in_degree[successor] == 0:
+                            next_level.append(successor)
+                next_level.sort(key=self.order.__getitem__)
+                level = next_level
+            self.sorted_levels = levels
+        return self.sorted_levels
+
+    def levels(self):
+        """Returns list of level sets, nodes in the same level can run concurrently."""
+        levels = self.sort()
+        if sum(map(len, levels)) != len(self.nodes):
+            raise ValueError("The graph has cycles.")
+        return levels
+
+    def topological_order(self):
+        return [node for level in self.levels() for node in level]
 
-        UNVISITED = 0
-        VISITING = 1
-        VISITED = 2
-
-        state = {node: UNVISITED for node in self.nodes}
-
-        def dfs(node):
-            if state[node] == VISITING:
-                # Cycle detected
-                return False
-            if state[node] == VISITED:
-                # Already fully processed node
-                return True
-
-            # Mark the node as visiting (part of the current recursion stack)
-            state[node] = VISITING
-
-            # Recursively visit all adjacent nodes
-            for neighbor in self.nodes.get(node, []):
-                if not dfs(neighbor):
-                    return False
-
-            # Mark the node as visited (fully processed)
-            state[node] = VISITED
-            return True
-
-        # Run DFS for every node in the graph
-        for node in self.nodes:
-            if state[node] == UNVISITED:
-                if not dfs(node):
-                    return False  # If any cycle is detected
-
-        return True  # If no cycles are detected
+    def is_acyclic(self):
+        """Returns True if the graph is acyclic, otherwise False. Every node is sorted only when there is no cycle."""
+        return sum(map(len, self.sort())) == len(self.nodes)
@@ -0,0 +1,129 @@
+import itertools
+import math
+import os
+
+import numpy as np
+
+from task import Task
+
+class Reducer:
+    """
+    The Reducer class combines results of chunks of a MapTask. `partial` is applied to the output of every chunk in the
+    worker which computed it, `combine` merges the partial results of all chunks into the result of the task.
+    """
+    def partial(self, output):
+        return output
+
+    def combine(self, partials):
+        raise NotImplementedError
+
+class ConcatReducer(Reducer):
+    def combine(self, partials):
+        if partials and all(isinstance(partial, np.ndarray) for partial in partials):
+            return np.concatenate(partials)
+        return list(itertools.chain.from_iterable(partials))
+
+class SumReducer(Reducer):
+    def partial(self, output):
+        return np.sum(output)
+
+    def combine(self, partials):
+        return sum(partials)
+
+class MinReducer(Reducer):
+    def partial(self, output):
+        return np.min(output)
+
+    def combine(self, partials):
+        return min(partials)
+
+class MaxReducer(Reducer):
+    def partial(self, output):
+        return np.max(output)
+
+    def combine(self, partials):
+        return max(partials)
+
+class MeanReducer(Reducer):
+    def partial(self, output):
+        return np.size(output), np.sum(output)
+
+    def combine(self, partials):
+        count = sum(partial_count for partial_count, _ in partials)
+        return sum(partial_sum for _, partial_sum in partials) / count
+
+class StdReducer(Reducer):
+    """ Population standard deviation merged from per-chunk counts, means and sums of squared deviations. """
+    def partial(self, output):
+        output = np.asarray(output)
+        mean = np.mean(output)
+        return output.size, mean, np.sum((output - mean) ** 2)
+
+    def combine(self, partials):
+        count, mean, squares = 0, 0.0, 0.0
+        for partial_count, partial_mean, partial_squares in partials:
+            if partial_count == 0:
+                continue
+            total = count + partial_count
+            delta = partial_mean - mean
+            mean += delta * partial_count / total
+            squares += partial_squares + delta ** 2 * count * partial_count / total
+            count = total
+        return np.sqrt(squares / count)
+
+class FunctionReducer(Reducer):
+    """ User supplied reduction called with the list of chunk outputs. """
+    def __init__(self, function):
+        self.function = function
+
+    def combine(self, partials):
+        return self.function(partials)
+
+REDUCERS = {
+    "concat": ConcatReducer,
+    "sum": SumReducer,
+    "min": MinReducer,
+    "max": MaxReducer,
+    "mean": MeanReducer,
+    "std": StdReducer,
+}
+
+def get_reducer(reduce):
+    if isinstance(reduce, Reducer):
+        return reduce
+    if callable(reduce):
+        return FunctionReducer(reduce)
+    if reduce not in REDUCERS:
+        raise ValueError(f"Unknown reduction '{reduce}'.")
+    return REDUCERS[reduce]()
+
+def run_chunk(callable, reducer, chunk, *inputs):
+    return reducer.partial(callable(chunk, *inputs))
+
+class MapTask(Task):
+    """
+    The MapTask class splits its first input (NumPy array along the first axis, or a sequence) into chunks, runs the
+    callable on every chunk in parallel on the executor and combines the chunk results with a reduction. Other inputs
+    are passed to every chunk unchanged. Consumers of the task see one combined result.
+    """
+    __slots__ = ("reducer", "chunk_size")
+
+    def __init__(self, callable, reduce="concat", chunk_size=None, **options):
+        super().__init__(callable, **options)
+        self.reducer = get_reducer(reduce)
+        self.chunk_size = chunk_size
+
+    def split(self, inputs):
+        """Returns list of argument tuples, one per chunk."""
+        data, *other_inputs = inputs
+        chunk_size = self.chunk_size or max(1, math.ceil(len(data) / (os.cpu_count() or 1)))
+        return [(data[start:start + chunk_size], *other_inputs) for start in range(0, len(data), chunk_size)]
+
+    def combine(self, partials):
+        return self.reducer.combine(partials)
+
+    def get_cache_identity(self):
+        return run_chunk, self.callable, self.reducer
+
+    def execute(self, *args):
+        return self.combine([run_chunk(self.callable, self.reducer, *chunk) for chunk in self.split(args)])
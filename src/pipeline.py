@@ -1,36 +1,319 @@
+import contextlib
+import functools
+
+from backends import STREAM_BACKEND
+from compiled import CompiledGraph
 from graph import DirectAcyclicGraph
-from task import Task
+from map_task import MapTask
+from stream import StreamTask
+from task import ColumnarTask, Task, TaskColumns, TaskState, results_equal, return_value
 from executor import Executor
+from failures import FAIL_FAST, FAILURE_POLICIES
+from resources import ResourcePool, normalize_resources
+from scheduler import AsyncScheduler, Scheduler
 
 class Pipeline:
     """
     The Pipeline class manages the orchestration of tasks, checking for readiness and managing dependencies. This is a
     central place for coordinating task execution.
+
+    A pipeline can be run repeatedly with different parameters, values passed as the first input of tasks. Only tasks
+    whose parameters changed are executed again together with their descendants. Pipelines using shared workers run on
+    process wide worker pools, so no pool is started per pipeline. Pipeline used as a context manager shuts down its
+    own pools on exit.
+
+    With a checkpoint store results of finished tasks are persisted as the run progresses, a run resumed after a crash
+    executes only the tasks whose results were not stored.
+
+    A run with targets executes only the targets and their unfinished ancestors. With lazy results the result of a
+    pending task is computed on demand by such a run.
+
+    Failed tasks are retried with exponential backoff and tasks running longer than their timeout fail. With the fail
+    fast policy the first failure cancels the rest of the run, with the continue independent policy only descendants of
+    failed tasks are skipped.
+
+    A running task can expand the graph, tasks and dependencies it adds are picked up by the current run.
     """
 
-    def __init__(self):
+    def __init__(self, backend="thread", transport=None, cache=None, release_results=False, max_workers=None,
+                 durations=None, resources=None, early_cutoff=False, hooks=None, fuse_chains=False,
+                 columnar=False, shared_workers=False, checkpoint=None, lazy_results=False,
+                 failure_policy=FAIL_FAST, timeout=None, retries=0, retry_backoff=0.1, batch_tasks=False):
+        if failure_policy not in FAILURE_POLICIES:
+            raise ValueError(f"Unknown failure policy '{failure_policy}'.")
         self.graph = DirectAcyclicGraph()
-        self.executor = Executor()
+        self.hooks = list(hooks or [])
+        self.executor = Executor(backend, transport, max_workers, hooks=self.hooks, shared=shared_workers)
+        self.cache = cache
+        self.release_results = release_results
+        self.max_workers = max_workers
+        self.durations = durations
+        self.resources = resources or {}
+        self.early_cutoff = early_cutoff
+        self.fuse_chains = fuse_chains
+        self.batch_tasks = batch_tasks
+        self.peak_result_size = None
+        # finished tasks whose results were released after their consumers finished
+        self.released_tasks = set()
+        # states and results of plain tasks are stored in columns owned by the pipeline
+        self.columns = TaskColumns() if columnar else None
+        self.params = {}
+        self.checkpoint = checkpoint
+        self.lazy_results = lazy_results
+        self.failure_policy = failure_policy
+        # defaults of tasks which don't set their own timeout or retries
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.failed_tasks = {}
+        # scheduler of the current run and tasks and dependencies added to it by an expansion
+        self.scheduler = None
+        self.expansion = None
 
-    def create_task(self, callable):
-        task = Task(callable)
-        self.graph.add_node(task)
-        return task
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        """Shuts down worker pools of the pipeline, shared pools are kept for other pipelines."""
+        self.executor.shutdown(wait=wait)
+
+    def add_hook(self, hook):
+        """Registers an instrumentation hook, see `tracing.Hook`."""
+        self.hooks.append(hook)
+
+    def create_task(self, callable, backend=None, transport=None, cacheable=True, output=False, resources=None,
+                    name=None, timeout=None, retries=None):
+        options = dict(backend=backend, transport=transport, cacheable=cacheable, output=output,
+                       resources=normalize_resources(resources), name=name, timeout=timeout, retries=retries)
+        if self.columns is not None:
+            task = ColumnarTask(callable, self.columns, **options)
+        else:
+            task = Task(callable, **options)
+        return self.add_task(task)
+
+    def create_map_task(self, callable, reduce="concat", chunk_size=None, backend=None, cacheable=True, output=False,
+                        resources=None, name=None, retries=None):
+        task = MapTask(callable, reduce, chunk_size, backend=backend, cacheable=cacheable, output=output,
+                       resources=normalize_resources(resources), name=name, retries=retries)
+        return self.add_task(task)
 
     def set_dependency(self, node_a, node_b):
-        self.graph.add_edge(node_a, node_b)
+        if node_a.is_streaming() and node_b.backend not in (None, "thread", STREAM_BACKEND):
+            raise ValueError(f"Consumer {node_b} of streaming task {node_a} can't run in backend '{node_b.backend}', "
+                             f"consumers of streams run in threads.")
+        if self.expansion is not None:
+            self.scheduler.check_dependency(node_a, node_b, self.expansion[0])
+            self.expansion[1].append((node_a, node_b))
+        self.get_mutable_graph().add_edge(node_a, node_b)
+
+    @contextlib.contextmanager
+    def expand(self):
+        """
+        Adds tasks and dependencies created in the block to the running pipeline, typically from a running task whose
+        fan-out depends on its data. New dependencies are checked for cycles as they are added, new tasks are scheduled
+        by the current run when the block exits. Tasks running in other processes can't expand the pipeline.
+        """
+        scheduler = self.scheduler
+        if scheduler is None:
+            yield self
+            return
+        with scheduler.lock:
+            scheduler.graph = self.get_mutable_graph()
+            self.expansion = ([], [])
+            try:
+                yield self
+                tasks, dependencies = self.expansion
+            finally:
+                self.expansion = None
+            scheduler.add_tasks(tasks, dependencies)
+        scheduler.call_soon(scheduler.submit_ready_tasks)
+
+    def create_stream_task(self, callable, queue_size=16, output=False, resources=None, name=None):
+        task = StreamTask(callable, queue_size, output=output, resources=normalize_resources(resources), name=name)
+        return self.add_task(task)
+
+    def add_task(self, task):
+        if self.lazy_results:
+            task.pipeline = self
+        self.get_mutable_graph().add_node(task)
+        if self.expansion is not None:
+            self.expansion[0].append(task)
+        return task
+
+    def compile(self):
+        """
+        Validates the graph and freezes it into a compact CompiledGraph, which is run repeatedly without validation.
+        Adding tasks or dependencies afterwards turns it back into a mutable graph.
+        """
+        if not self.is_compiled():
+            self.initial_check()
+            self.graph = CompiledGraph(self.graph)
+        return self
 
-    def run(self):
-        self.initial_check()
+    def is_compiled(self):
+        return isinstance(self.graph, CompiledGraph)
 
-        while not self.are_all_tasks_finished():
-            self.submit_ready_tasks()
-            self.executor.wait_for_task_finish()
+    def get_mutable_graph(self):
+        if self.is_compiled():
+            self.graph = self.graph.thaw()
+        return self.graph
+
+    def invalidate(self, *tasks):
+        """Marks tasks to be executed again by the next run together with all their descendants."""
+        for task in tasks:
+            task.dirty = True
+        for task in set(tasks) | self.graph.get_descendants(tasks):
+            if not task.is_pending():
+                task.set_state_to_pending()
+
+    def set_callable(self, task, callable):
+        task.set_callable(callable)
+        self.invalidate(task)
+
+    def set_source_value(self, task, value):
+        self.set_callable(task, functools.partial(return_value, value))
+
+    def reset(self):
+        """Sets all tasks pending and drops their results, so the next run executes the whole graph."""
+        if self.columns is not None:
+            self.columns.reset()
+        for task in self.get_tasks():
+            task.dirty = True
+            task.state = TaskState.PENDING
+            task.result = None
+        self.released_tasks.clear()
+
+    def set_params(self, params):
+        """
+        Sets parameters of the next run, a mapping of tasks, or unique task names, to values passed to them as the first
+        input. Tasks whose parameter changed, was added or removed are invalidated.
+        """
+        params = {self.get_task(key): value for key, value in params.items()}
+        changed = [task for task in params.keys() | self.params.keys()
+                   if task not in params or task not in self.params
+                   or not results_equal(params[task], self.params[task])]
+        self.params = params
+        if changed:
+            self.invalidate(*changed)
+
+    def get_task(self, key):
+        if not isinstance(key, str):
+            return key
+        tasks = [task for task in self.get_tasks() if task.name == key]
+        if len(tasks) != 1:
+            raise ValueError(f"Task name '{key}' matches {len(tasks)} tasks.")
+        return tasks[0]
+
+    def run(self, params=None, resume=False, targets=None):
+        if params is not None:
+            self.set_params(params)
+        if not self.is_compiled():
+            self.initial_check()
+        self.prepare_checkpoint(resume)
+        self.pend_released_inputs()
+        scheduler = self.scheduler = Scheduler(self, self.get_required_tasks(targets))
+        self.notify_run_start()
+        try:
+            scheduler.run()
+        finally:
+            self.scheduler = None
+            self.record_run_statistics(scheduler)
+
+    async def run_async(self, params=None, resume=False, targets=None):
+        if params is not None:
+            self.set_params(params)
+        if not self.is_compiled():
+            self.initial_check()
+        self.prepare_checkpoint(resume)
+        self.pend_released_inputs()
+        scheduler = self.scheduler = AsyncScheduler(self, self.get_required_tasks(targets))
+        self.notify_run_start()
+        try:
+            await scheduler.run()
+        finally:
+            self.scheduler = None
+            self.record_run_statistics(scheduler)
+
+    def pend_released_inputs(self):
+        """
+        Finished tasks whose results were released are executed again when a pending task, e.g. an invalidated one,
+        consumes their results.
+        """
+        if not self.released_tasks:
+            return
+        stack = [task for task in self.get_tasks() if not task.is_finished()]
+        while stack:
+            for dependency in self.graph.predecessors[stack.pop()]:
+                if dependency in self.released_tasks and dependency.is_finished():
+                    self.released_tasks.discard(dependency)
+                    dependency.dirty = True
+                    dependency.set_state_to_pending()
+                    stack.append(dependency)
+
+    def get_timeout(self, task):
+        """Timeout of the task in seconds, it applies to tasks executed as a single call, not to map or stream tasks."""
+        if isinstance(task, MapTask) or task.is_streaming():
+            return None
+        return task.timeout if task.timeout is not None else self.timeout
+
+    def get_retries(self, task):
+        """Streams can't be replayed, so streaming tasks and consumers of streams are not retried."""
+        if task.is_streaming() or any(dependency.is_streaming() for dependency in self.graph.predecessors[task]):
+            return 0
+        return task.retries if task.retries is not None else self.retries
+
+    def get_required_tasks(self, targets):
+        """
+        Returns the targets, given as tasks or unique task names, together with all their ancestors. Consumers of
+        required streaming tasks are required as well, otherwise the streams wouldn't be drained. Returns None when
+        there are no targets, all tasks are required then.
+        """
+        if targets is None:
+            return None
+        required = set()
+        missing = {self.get_task(target) for target in targets}
+        while missing:
+            required |= missing | self.graph.get_ancestors(missing)
+            missing = {consumer for task in required if task.is_streaming() and not task.is_finished()
+                       for consumer in self.graph.get_output_nodes(task)} - required
+        return required
+
+    def prepare_checkpoint(self, resume):
+        if self.checkpoint is None:
+            if resume:
+                raise ValueError("Pipeline without checkpoint store can't be resumed.")
+            return
+        if resume:
+            self.checkpoint.restore(self)
+        else:
+            self.checkpoint.prepare(self)
+
+    def notify_run_start(self):
+        for hook in self.hooks:
+            hook.on_run_start(self)
+
+    def record_run_statistics(self, scheduler):
+        self.failed_tasks = scheduler.failed_tasks
+        for hook in self.hooks:
+            hook.on_run_end(self)
+        if self.release_results:
+            self.peak_result_size = scheduler.peak_result_size
+        if self.durations is not None:
+            self.durations.save()
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
 
     def initial_check(self):
         if not self.graph.is_acyclic():
             raise ValueError("The graph has cycles. Cannot execute pipeline.")
 
+        resource_pool = ResourcePool(self.resources)
+        for task in self.get_tasks():
+            resource_pool.check(task)
+
     def are_all_tasks_finished(self):
         return all(task.is_finished() for task in self.get_tasks())
 
@@ -43,7 +326,7 @@ class Pipeline:
         return [task for task in self.get_tasks() if task.is_pending() and self.are_inputs_available(task)]
 
     def get_tasks(self):
-        return self.graph.nodes
+        return self.graph.get_nodes()
 
     def are_inputs_available(self, task):
         return all(dependent_task.is_finished() for dependent_task in self.get_dependencies(task))
@@ -52,4 +335,8 @@ class Pipeline:
         return self.graph.get_input_nodes(node)
 
     def get_task_inputs(self, task):
-        return [dependent_task.result for dependent_task in self.get_dependencies(task) if dependent_task.result is not None]
\ No newline at end of file
+        inputs = [dependent_task.get_output(task) for dependent_task in self.get_dependencies(task)]
+        inputs = [task_input for task_input in inputs if task_input is not None]
+        if task in self.params:
+            inputs.insert(0, self.params[task])
+        return inputs
\ No newline at end of file
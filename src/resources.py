@@ -0,0 +1,41 @@
+def normalize_resources(resources):
+    """Resources are given either as a mapping of resource names to amounts, or as names requesting one unit each."""
+    if not resources:
+        return None
+    if isinstance(resources, str):
+        return {resources: 1}
+    if isinstance(resources, dict):
+        return dict(resources)
+    return {name: 1 for name in resources}
+
+class ResourcePool:
+    """
+    The ResourcePool class tracks free units of named resource classes (e.g. cpu, memory, io or license slots). Task
+    is dispatched only when all resources it requests can be acquired. Resources without configured capacity are not
+    limited.
+    """
+    def __init__(self, capacities=None):
+        self.capacities = dict(capacities or {})
+        self.used = {name: 0 for name in self.capacities}
+
+    def check(self, task):
+        for name, amount in (task.resources or {}).items():
+            capacity = self.capacities.get(name)
+            if capacity is not None and amount > capacity:
+                raise ValueError(f"Task {task} requests {amount} of resource '{name}', but capacity is {capacity}.")
+
+    def try_acquire(self, resources):
+        if not resources:
+            return True
+        for name, amount in resources.items():
+            if name in self.capacities and self.used[name] + amount > self.capacities[name]:
+                return False
+        for name, amount in resources.items():
+            if name in self.capacities:
+                self.used[name] += amount
+        return True
+
+    def release(self, resources):
+        for name, amount in (resources or {}).items():
+            if name in self.capacities:
+                self.used[name] -= amount
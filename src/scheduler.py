@@ -0,0 +1,588 @@
+import asyncio
+import functools
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from failures import CONTINUE_INDEPENDENT, TaskInterruptedError, TaskTimeoutError, Watchdog, await_with_timeout
+from backends import STREAM_BACKEND
+from fusion import BatchSizer, find_chains, is_fusible
+from resources import ResourcePool
+from sizes import result_size
+from task import results_equal
+from tracing import report_span, traced_await
+from transport import release_shared_result
+
+logger = logging.getLogger(__name__)
+
+class Scheduler:
+    """
+    The Scheduler class dispatches tasks as soon as their dependencies are finished. It counts unfinished dependencies
+    of every task, a task enters the ready queue when its counter drops to zero and finished tasks submit their ready
+    successors directly from the completion callback. The remaining consumers of every result are counted as well and
+    results are released once their last consumer finished. In the memory release mode of the pipeline the result
+    references of tasks not marked as outputs are dropped as well and the peak resident result size is recorded.
+
+    With recorded task durations the ready queue is ordered by upward rank, the estimated duration of the longest path
+    from a task to a sink, so tasks on the critical path are started first when there are more ready tasks than
+    workers. Tasks requesting resource classes are dispatched only when the requested resources are free, until then
+    they wait aside the ready queue.
+
+    With early cutoff enabled a task which was reset only because one of its ancestors was invalidated is executed
+    only if the result of any of its dependencies changed, otherwise its previous result is kept.
+
+    Consumers of streaming tasks become ready as soon as the streaming producer is submitted, the items flow to them over
+    bounded streams while both are running. Stages of streams run in threads of their own and don't take worker slots,
+    otherwise a producer waiting for its consumer could hold the last slot.
+
+    With chain fusion enabled maximal linear chains of tasks are submitted as one unit, the first task of a chain is
+    dispatched as usual and the remaining tasks are finished one by one from its completion callback.
+
+    When only some tasks are required the other ones stay pending, results consumed by them are not released.
+
+    Failed tasks with retries left are dispatched again after an exponential backoff, tasks exceeding their timeout
+    fail with TaskTimeoutError. By default the first failure cancels the run, queued tasks are cancelled and running
+    ones are requested to stop. With the continue independent failure policy only the descendants of failed tasks are
+    skipped, they stay pending, and the first error is raised once all other tasks finished.
+
+    With task batching enabled ready tasks which would be fusible are submitted in batches run back-to-back by a worker,
+    the batch size adapts to the measured durations of the batched tasks. A batch takes a single worker slot.
+
+    Tasks added to the graph while it runs are counted in like the tasks of the prepared graph. New dependencies may
+    only lead to new tasks or to tasks still waiting for an unfinished dependency.
+    """
+    def __init__(self, pipeline, required_tasks=None):
+        self.pipeline = pipeline
+        self.required_tasks = required_tasks
+        self.graph = pipeline.graph
+        self.executor = pipeline.executor
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.dispatching = threading.local()
+        self.remaining_dependencies = {}
+        self.remaining_consumers = {}
+        self.ready_tasks = deque()
+        self.durations = pipeline.durations
+        self.ranks = None
+        self.started_at = {}
+        self.max_workers = pipeline.max_workers
+        self.running_tasks = 0
+        self.resource_pool = ResourcePool(pipeline.resources)
+        self.blocked_tasks = []
+        self.chains = {}
+        self.fused_tasks = set()
+        self.batch_sizer = None
+        self.batchable = {}
+        # streaming tasks and their consumers
+        self.stream_stages = set()
+        # batched tasks which don't release a worker slot, the first task of a batch does
+        self.batch_followers = set()
+        self.previous_results = {}
+        self.changed_tasks = set()
+        self.unfinished_tasks = 0
+        self.error = None
+        self.watchdog = Watchdog()
+        self.attempts = {}
+        self.failed_tasks = {}
+        self.skipped_tasks = set()
+        self.result_sizes = {}
+        self.resident_result_size = 0
+        self.peak_result_size = 0
+
+    def run(self):
+        if not self.prepare():
+            return
+
+        self.submit_ready_tasks()
+        self.finished.wait()
+        self.raise_error()
+
+    def raise_error(self):
+        self.watchdog.close()
+        if self.error is not None:
+            raise self.error
+        if self.failed_tasks:
+            raise next(iter(self.failed_tasks.values()))
+
+    def prepare(self):
+        self.executor.reset_cancellation()
+        tasks = [task for task in self.graph.get_nodes() if not task.is_finished()
+                 and (self.required_tasks is None or task in self.required_tasks)]
+
+        with self.lock:
+            for task in tasks:
+                remaining = sum(1 for dependency in self.graph.predecessors[task] if not dependency.is_finished())
+                self.remaining_dependencies[task] = remaining
+                self.remaining_consumers[task] = self.graph.get_out_degree(task)
+            if self.pipeline.fuse_chains and not self.pipeline.early_cutoff:
+                # early cutoff decides about every task at its dispatch, such tasks can't be fused
+                for chain in find_chains(self.graph, tasks, lambda task: is_fusible(task, self.pipeline)):
+                    self.chains[chain[0]] = chain
+                    self.fused_tasks.update(chain[1:])
+            if self.pipeline.batch_tasks and not self.pipeline.early_cutoff:
+                self.batch_sizer = BatchSizer(self.max_workers or os.cpu_count() or 1)
+            if self.durations is not None:
+                self.ranks = self.compute_upward_ranks(tasks)
+                self.ready_tasks = []
+            self.add_stream_stages(tasks)
+            for task in tasks:
+                if self.remaining_dependencies[task] == 0:
+                    self.push_ready_task(task)
+            self.unfinished_tasks = len(tasks)
+        return tasks
+
+    def check_dependency(self, task, successor, new_tasks):
+        """Checks a dependency added while the graph runs, it is called with the lock held."""
+        if (task not in new_tasks and not task.is_finished()
+                and (task not in self.remaining_dependencies or task in self.skipped_tasks)):
+            raise ValueError(f"Task {task} is not executed by the current run.")
+        if successor not in new_tasks and (not successor.is_pending()
+                                           or self.remaining_dependencies.get(successor) == 0):
+            raise ValueError(f"Task {successor} is already scheduled, dependencies can't be added to it.")
+        if successor in self.fused_tasks or successor in self.chains:
+            # inputs of a chain are gathered once for the whole chain
+            raise ValueError(f"Task {successor} runs in a fused chain, dependencies can't be added to it.")
+        if self.graph.creates_cycle(task, successor):
+            raise ValueError(f"Dependency {task} -> {successor} would create a cycle.")
+
+    def add_tasks(self, tasks, dependencies):
+        """Schedules tasks and dependencies added while the graph runs, it is called with the lock held."""
+        if self.finished.is_set():
+            # run is over, new tasks are executed by the next run
+            return
+        new_tasks = set(tasks)
+        for task in tasks:
+            self.remaining_dependencies[task] = sum(
+                1 for dependency in self.graph.predecessors[task] if not dependency.is_finished())
+            self.remaining_consumers[task] = self.graph.get_out_degree(task)
+        for task, successor in dependencies:
+            if task not in new_tasks and task in self.remaining_consumers:
+                self.remaining_consumers[task] += 1
+            if successor not in new_tasks and successor in self.remaining_dependencies and not task.is_finished():
+                self.remaining_dependencies[successor] += 1
+        if self.ranks is not None:
+            for task in reversed(tasks):
+                successor_ranks = [self.ranks[successor] for successor in self.graph.get_output_nodes(task)
+                                   if successor in self.ranks]
+                self.ranks[task] = self.durations.estimate(task) + max(successor_ranks, default=0.0)
+        self.add_stream_stages(tasks)
+        self.unfinished_tasks += len(tasks)
+        for task in tasks:
+            if self.remaining_dependencies[task] == 0:
+                self.push_ready_task(task)
+
+    def add_stream_stages(self, tasks):
+        for task in tasks:
+            if task.is_streaming():
+                self.stream_stages.add(task)
+                self.stream_stages.update(self.graph.get_output_nodes(task))
+
+    def compute_upward_ranks(self, tasks):
+        """Upward rank is the estimated duration of the task plus the highest upward rank of its successors."""
+        tasks = set(tasks)
+        ranks = {}
+        for task in reversed(self.graph.topological_order()):
+            if task in tasks:
+                successor_ranks = [ranks[successor] for successor in self.graph.get_output_nodes(task) if successor in ranks]
+                ranks[task] = self.durations.estimate(task) + max(successor_ranks, default=0.0)
+        return ranks
+
+    def push_ready_task(self, task):
+        if self.ranks is None:
+            if task in self.stream_stages:
+                self.ready_tasks.appendleft(task)
+            else:
+                self.ready_tasks.append(task)
+        else:
+            # stage is started right away, its producer or its consumers are running
+            rank = float("inf") if task in self.stream_stages else self.ranks[task]
+            heapq.heappush(self.ready_tasks, (-rank, self.graph.order[task], task))
+
+    def peek_ready_task(self):
+        return self.ready_tasks[0] if self.ranks is None else self.ready_tasks[0][-1]
+
+    def pop_ready_task(self):
+        if self.ranks is None:
+            return self.ready_tasks.popleft()
+        return heapq.heappop(self.ready_tasks)[-1]
+
+    def submit_ready_tasks(self):
+        if getattr(self.dispatching, "active", False):
+            # task finished synchronously while submitting, the outer loop of this thread picks up its successors
+            return
+
+        self.dispatching.active = True
+        try:
+            while True:
+                with self.lock:
+                    if not self.ready_tasks or self.error is not None:
+                        return
+                    stage = self.peek_ready_task() in self.stream_stages
+                    if not stage and self.max_workers is not None and self.running_tasks >= self.max_workers:
+                        return
+                    task = self.pop_ready_task()
+                    if not self.resource_pool.try_acquire(task.resources):
+                        self.blocked_tasks.append(task)
+                        continue
+                    if not stage:
+                        self.running_tasks += 1
+                    batch = self.take_batch(task) if self.batch_sizer is not None else None
+                if batch:
+                    self.dispatch_batch(batch)
+                else:
+                    self.dispatch(task, self.pipeline.get_task_inputs(task))
+        finally:
+            self.dispatching.active = False
+
+    def is_batchable(self, task):
+        batchable = self.batchable.get(task)
+        if batchable is None:
+            batchable = self.batchable[task] = task not in self.chains and is_fusible(task, self.pipeline)
+        return batchable
+
+    def take_batch(self, task):
+        """
+        Takes ready tasks which can run in one batch with the task from the head of the ready queue. Returns the batch,
+        or None when the task can't be batched. It is called with the lock held.
+        """
+        if not self.is_batchable(task):
+            return None
+        size = self.batch_sizer.get_size(len(self.ready_tasks) + 1)
+        # a task running alone is still submitted as a batch of one, so the sizer learns its duration measured in the
+        # worker and batches grow again once the tasks get short
+        batch = [task]
+        while len(batch) < size and self.ready_tasks:
+            candidate = self.peek_ready_task()
+            if (not self.is_batchable(candidate) or candidate.backend != task.backend
+                    or candidate.transport != task.transport):
+                break
+            batch.append(self.pop_ready_task())
+        self.batch_followers.update(batch[1:])
+        return batch
+
+    def dispatch_batch(self, batch):
+        inputs = [self.pipeline.get_task_inputs(task) for task in batch]
+        self.submit_batch(batch, inputs, self.on_batch_task_executed)
+
+    def on_batch_task_executed(self, task, error=None, duration=None):
+        if duration is not None:
+            self.batch_sizer.record(duration)
+        self.on_chain_task_executed(task, error, duration)
+
+    def dispatch(self, task, inputs):
+        if task.is_streaming():
+            self.dispatch_stream(task, inputs)
+            return
+        if task in self.chains:
+            self.dispatch_chain(self.chains[task], inputs)
+            return
+
+        if self.pipeline.early_cutoff:
+            with self.lock:
+                inputs_changed = any(dependency in self.changed_tasks for dependency in self.graph.predecessors[task])
+            if not task.dirty and not inputs_changed:
+                # inputs are the same as in the previous run, so is the result
+                task.set_state_to_started()
+                task.set_state_to_finished()
+                self.on_task_finished(task)
+                return
+            self.previous_results[task] = task.result
+
+        key = None
+        cache = self.pipeline.cache
+        if cache is not None and task.cacheable:
+            key = cache.get_key(task.get_cache_identity(), inputs)
+        if key is not None:
+            hit, result = cache.get(key)
+            if hit:
+                task.set_state_to_started()
+                task.result = result
+                task.set_state_to_finished()
+                self.on_task_finished(task)
+                return
+
+        if self.durations is not None:
+            self.started_at[task] = time.perf_counter()
+        self.submit(task, inputs, lambda task, error=None: self.on_task_executed(task, error, key))
+
+    def dispatch_stream(self, task, inputs):
+        task.open_streams(self.graph.get_output_nodes(task))
+        self.submit(task, inputs, self.on_task_finished)
+        with self.lock:
+            self.release_successors(task)
+        self.submit_ready_tasks()
+
+    def dispatch_chain(self, chain, inputs):
+        # results of intermediate tasks which would be released right away are not sent back from the worker, unless
+        # they are checkpointed
+        keep_all = not self.pipeline.release_results or self.pipeline.checkpoint is not None
+        kept = [keep_all or task.output or task is chain[-1] for task in chain]
+        # parameter of the first task is in its inputs
+        params = [(self.pipeline.params[task],) if task in self.pipeline.params and task is not chain[0] else ()
+                  for task in chain]
+        self.submit_chain(chain, inputs, kept, params, self.on_chain_task_executed)
+
+    def on_chain_task_executed(self, task, error=None, duration=None):
+        if error is None and self.durations is not None:
+            self.durations.record(task, duration)
+        self.on_task_finished(task, error)
+
+    def release_successors(self, task):
+        for successor in self.graph.get_output_nodes(task):
+            if successor in self.fused_tasks:
+                # finished by the completion of its chain
+                continue
+            if successor in self.remaining_dependencies:
+                self.remaining_dependencies[successor] -= 1
+                if self.remaining_dependencies[successor] == 0:
+                    self.push_ready_task(successor)
+
+    def on_task_executed(self, task, error=None, cache_key=None):
+        if error is None:
+            if cache_key is not None:
+                self.pipeline.cache.put(cache_key, task.result)
+            if self.durations is not None:
+                self.durations.record(task, time.perf_counter() - self.started_at.pop(task))
+        self.on_task_finished(task, error)
+
+    def get_backend_override(self, task):
+        return STREAM_BACKEND if task in self.stream_stages else None
+
+    def submit(self, task, inputs, callback):
+        future = self.executor.submit_for_execution(task, inputs, callback=callback,
+                                                    backend=self.get_backend_override(task))
+        self.watch(task, future, callback)
+
+    def watch(self, task, future, callback):
+        """Fails the task submitted as the future with TaskTimeoutError when it doesn't finish within its timeout."""
+        timeout = self.pipeline.get_timeout(task)
+        if timeout is None or future is None:
+            return
+        handle = self.watchdog.schedule(timeout, functools.partial(self.on_timeout, task, future, timeout, callback))
+        future.add_done_callback(lambda future: self.watchdog.cancel(handle))
+
+    def on_timeout(self, task, future, timeout, callback):
+        if not self.executor.abandon(future):
+            return
+        self.executor.terminate(task)
+        callback(task, TaskTimeoutError(f"Task {task.name} timed out after {timeout} s."))
+
+    def retry(self, task, error):
+        """Dispatches the failed task again after a backoff. Returns False when the task can't be retried."""
+        if self.error is not None or task in self.chains or task in self.fused_tasks:
+            return False
+        if isinstance(error, TaskInterruptedError):
+            # task didn't fail on its own, it doesn't use up its retries
+            delay = 0.0
+        else:
+            attempt = self.attempts.get(task, 0)
+            if attempt >= self.pipeline.get_retries(task):
+                return False
+            self.attempts[task] = attempt + 1
+            delay = self.pipeline.retry_backoff * 2 ** attempt
+            logger.warning("Task %s failed: %r, retry %d in %.2f s.", task.name, error, attempt + 1, delay)
+        self.watchdog.schedule(delay, functools.partial(self.call_soon, self.redispatch, task))
+        return True
+
+    def redispatch(self, task):
+        if self.error is not None:
+            return
+        try:
+            self.dispatch(task, self.pipeline.get_task_inputs(task))
+        except Exception as error:
+            self.on_task_failed(task, error)
+
+    def call_soon(self, function, *args):
+        function(*args)
+
+    def submit_chain(self, chain, inputs, kept, params, callback):
+        self.executor.submit_chain(chain, inputs, kept, params, callback)
+
+    def submit_batch(self, tasks, inputs, callback):
+        self.executor.submit_batch(tasks, inputs, callback)
+
+    def releases_slot(self, task):
+        """
+        Returns True when the finished task frees a worker slot, fused and batched tasks share one slot and stages of
+        streams take none.
+        """
+        if task in self.batch_followers:
+            self.batch_followers.discard(task)
+            return False
+        return task not in self.fused_tasks and task not in self.stream_stages
+
+    def complete(self):
+        self.finished.set()
+
+    def on_task_finished(self, task, error=None):
+        for dependency in self.graph.predecessors[task]:
+            if dependency.is_streaming():
+                # producer must not wait for a consumer which finished
+                dependency.get_output(task).abandon()
+        if error is None and self.pipeline.checkpoint is not None and not task.is_streaming():
+            # written before the run can complete, so the checkpoint is flushed at the end of the run
+            self.pipeline.checkpoint.save(self.pipeline, task)
+
+        if error is not None:
+            self.on_task_failed(task, error)
+            return
+
+        with self.lock:
+            task.dirty = False
+            if task in self.previous_results and not results_equal(self.previous_results.pop(task), task.result):
+                self.changed_tasks.add(task)
+            if self.pipeline.release_results:
+                self.result_sizes[task] = result_size(task.result)
+                self.resident_result_size += self.result_sizes[task]
+                self.peak_result_size = max(self.peak_result_size, self.resident_result_size)
+
+            if self.releases_slot(task):
+                self.running_tasks -= 1
+            self.unfinished_tasks -= 1
+            if task.resources:
+                self.resource_pool.release(task.resources)
+                for blocked_task in self.blocked_tasks:
+                    self.push_ready_task(blocked_task)
+                self.blocked_tasks.clear()
+            if not task.is_streaming():
+                self.release_successors(task)
+
+            consumed = [task] if self.remaining_consumers[task] == 0 else []
+            for dependency in self.graph.predecessors[task]:
+                if dependency in self.remaining_consumers:
+                    self.remaining_consumers[dependency] -= 1
+                    if self.remaining_consumers[dependency] == 0:
+                        consumed.append(dependency)
+
+            last = self.unfinished_tasks == 0
+
+        for consumed_task in consumed:
+            self.on_result_consumed(consumed_task)
+        if last:
+            # results consumed by the last task are released before the run returns
+            self.complete()
+        self.submit_ready_tasks()
+
+    def on_task_failed(self, task, error):
+        if self.retry(task, error):
+            return
+        with self.lock:
+            if self.pipeline.failure_policy == CONTINUE_INDEPENDENT:
+                self.skip_descendants(task, error)
+                cancel = False
+            else:
+                cancel = self.error is None
+                if cancel:
+                    self.error = error
+                self.complete()
+        if cancel:
+            self.cancel()
+        else:
+            self.submit_ready_tasks()
+
+    def cancel(self):
+        """Cancels tasks of the failed run."""
+        self.executor.cancel()
+
+    def skip_descendants(self, task, error):
+        """Records the failed task, its pending descendants are not executed in this run."""
+        self.failed_tasks[task] = error
+        if self.releases_slot(task):
+            self.running_tasks -= 1
+        if task.resources:
+            self.resource_pool.release(task.resources)
+            for blocked_task in self.blocked_tasks:
+                self.push_ready_task(blocked_task)
+            self.blocked_tasks.clear()
+        skipped = {descendant for descendant in self.graph.get_descendants([task])
+                   if descendant in self.remaining_dependencies and descendant.is_pending()} - self.skipped_tasks
+        self.skipped_tasks |= skipped
+        self.unfinished_tasks -= 1 + len(skipped)
+        if self.unfinished_tasks == 0:
+            self.complete()
+
+    def on_result_consumed(self, task):
+        release_shared_result(task.result)
+        if self.pipeline.release_results and not task.output:
+            with self.lock:
+                self.resident_result_size -= self.result_sizes.pop(task)
+            self.executor.get_backend(task.backend).release(task.result)
+            task.result = None
+            self.pipeline.released_tasks.add(task)
+
+class AsyncScheduler(Scheduler):
+    """
+    The AsyncScheduler class runs coroutine tasks concurrently on a single event loop, without a thread per task.
+    Blocking tasks are still submitted to the executor backends and their completion is handed over to the loop.
+    """
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.finished = asyncio.Event()
+        # coroutine tasks running on the loop
+        self.coroutine_tasks = set()
+        if not self.prepare():
+            return
+
+        self.submit_ready_tasks()
+        await self.finished.wait()
+        self.raise_error()
+
+    def submit(self, task, inputs, callback):
+        if task.is_coroutine():
+            task.set_state_to_started()
+            coroutine = task.execute_async(*inputs)
+            timeout = self.pipeline.get_timeout(task)
+            if timeout is not None:
+                coroutine = await_with_timeout(coroutine, timeout, task.name)
+            submitted = None
+            if self.executor.hooks:
+                submitted = time.perf_counter()
+                coroutine = traced_await(coroutine)
+            coroutine_task = self.loop.create_task(coroutine)
+            self.coroutine_tasks.add(coroutine_task)
+            coroutine_task.add_done_callback(self.coroutine_tasks.discard)
+            coroutine_task.add_done_callback(
+                lambda coroutine_task: self.on_coroutine_done(task, coroutine_task, callback, submitted))
+        else:
+            def on_executed(task, error=None):
+                self.loop.call_soon_threadsafe(callback, task, error)
+
+            future = self.executor.submit_for_execution(task, inputs, callback=on_executed,
+                                                        backend=self.get_backend_override(task))
+            self.watch(task, future, on_executed)
+
+    def call_soon(self, function, *args):
+        self.loop.call_soon_threadsafe(function, *args)
+
+    def cancel(self):
+        """Cancels coroutine tasks running on the loop together with tasks of the executor."""
+        for coroutine_task in list(self.coroutine_tasks):
+            coroutine_task.cancel()
+        super().cancel()
+
+    def submit_chain(self, chain, inputs, kept, params, callback):
+        self.executor.submit_chain(
+            chain, inputs, kept, params,
+            lambda task, error=None, duration=None: self.loop.call_soon_threadsafe(callback, task, error, duration))
+
+    def submit_batch(self, tasks, inputs, callback):
+        self.executor.submit_batch(
+            tasks, inputs,
+            lambda task, error=None, duration=None: self.loop.call_soon_threadsafe(callback, task, error, duration))
+
+    def on_coroutine_done(self, task, coroutine_task, callback, submitted=None):
+        if coroutine_task.cancelled():
+            error = asyncio.CancelledError(f"Task {task.name} was cancelled.")
+        else:
+            error = coroutine_task.exception()
+        if error is None:
+            result = coroutine_task.result()
+            if submitted is not None:
+                report_span(self.executor.hooks, task, submitted, result)
+                result = result.result
+            task.result = result
+            task.set_state_to_finished()
+        callback(task, error)
@@ -0,0 +1,13 @@
+import sys
+
+import numpy as np
+
+def result_size(result):
+    """Approximate memory held by a task result in bytes."""
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, (list, tuple, set, frozenset)):
+        return sys.getsizeof(result) + sum(result_size(item) for item in result)
+    if isinstance(result, dict):
+        return sys.getsizeof(result) + sum(result_size(key) + result_size(value) for key, value in result.items())
+    return sys.getsizeof(result)
@@ -0,0 +1,84 @@
+import queue
+
+from backends import STREAM_BACKEND
+from task import Task
+
+class StreamEnd:
+    """ Marker closing a stream, carries the error of the producer if it failed. """
+    def __init__(self, error=None):
+        self.error = error
+
+class Stream:
+    """
+    Bounded queue of items flowing from a streaming producer to one consumer. Producer blocks while the queue is full,
+    which propagates backpressure upstream. Consumer iterates the stream until the producer closes it.
+    """
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        self.abandoned = False
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if isinstance(item, StreamEnd):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+
+    def put(self, item):
+        while not self.abandoned:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self, error=None):
+        self.put(StreamEnd(error))
+
+    def abandon(self):
+        """Called when the consumer finished, producer stops waiting for free space in the queue."""
+        self.abandoned = True
+
+class StreamTask(Task):
+    """
+    The StreamTask class wraps a generator function. Every yielded item is passed to each consumer over its own bounded
+    stream as soon as it is produced, so consumers start when the producer starts and the stages overlap. Consumers
+    receive the stream as their input, streaming consumers are generator functions iterating their input streams.
+    Streaming tasks and their consumers run in threads of their own, outside the worker pools.
+    """
+    __slots__ = ("queue_size", "streams")
+
+    def __init__(self, callable, queue_size=16, **options):
+        super().__init__(callable, cacheable=False, backend=STREAM_BACKEND, **options)
+        self.queue_size = queue_size
+        self.streams = {}
+
+    def is_streaming(self):
+        return True
+
+    def open_streams(self, consumers):
+        self.streams = {consumer: Stream(self.queue_size) for consumer in consumers}
+
+    def get_output(self, consumer):
+        return self.streams[consumer]
+
+    def execute(self, *args):
+        count = 0
+        try:
+            for item in self.callable(*args):
+                for stream in self.streams.values():
+                    stream.put(item)
+                count += 1
+                if self.streams and all(stream.abandoned for stream in self.streams.values()):
+                    # no consumer reads any more items
+                    break
+        except Exception as error:
+            for stream in self.streams.values():
+                stream.close(error)
+            raise
+        for stream in self.streams.values():
+            stream.close()
+        # result of a streaming task is the number of produced items
+        return count
@@ -1,5 +1,13 @@
 from enum import Enum
+import asyncio
+import functools
+import inspect
+import itertools
 import logging
+import operator
+import weakref
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -8,16 +16,134 @@ class TaskState(Enum):
     STARTED = 1
     FINISHED = 2
 
+# task states indexed by their values
+STATES = tuple(TaskState)
+
+task_ids = itertools.count()
+
+def get_callable_name(callable):
+    if isinstance(callable, functools.partial):
+        return get_callable_name(callable.func)
+    return getattr(callable, "__name__", type(callable).__name__)
+
+def return_value(value):
+    return value
+
+def results_equal(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return (isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and a.dtype == b.dtype
+                and np.array_equal(a, b))
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        # result doesn't support plain comparison (e.g. contains arrays)
+        return a is b
+
+class TaskOptions:
+    """
+    Options of a task which are rarely set. Options are not changed in place, tasks with the same options share one
+    TaskOptions object, so a task with default options holds just a reference to the shared default.
+    """
+    __slots__ = ("backend", "transport", "cacheable", "output", "resources", "timeout", "retries", "pipeline",
+                 "__weakref__")
+
+    def __init__(self, backend=None, transport=None, cacheable=True, output=False, resources=None, timeout=None,
+                 retries=None, pipeline=None):
+        self.backend = backend
+        self.transport = transport
+        self.cacheable = cacheable
+        self.output = output
+        self.resources = resources
+        # timeout in seconds and number of retries of failed executions, None means the default of the pipeline
+        self.timeout = timeout
+        self.retries = retries
+        # pipeline with lazy results computing the task on demand
+        self.pipeline = pipeline
+
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in OPTION_NAMES}
+        values.update(changes)
+        return get_task_options(**values)
+
+OPTION_NAMES = TaskOptions.__slots__[:-1]
+
+shared_options = weakref.WeakValueDictionary()
+
+def get_task_options(**values):
+    """Returns TaskOptions with the given values, shared by all tasks with the same options."""
+    resources = values.get("resources")
+    key = tuple(values.get(name) for name in OPTION_NAMES if name != "resources")
+    key += (tuple(sorted(resources.items())) if resources else None,)
+    try:
+        options = shared_options.get(key)
+    except TypeError:
+        # unhashable option, e.g. a custom backend
+        return TaskOptions(**values)
+    if options is None:
+        options = shared_options[key] = TaskOptions(**values)
+    return options
+
+DEFAULT_OPTIONS = get_task_options()
+
+def option(name):
+    def set_option(task, value):
+        task.options = task.options.replace(**{name: value})
+    return property(operator.attrgetter(f"options.{name}"), set_option)
+
 class Task:
-    """ The Task class encapsulates the state and execution logic of individual tasks. """
-    def __init__(self, callable):
-        self.id = callable.__name__
+    """
+    The Task class encapsulates the state and execution logic of individual tasks. Every task has a unique integer id,
+    its name defaults to the name of the callable. Attributes are kept in slots, so a task takes no per-instance dict,
+    and rarely set options are kept in a TaskOptions object shared with other tasks.
+
+    A task bound to a pipeline with lazy results computes itself and its missing ancestors when its result is requested
+    while it is pending.
+    """
+    __slots__ = ("id", "name", "callable", "options", "dirty", "coroutine", "state", "result")
+
+    backend = option("backend")
+    transport = option("transport")
+    cacheable = option("cacheable")
+    output = option("output")
+    resources = option("resources")
+    timeout = option("timeout")
+    retries = option("retries")
+    pipeline = option("pipeline")
+
+    def __init__(self, callable, backend=None, transport=None, cacheable=True, output=False, resources=None,
+                 name=None, timeout=None, retries=None):
+        self.id = next(task_ids)
+        self.name = name or get_callable_name(callable)
         self.callable = callable
+        if (backend is None and transport is None and cacheable and not output and resources is None
+                and timeout is None and retries is None):
+            self.options = DEFAULT_OPTIONS
+        else:
+            self.options = get_task_options(backend=backend, transport=transport, cacheable=cacheable, output=output,
+                                            resources=resources, timeout=timeout, retries=retries)
+        # task has to be executed, it didn't run yet or it was invalidated
+        self.dirty = True
+        self.coroutine = inspect.iscoroutinefunction(callable)
         self.state = TaskState.PENDING
         self.result = None
 
+    def __getstate__(self):
+        # pipeline stays in the process which runs it, a worker process needs only the task itself
+        state = {name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ())
+                 if name != "options" and hasattr(self, name)}
+        state.update((name, getattr(self.options, name)) for name in OPTION_NAMES if name != "pipeline")
+        return state
+
+    def __setstate__(self, state):
+        self.options = get_task_options(**{name: state.pop(name) for name in OPTION_NAMES if name in state})
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __str__(self):
-        return f"{self.id}"
+        return f"{self.name}"
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id} {self.name}>"
 
     def is_pending(self):
         return self.state == TaskState.PENDING
@@ -28,19 +154,127 @@ class Task:
     def is_finished(self):
         return self.state == TaskState.FINISHED
 
+    def set_state_to_pending(self):
+        self.state = TaskState.PENDING
+        logger.info("Task %s PENDING", self.name)
+
     def set_state_to_started(self):
         self.state = TaskState.STARTED
-        logger.info(f"Task {self.id} STARTED")
+        logger.info("Task %s STARTED", self.name)
 
     def set_state_to_finished(self):
         self.state = TaskState.FINISHED
-        logger.info(f"Task {self.id} FINISHED")
+        logger.info("Task %s FINISHED", self.name)
+
+    def set_callable(self, callable):
+        self.callable = callable
+        self.coroutine = inspect.iscoroutinefunction(callable)
+
+    def is_streaming(self):
+        return False
+
+    def get_output(self, consumer):
+        """Input passed to the consumer of the task."""
+        return self.result
+
+    def get_cache_identity(self):
+        """Callable (or tuple of callables and values) which determines the result together with the inputs."""
+        return self.callable
+
+    def is_coroutine(self):
+        return self.coroutine
 
     def get_result(self):
+        if self.pipeline is not None and self.is_pending():
+            self.pipeline.run(targets=[self])
         return self.result
 
     def execute(self, *args):
-        logger.debug(f"Task {self.id} inputs:\n{args}")
-        result = self.callable(*args)
-        logger.debug(f"Task {self.id} outputs:\n{result}")
+        # inputs and outputs can be large, they are formatted only when debug logging is enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Task %s inputs:\n%s", self.name, args)
+        if self.coroutine:
+            # coroutine task submitted to a worker outside of an event loop
+            result = asyncio.run(self.callable(*args))
+        else:
+            result = self.callable(*args)
+        if debug:
+            logger.debug("Task %s outputs:\n%s", self.name, result)
         return result
+
+    async def execute_async(self, *args):
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Task %s inputs:\n%s", self.name, args)
+        result = await self.callable(*args)
+        if debug:
+            logger.debug("Task %s outputs:\n%s", self.name, result)
+        return result
+
+class TaskColumns:
+    """
+    Columnar storage of states and results of tasks owned by a pipeline. States are kept in a byte array and results in
+    a list, both indexed by slots allocated to ColumnarTask instances, so all tasks can be queried or reset at once.
+    """
+    def __init__(self):
+        self.states = bytearray()
+        self.results = []
+
+    def __len__(self):
+        return len(self.results)
+
+    def allocate(self):
+        self.states.append(TaskState.PENDING.value)
+        self.results.append(None)
+        return len(self.results) - 1
+
+    def count(self, state):
+        return self.states.count(state.value)
+
+    def reset(self):
+        """Sets all tasks pending and drops their results."""
+        self.states[:] = bytes(len(self.states))
+        self.results[:] = [None] * len(self.results)
+
+class ColumnarTask(Task):
+    """
+    Task whose state and result are stored in the TaskColumns of its pipeline. The state and result slots of Task are
+    not needed, they hold the columns and the index of the task in them instead.
+    """
+    __slots__ = ()
+
+    columns = Task.state
+    slot = Task.result
+
+    def __init__(self, callable, columns, **options):
+        self.columns = columns
+        self.slot = columns.allocate()
+        super().__init__(callable, **options)
+
+    def __getstate__(self):
+        # columns stay with the pipeline, a worker process needs only the callable and the options of the task
+        state = super().__getstate__()
+        del state["state"], state["result"]
+        return state
+
+    def __setstate__(self, state):
+        self.columns = None
+        self.slot = None
+        super().__setstate__(state)
+
+    @property
+    def state(self):
+        return STATES[self.columns.states[self.slot]]
+
+    @state.setter
+    def state(self, state):
+        self.columns.states[self.slot] = state.value
+
+    @property
+    def result(self):
+        return self.columns.results[self.slot]
+
+    @result.setter
+    def result(self, result):
+        self.columns.results[self.slot] = result
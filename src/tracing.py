@@ -0,0 +1,190 @@
+import collections
+import json
+import os
+import threading
+import time
+
+from sizes import result_size
+
+TracedResult = collections.namedtuple("TracedResult", ["result", "started", "finished", "pid", "thread", "thread_name"])
+
+def traced_call(function, *args):
+    """Runs the function in the worker and returns its result together with the timestamps and the worker identity."""
+    started = time.perf_counter()
+    result = function(*args)
+    finished = time.perf_counter()
+    thread = threading.current_thread()
+    return TracedResult(result, started, finished, os.getpid(), thread.native_id, thread.name)
+
+async def traced_await(coroutine):
+    """Awaits the coroutine on the event loop and returns its result together with the timestamps."""
+    started = time.perf_counter()
+    result = await coroutine
+    finished = time.perf_counter()
+    thread = threading.current_thread()
+    return TracedResult(result, started, finished, os.getpid(), thread.native_id, thread.name)
+
+class TaskSpan:
+    """
+    Execution record of a task, or of a single chunk of a map task. Timestamps are `time.perf_counter()` values of the
+    monotonic clock, which is shared by the worker processes of the host.
+    """
+    def __init__(self, task, submitted, started, finished, pid, thread, thread_name, result_size, chunk=None):
+        self.task = task
+        self.submitted = submitted
+        self.started = started
+        self.finished = finished
+        self.pid = pid
+        self.thread = thread
+        self.thread_name = thread_name
+        self.result_size = result_size
+        self.chunk = chunk
+
+    def __repr__(self):
+        return f"TaskSpan({self.task}, queue_wait={self.queue_wait:.6f}, duration={self.duration:.6f})"
+
+    @property
+    def queue_wait(self):
+        return self.started - self.submitted
+
+    @property
+    def duration(self):
+        return self.finished - self.started
+
+    @classmethod
+    def from_traced(cls, task, submitted, traced, size, chunk=None):
+        return cls(task, submitted, traced.started, traced.finished, traced.pid, traced.thread, traced.thread_name,
+                   size, chunk)
+
+class Hook:
+    """
+    Base class of instrumentation hooks of the pipeline. Hooks are called only when registered, a pipeline without
+    hooks submits the bare task callables and doesn't take any timestamps.
+    """
+    def on_run_start(self, pipeline):
+        pass
+
+    def on_task_finished(self, span):
+        pass
+
+    def on_run_end(self, pipeline):
+        pass
+
+def report_span(hooks, task, submitted, traced, chunk=None):
+    size = result_size(traced.result) if chunk is None else None
+    span = TaskSpan.from_traced(task, submitted, traced, size, chunk)
+    for hook in hooks:
+        hook.on_task_finished(span)
+
+class Tracer(Hook):
+    """
+    Hook collecting execution spans of all tasks. The spans of all runs can be exported as Chrome trace-event JSON, which
+    can be opened in Perfetto or chrome://tracing, spans of the last run are summarized along its critical path.
+    """
+    def __init__(self):
+        self.spans = []
+        # index of the first span of the last run
+        self.run_offset = 0
+        self.graph = None
+        self.run_started = None
+        self.run_finished = None
+        self.lock = threading.Lock()
+
+    def on_run_start(self, pipeline):
+        self.graph = pipeline.graph
+        self.run_started = time.perf_counter()
+        with self.lock:
+            self.run_offset = len(self.spans)
+
+    def on_task_finished(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def on_run_end(self, pipeline):
+        self.run_finished = time.perf_counter()
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+            self.run_offset = 0
+
+    def get_run_spans(self):
+        """Returns spans of the last run."""
+        with self.lock:
+            return self.spans[self.run_offset:]
+
+    def get_task_spans(self):
+        """
+        Returns one span per task of the last run, chunks of map tasks are merged into a span covering all of them.
+        """
+        task_spans = {}
+        for span in self.get_run_spans():
+            if span.task not in task_spans:
+                task_spans[span.task] = TaskSpan(span.task, span.submitted, span.started, span.finished, span.pid,
+                                                 span.thread, span.thread_name, span.result_size)
+                continue
+            merged = task_spans[span.task]
+            merged.submitted = min(merged.submitted, span.submitted)
+            merged.started = min(merged.started, span.started)
+            merged.finished = max(merged.finished, span.finished)
+        return task_spans
+
+    def to_chrome_trace(self):
+        if not self.spans:
+            return {"traceEvents": [], "displayTimeUnit": "ms"}
+
+        origin = min(span.submitted for span in self.spans)
+        events = []
+        threads = {}
+        for span in self.spans:
+            name = str(span.task) if span.chunk is None else f"{span.task}[{span.chunk}]"
+            args = {"queue_wait_us": span.queue_wait * 1e6}
+            if span.result_size is not None:
+                args["result_size"] = span.result_size
+            events.append({"name": name, "cat": "task", "ph": "X", "ts": (span.started - origin) * 1e6,
+                           "dur": span.duration * 1e6, "pid": span.pid, "tid": span.thread, "args": args})
+            threads[(span.pid, span.thread)] = span.thread_name
+        for (pid, thread), thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread,
+                           "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+
+    def critical_path(self):
+        """
+        Returns spans of the chain of tasks which determined the end of the run. It starts with the task which finished
+        last and repeatedly steps to the dependency which finished last.
+        """
+        task_spans = self.get_task_spans()
+        if not task_spans:
+            return []
+
+        task = max(task_spans, key=lambda task: task_spans[task].finished)
+        path = [task_spans[task]]
+        while True:
+            dependencies = [dependency for dependency in self.graph.get_input_nodes(task) if dependency in task_spans]
+            if not dependencies:
+                break
+            task = max(dependencies, key=lambda dependency: task_spans[dependency].finished)
+            path.append(task_spans[task])
+        path.reverse()
+        return path
+
+    def summary(self):
+        path = self.critical_path()
+        if not path:
+            return "No tasks traced."
+
+        if self.run_started is not None and self.run_finished is not None:
+            wall_time = self.run_finished - self.run_started
+        else:
+            wall_time = path[-1].finished - min(span.submitted for span in self.get_run_spans())
+        busy_time = sum(span.duration for span in path)
+        lines = [f"Critical path: {len(path)} tasks, {busy_time * 1e3:.3f} ms running of {wall_time * 1e3:.3f} ms "
+                 f"wall time"]
+        for span in path:
+            lines.append(f"  {span.task}: queued {span.queue_wait * 1e3:.3f} ms, ran {span.duration * 1e3:.3f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,69 @@
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+SHARED_MEMORY = "shared_memory"
+
+SharedArrayDescriptor = namedtuple("SharedArrayDescriptor", ["name", "shape", "dtype", "offset"])
+
+class SharedArray(np.ndarray):
+    """
+    NumPy array placed in a shared memory block. When pickled for another process only its descriptor is sent and the
+    receiving process gets a zero-copy view of the same block. Arrays derived from a shared array (slices, results of
+    computations) are ordinary arrays and are pickled by value.
+    """
+    def __array_finalize__(self, obj):
+        self.descriptor = None
+
+    def __reduce__(self):
+        if self.descriptor is None:
+            return self.view(np.ndarray).__reduce__()
+        return attach_array, (self.descriptor,)
+
+def map_block(name=None, size=0):
+    """
+    Creates (when `name` is None) or opens a shared memory block and returns its name and memory map. The file
+    descriptor is closed right away and the mapping is owned by arrays created on top of it, so the block is unmapped
+    from the process once the last array using it is garbage collected.
+    """
+    block = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+    buffer = block._mmap
+    block._buf.release()
+    block._buf = None
+    block._mmap = None
+    block.close()
+    return block.name, buffer
+
+def attach_array(descriptor):
+    _, buffer = map_block(descriptor.name)
+    array = np.ndarray(descriptor.shape, descriptor.dtype, buffer=buffer, offset=descriptor.offset).view(SharedArray)
+    array.descriptor = descriptor
+    return array
+
+def is_shareable(value):
+    return isinstance(value, np.ndarray) and value.nbytes > 0 and not value.dtype.hasobject
+
+def share_array(array):
+    """Copies the array into a new shared memory block."""
+    name, buffer = map_block(size=array.nbytes)
+    descriptor = SharedArrayDescriptor(name, array.shape, array.dtype.str, 0)
+    shared = np.ndarray(array.shape, array.dtype, buffer=buffer).view(SharedArray)
+    np.copyto(shared, array)
+    shared.descriptor = descriptor
+    return shared
+
+def execute_with_shared_result(task, *inputs):
+    """Executes the task in a worker process and places a NumPy result into shared memory."""
+    result = task.execute(*inputs)
+    if is_shareable(result):
+        return share_array(result)
+    return result
+
+def release_shared_result(result):
+    """Unlinks the shared memory block of the result, views already mapped by processes stay valid."""
+    if isinstance(result, SharedArray) and result.descriptor is not None:
+        block = shared_memory.SharedMemory(name=result.descriptor.name)
+        block.unlink()
+        block.close()
+        result.descriptor = None
@@ -0,0 +1,120 @@
+import pytest
+import asyncio
+import threading
+import time
+
+from pipeline import Pipeline
+
+class TestAsyncPipeline:
+    def test_coroutine_data_propagation(self):
+        pipeline = Pipeline()
+
+        async def read():
+            await asyncio.sleep(0.01)
+            return "Hello"
+
+        async def greet(value):
+            return f"{value}, World!"
+
+        a = pipeline.create_task(read)
+        b = pipeline.create_task(greet)
+        pipeline.set_dependency(a, b)
+
+        asyncio.run(pipeline.run_async())
+
+        assert b.get_result() == "Hello, World!"
+
+    def test_thousands_of_concurrent_coroutines(self):
+        # GIVEN
+        pipeline = Pipeline()
+        threads_before = threading.active_count()
+
+        async def io_call():
+            await asyncio.sleep(0.5)
+            return 1
+
+        sink = pipeline.create_task(lambda *values: sum(values))
+        for _ in range(2000):
+            pipeline.set_dependency(pipeline.create_task(io_call), sink)
+
+        # WHEN
+        start = time.perf_counter()
+        asyncio.run(pipeline.run_async())
+        total_time = time.perf_counter() - start
+
+        # THEN all coroutines waited concurrently and only the blocking sink needed a worker thread
+        assert sink.get_result() == 2000
+        assert total_time < 2
+        assert threading.active_count() <= threads_before + 1
+
+    def test_mixed_blocking_and_coroutine_tasks(self):
+        pipeline = Pipeline()
+
+        def blocking():
+            time.sleep(0.1)
+            return threading.get_ident()
+
+        async def on_loop(ident):
+            return ident != threading.get_ident()
+
+        a = pipeline.create_task(blocking)
+        b = pipeline.create_task(on_loop)
+        pipeline.set_dependency(a, b)
+
+        asyncio.run(pipeline.run_async())
+
+        assert b.get_result() is True
+
+    def test_coroutine_error_is_raised(self):
+        pipeline = Pipeline()
+
+        async def failing():
+            raise RuntimeError("coroutine failed")
+
+        pipeline.create_task(failing)
+
+        with pytest.raises(RuntimeError, match="coroutine failed"):
+            asyncio.run(pipeline.run_async())
+
+    def test_failure_cancels_running_coroutines(self):
+        # GIVEN a slow coroutine next to a failing one
+        pipeline = Pipeline()
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(0.2)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("coroutine failed")
+
+        a = pipeline.create_task(slow)
+        pipeline.create_task(failing)
+
+        async def main():
+            with pytest.raises(RuntimeError, match="coroutine failed"):
+                await pipeline.run_async()
+            await asyncio.sleep(0.3)
+
+        # WHEN
+        asyncio.run(main())
+
+        # THEN the slow coroutine didn't outlive the run
+        assert cancelled == [True]
+        assert not a.is_finished()
+
+    def test_coroutine_task_in_synchronous_run(self):
+        pipeline = Pipeline()
+
+        async def coroutine():
+            await asyncio.sleep(0.01)
+            return 42
+
+        a = pipeline.create_task(coroutine)
+        pipeline.run()
+
+        assert a.get_result() == 42
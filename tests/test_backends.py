@@ -0,0 +1,75 @@
+import pytest
+import os
+
+from backends import ProcessBackend, ThreadBackend
+from executor import Executor
+from pipeline import Pipeline
+from task import Task
+
+def get_pid(*args):
+    return os.getpid()
+
+def square(x):
+    return x * x
+
+def total(*values):
+    return sum(values)
+
+def failing_in_worker():
+    raise ValueError("worker failure")
+
+class TestBackends:
+    def test_thread_backend_is_default(self):
+        executor = Executor()
+        assert isinstance(executor.get_backend(), ThreadBackend)
+        executor.shutdown()
+
+    def test_unknown_backend(self):
+        executor = Executor()
+        with pytest.raises(ValueError, match="Unknown execution backend 'gpu'."):
+            executor.get_backend("gpu")
+
+    def test_process_backend_executes_in_other_process(self):
+        executor = Executor("process")
+        task = Task(get_pid)
+
+        executor.submit_for_execution(task)
+        executor.wait_for_task_finish()
+        executor.shutdown()
+
+        assert task.get_result() != os.getpid()
+
+    def test_backend_per_task(self):
+        pipeline = Pipeline()
+        a = pipeline.create_task(get_pid, backend="process")
+        b = pipeline.create_task(get_pid)
+
+        pipeline.run()
+        pipeline.executor.shutdown()
+
+        assert a.get_result() != os.getpid()
+        assert b.get_result() == os.getpid()
+
+    def test_process_pipeline(self):
+        pipeline = Pipeline(backend="process")
+        sink = pipeline.create_task(total)
+        for x in range(1, 5):
+            source = pipeline.create_task(lambda x=x: x, backend="thread")
+            middle = pipeline.create_task(square)
+            pipeline.set_dependency(source, middle)
+            pipeline.set_dependency(middle, sink)
+
+        pipeline.run()
+        pipeline.executor.shutdown()
+
+        assert sink.get_result() == 1 + 4 + 9 + 16
+
+    def test_process_error_keeps_original_traceback(self):
+        pipeline = Pipeline(backend=ProcessBackend(max_workers=1))
+        pipeline.create_task(failing_in_worker)
+
+        with pytest.raises(ValueError, match="worker failure") as error:
+            pipeline.run()
+        pipeline.executor.get_backend().shutdown()
+
+        assert "failing_in_worker" in str(error.value.__cause__)
@@ -0,0 +1,119 @@
+import pytest
+import functools
+import os
+
+import numpy as np
+
+from cache import ResultCache
+from pipeline import Pipeline
+
+calls = []
+
+def source(value):
+    calls.append("source")
+    return np.full(1000, value)
+
+def double(data):
+    calls.append("double")
+    return data * 2
+
+def build_pipeline(cache, source_value=3):
+    pipeline = Pipeline(cache=cache)
+    a = pipeline.create_task(functools.partial(source, source_value))
+    b = pipeline.create_task(double)
+    pipeline.set_dependency(a, b)
+    return pipeline, b
+
+class TestResultCache:
+    @pytest.fixture(autouse=True)
+    def clear_calls(self):
+        calls.clear()
+
+    def test_unchanged_pipeline_is_not_recomputed(self):
+        cache = ResultCache()
+        pipeline, _ = build_pipeline(cache)
+        pipeline.run()
+        pipeline, result = build_pipeline(cache)
+        pipeline.run()
+
+        assert calls == ["source", "double"]
+        assert np.array_equal(result.get_result(), np.full(1000, 6))
+        assert cache.stats.hits == 2
+        assert cache.stats.misses == 2
+
+    def test_changed_input_is_recomputed(self):
+        cache = ResultCache()
+        pipeline, _ = build_pipeline(cache, source_value=3)
+        pipeline.run()
+        pipeline, result = build_pipeline(cache, source_value=4)
+        pipeline.run()
+
+        # bound value of the source changed, so the source and its consumer run again
+        assert calls == ["source", "double", "source", "double"]
+        assert np.array_equal(result.get_result(), np.full(1000, 8))
+
+    def test_changed_code_changes_key(self):
+        cache = ResultCache()
+
+        assert cache.get_key(lambda x: x + 1, [1]) != cache.get_key(lambda x: x + 2, [1])
+        assert cache.get_key(lambda x: x + 1, [1]) == cache.get_key(lambda x: x + 1, [1])
+        assert cache.get_key(lambda x: x + 1, [1]) != cache.get_key(lambda x: x + 1, [2])
+
+    def test_disk_tier_survives_new_cache(self, tmp_path):
+        pipeline, _ = build_pipeline(ResultCache(tmp_path))
+        pipeline.run()
+        cache = ResultCache(tmp_path)
+        pipeline, result = build_pipeline(cache)
+        pipeline.run()
+
+        assert calls == ["source", "double"]
+        assert cache.stats.disk_hits == 2
+        assert isinstance(result.get_result(), np.memmap)
+        assert np.array_equal(result.get_result(), np.full(1000, 6))
+
+    def test_memory_tier_eviction(self):
+        cache = ResultCache(memory_size=2500)
+
+        for key in ["a", "b", "c"]:
+            cache.put(key, np.zeros(1000, dtype=np.uint8))
+
+        assert cache.get("a") == (False, None)
+        assert cache.get("c")[0] is True
+        assert cache.stats.evictions == 1
+
+    def test_disk_tier_eviction(self, tmp_path):
+        cache = ResultCache(tmp_path, memory_size=0, disk_size=2500)
+
+        for key in ["a", "b", "c"]:
+            cache.put(key, np.zeros(1000, dtype=np.uint8))
+
+        assert len(list(tmp_path.glob("*.npy"))) == 2
+        assert cache.get("c")[0] is True
+
+    def test_disk_tier_is_scanned_once(self, tmp_path, monkeypatch):
+        # GIVEN a disk tier written by a previous cache
+        previous = ResultCache(tmp_path, memory_size=0, disk_size=2500)
+        for key in ["a", "b"]:
+            previous.put(key, np.zeros(1000, dtype=np.uint8))
+        # "a" was used last
+        os.utime(tmp_path / "a.npy", (2e9, 2e9))
+        os.utime(tmp_path / "b.npy", (1e9, 1e9))
+        cache = ResultCache(tmp_path, memory_size=0, disk_size=2500)
+
+        # WHEN the directory isn't listed any more
+        monkeypatch.setattr("os.scandir", None)
+        cache.put("c", np.zeros(1000, dtype=np.uint8))
+        monkeypatch.undo()
+
+        # THEN the least recently used entry of the previous cache was evicted
+        assert sorted(path.stem for path in tmp_path.glob("*.npy")) == ["a", "c"]
+        assert cache.disk_used == sum(path.stat().st_size for path in tmp_path.glob("*.npy"))
+
+    def test_not_cacheable_task(self):
+        cache = ResultCache()
+        for _ in range(2):
+            pipeline = Pipeline(cache=cache)
+            pipeline.create_task(functools.partial(source, 1), cacheable=False)
+            pipeline.run()
+
+        assert calls == ["source", "source"]
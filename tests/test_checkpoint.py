@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from checkpoint import CheckpointStore
+from pipeline import Pipeline
+
+calls = []
+
+def source():
+    calls.append("source")
+    return np.arange(5)
+
+def square(x):
+    calls.append("square")
+    return x ** 2
+
+def total(x):
+    calls.append("total")
+    return int(x.sum())
+
+def crash(x):
+    raise RuntimeError("crash")
+
+class TestCheckpoint:
+    @pytest.fixture(autouse=True)
+    def clear_calls(self):
+        calls.clear()
+
+    def build_pipeline(self, directory, last=total, **options):
+        pipeline = Pipeline(checkpoint=CheckpointStore(directory), **options)
+        a = pipeline.create_task(source)
+        b = pipeline.create_task(square)
+        c = pipeline.create_task(last)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(b, c)
+        return pipeline, a, b, c
+
+    def test_results_are_persisted(self, tmp_path):
+        pipeline, a, b, c = self.build_pipeline(tmp_path)
+
+        pipeline.run()
+
+        names = sorted(path.name for path in tmp_path.iterdir())
+        assert [name.rsplit(".", 1)[1] for name in names] == ["npy", "npy", "pkl"]
+        assert not any(name.endswith(".tmp") for name in names)
+
+    def test_resume_after_crash(self, tmp_path):
+        # GIVEN a run which crashed in its last task
+        pipeline, a, b, c = self.build_pipeline(tmp_path, last=crash)
+        with pytest.raises(RuntimeError, match="crash"):
+            pipeline.run()
+        pipeline.checkpoint.flush()
+
+        # WHEN the pipeline is rebuilt in a new process and resumed
+        calls.clear()
+        pipeline, a, b, c = self.build_pipeline(tmp_path)
+        pipeline.run(resume=True)
+
+        # THEN only the remaining task is executed on the memory-mapped results
+        assert calls == ["total"]
+        assert c.get_result() == 30
+        assert isinstance(b.get_result(), np.memmap)
+
+    def test_resume_fused_chain_with_released_results(self, tmp_path):
+        # GIVEN a crashed run of a fused chain whose intermediate results are released
+        pipeline, a, b, c = self.build_pipeline(tmp_path, last=crash, fuse_chains=True, release_results=True)
+        with pytest.raises(RuntimeError, match="crash"):
+            pipeline.run()
+        pipeline.checkpoint.flush()
+
+        # WHEN
+        calls.clear()
+        pipeline, a, b, c = self.build_pipeline(tmp_path)
+        pipeline.run(resume=True)
+
+        # THEN results of the chain were checkpointed
+        assert calls == ["total"]
+        assert c.get_result() == 30
+
+    def test_changed_task_is_not_restored(self, tmp_path):
+        pipeline, a, b, c = self.build_pipeline(tmp_path)
+        pipeline.run()
+
+        calls.clear()
+        pipeline, a, b, c = self.build_pipeline(tmp_path)
+        pipeline.set_callable(b, lambda x: x + 1)
+        pipeline.run(resume=True)
+
+        assert calls == ["total"] and c.get_result() == 15
+        calls.clear()
+        pipeline.run()
+        assert calls == []
+
+    def test_resume_without_checkpoint(self):
+        pipeline = Pipeline()
+
+        with pytest.raises(ValueError, match="without checkpoint store"):
+            pipeline.run(resume=True)
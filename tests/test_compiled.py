@@ -0,0 +1,114 @@
+import pytest
+
+from compiled import CompiledGraph
+from graph import DirectAcyclicGraph
+from pipeline import Pipeline
+
+def increment(x):
+    return x + 1
+
+class TestCompiledGraph:
+    @pytest.fixture
+    def graph(self):
+        graph = DirectAcyclicGraph()
+        for node in ['A', 'B', 'C', 'D', 'E']:
+            graph.add_node(node)
+        graph.add_edge('A', 'C')
+        graph.add_edge('A', 'B')
+        graph.add_edge('C', 'D')
+        graph.add_edge('B', 'E')
+        graph.add_edge('D', 'E')
+        return graph
+
+    def test_queries_match_mutable_graph(self, graph):
+        compiled = CompiledGraph(graph)
+
+        for node in graph.get_nodes():
+            assert compiled.get_input_nodes(node) == graph.get_input_nodes(node)
+            assert set(compiled.get_output_nodes(node)) == graph.get_output_nodes(node)
+            assert compiled.get_in_degree(node) == graph.get_in_degree(node)
+            assert compiled.get_out_degree(node) == graph.get_out_degree(node)
+        assert list(compiled.get_nodes()) == ['A', 'B', 'C', 'D', 'E']
+        assert compiled.levels() == graph.levels()
+        assert compiled.topological_order() == graph.topological_order()
+        assert compiled.get_descendants(['C']) == graph.get_descendants(['C'])
+        assert compiled.get_ancestors(['E']) == graph.get_ancestors(['E']) == {'A', 'B', 'C', 'D'}
+        assert compiled.get_nodes_without_input_edge() == ['A']
+
+    def test_adjacent_tasks_are_not_rebuilt_on_lookup(self, graph):
+        compiled = CompiledGraph(graph)
+
+        assert compiled.get_output_nodes('A') is compiled.get_output_nodes('A')
+        assert compiled.predecessors['E'] is compiled.predecessors['E']
+
+    def test_cyclic_graph_is_not_compiled(self):
+        graph = DirectAcyclicGraph()
+        graph.add_edge('A', 'B')
+        graph.add_edge('B', 'A')
+
+        with pytest.raises(ValueError, match="The graph has cycles."):
+            CompiledGraph(graph)
+
+    def test_thaw(self, graph):
+        thawed = CompiledGraph(graph).thaw()
+
+        assert list(thawed.get_nodes()) == list(graph.get_nodes())
+        assert all(thawed.get_output_nodes(node) == graph.get_output_nodes(node) for node in graph.get_nodes())
+        assert thawed.get_input_nodes('E') == ['B', 'D']
+
+class TestCompiledPipeline:
+    def build_pipeline(self):
+        pipeline = Pipeline()
+        a = pipeline.create_task(lambda: 1)
+        b = pipeline.create_task(increment)
+        c = pipeline.create_task(lambda x, y: x * y)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(a, c)
+        pipeline.set_dependency(b, c)
+        return pipeline, a, b, c
+
+    def test_compiled_pipeline_runs_repeatedly(self):
+        # GIVEN
+        pipeline, a, b, c = self.build_pipeline()
+        pipeline.compile()
+
+        # WHEN
+        pipeline.run()
+        first = c.get_result()
+        pipeline.set_source_value(a, 3)
+        pipeline.run()
+
+        # THEN
+        assert (first, c.get_result()) == (2, 12)
+        assert pipeline.is_compiled()
+
+    def test_graph_is_validated_once(self, monkeypatch):
+        pipeline, a, b, c = self.build_pipeline()
+        pipeline.compile()
+        monkeypatch.setattr(pipeline, "initial_check", lambda: pytest.fail("graph validated again"))
+
+        pipeline.run()
+
+        assert c.get_result() == 2
+
+    def test_cyclic_pipeline_is_not_compiled(self):
+        pipeline, a, b, c = self.build_pipeline()
+        pipeline.set_dependency(c, a)
+
+        with pytest.raises(ValueError, match="The graph has cycles. Cannot execute pipeline."):
+            pipeline.compile()
+
+    def test_mutation_thaws_compiled_graph(self):
+        # GIVEN
+        pipeline, a, b, c = self.build_pipeline()
+        pipeline.compile()
+        pipeline.run()
+
+        # WHEN
+        d = pipeline.create_task(increment)
+        pipeline.set_dependency(c, d)
+        pipeline.run()
+
+        # THEN
+        assert not pipeline.is_compiled()
+        assert d.get_result() == 3
@@ -95,4 +95,96 @@ class TestDAG:
         dag.add_node("B")
         dag.add_edge("A", "B")
 
-        assert dag.is_acyclic() is True  # no cycle
\ No newline at end of file
+        assert dag.is_acyclic() is True  # no cycle
+
+    def test_degree_counters(self):
+        dag = DirectAcyclicGraph()
+        dag.add_edge('A', 'B')
+        dag.add_edge('A', 'C')
+        dag.add_edge('B', 'C')
+        dag.add_edge('A', 'B')  # Duplicate edge is not counted twice
+
+        assert dag.get_out_degree('A') == 2
+        assert dag.get_in_degree('B') == 1
+        assert dag.get_in_degree('C') == 2
+
+        dag.remove_edge('A', 'C')
+        assert dag.get_out_degree('A') == 1
+        assert dag.get_in_degree('C') == 1
+
+    def test_remove_node_updates_indexes(self):
+        dag = DirectAcyclicGraph()
+        dag.add_edge('A', 'B')
+        dag.add_edge('B', 'C')
+        dag.remove_node('B')
+
+        assert dag.get_output_nodes('A') == set()
+        assert dag.get_out_degree('A') == 0
+        assert dag.get_input_nodes('C') == []
+        assert dag.get_in_degree('C') == 0
+        assert dag.get_nodes_without_input_edge() == ['A', 'C']
+
+    def test_input_nodes_follow_node_creation_order(self):
+        dag = DirectAcyclicGraph()
+        for node in ['A', 'B', 'C', 'D']:
+            dag.add_node(node)
+        dag.add_edge('C', 'D')
+        dag.add_edge('A', 'D')
+        dag.add_edge('B', 'D')
+
+        assert dag.get_input_nodes('D') == ['A', 'B', 'C']
+
+    def test_levels(self):
+        dag = DirectAcyclicGraph()
+        dag.add_edge('A', 'B')
+        dag.add_edge('A', 'C')
+        dag.add_edge('C', 'D')
+        dag.add_edge('B', 'E')
+        dag.add_edge('D', 'E')
+
+        assert dag.levels() == [['A'], ['B', 'C'], ['D'], ['E']]
+        assert dag.topological_order() == ['A', 'B', 'C', 'D', 'E']
+
+    def test_topological_order_of_cyclic_graph(self):
+        dag = DirectAcyclicGraph()
+        dag.add_edge('A', 'B')
+        dag.add_edge('B', 'A')
+
+        with pytest.raises(ValueError, match="The graph has cycles."):
+            dag.topological_order()
+
+    def test_order_cache_is_invalidated(self):
+        dag = DirectAcyclicGraph()
+        dag.add_edge('A', 'B')
+        assert dag.topological_order() == ['A', 'B']
+
+        dag.add_edge('C', 'A')
+        assert dag.topological_order() == ['C', 'A', 'B']
+
+        dag.add_edge('B', 'C')
+        assert dag.is_acyclic() is False
+
+        dag.remove_edge('B', 'C')
+        assert dag.is_acyclic() is True
+
+        dag.remove_node('A')
+        assert dag.levels() == [['B', 'C']]
+
+    def test_deep_chain(self):
+        dag = DirectAcyclicGraph()
+        for node in range(100_000):
+            dag.add_edge(node, node + 1)
+
+        assert dag.is_acyclic() is True
+        assert dag.topological_order()[-1] == 100_000
+
+    def test_creates_cycle(self):
+        dag = DirectAcyclicGraph()
+        dag.add_edge('A', 'B')
+        dag.add_edge('B', 'C')
+        dag.add_node('D')
+
+        assert dag.creates_cycle('C', 'A') is True
+        assert dag.creates_cycle('A', 'A') is True
+        assert dag.creates_cycle('A', 'C') is False
+        assert dag.creates_cycle('D', 'A') is False
@@ -0,0 +1,201 @@
+import pytest
+import operator
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from distributed import AUTHKEY_VARIABLE, DistributedBackend, RemoteResult, RemoteTraceback, Worker
+from pipeline import Pipeline
+
+SOURCE_DIRECTORY = Path(__file__).resolve().parent.parent / "src"
+
+def one():
+    return 1
+
+def increment(x):
+    return x + 1
+
+def slow_increment(x):
+    time.sleep(0.5)
+    return x + 1
+
+def fail(x):
+    raise ValueError("remote failure")
+
+@pytest.fixture(autouse=True)
+def authkey(monkeypatch):
+    # inherited by worker daemons started by the tests
+    monkeypatch.setenv(AUTHKEY_VARIABLE, "test-key")
+
+class SilentWorker(Worker):
+    """Worker which stops sending heartbeats, as if its host was unreachable."""
+    def send_heartbeats(self, send, interval, stopped):
+        pass
+
+class TestDistributedBackend:
+    @pytest.fixture
+    def workers(self):
+        workers = [Worker().start() for _ in range(2)]
+        yield workers
+        for worker in workers:
+            worker.close()
+
+    def build_diamond(self, pipeline, middle=increment):
+        a = pipeline.create_task(one)
+        b = pipeline.create_task(middle)
+        c = pipeline.create_task(increment)
+        d = pipeline.create_task(operator.add)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(a, c)
+        pipeline.set_dependency(b, d)
+        pipeline.set_dependency(c, d)
+        return a, b, c, d
+
+    def test_results_are_shipped_back(self, workers):
+        backend = DistributedBackend([worker.address for worker in workers])
+        with Pipeline(backend=backend) as pipeline:
+            a, b, c, d = self.build_diamond(pipeline)
+            pipeline.run()
+        backend.shutdown()
+
+        assert d.get_result() == 4
+
+    def test_results_are_kept_on_workers(self, workers):
+        # GIVEN
+        backend = DistributedBackend([worker.address for worker in workers], keep_results=True)
+        pipeline = Pipeline(backend=backend)
+        a, b, c, d = self.build_diamond(pipeline)
+
+        # WHEN
+        pipeline.run()
+
+        # THEN pipeline holds handles, values are pulled by downstream tasks and on demand
+        assert isinstance(d.get_result(), RemoteResult)
+        assert backend.fetch(d.get_result()) == 4
+        assert backend.resolve([b.get_result(), 10]) == [2, 10]
+        assert sum(len(worker.results) for worker in workers) == 4
+        backend.shutdown()
+
+    def test_lineage_of_released_results_is_dropped(self, workers):
+        backend = DistributedBackend([worker.address for worker in workers], keep_results=True)
+        pipeline = Pipeline(backend=backend, release_results=True)
+        a, b, c, d = self.build_diamond(pipeline)
+        d.output = True
+
+        pipeline.run()
+
+        assert list(backend.lineage) == [d.get_result()]
+        assert backend.fetch(d.get_result()) == 4
+        backend.shutdown()
+
+    def test_remote_error(self, workers):
+        backend = DistributedBackend([worker.address for worker in workers])
+        pipeline = Pipeline(backend=backend)
+        self.build_diamond(pipeline, middle=fail)
+
+        with pytest.raises(ValueError, match="remote failure") as error:
+            pipeline.run()
+
+        assert isinstance(error.value.__cause__, RemoteTraceback)
+        assert "in fail" in str(error.value.__cause__)
+        backend.shutdown()
+
+    def test_jobs_of_closed_worker_are_dispatched_again(self, workers):
+        # GIVEN
+        backend = DistributedBackend([worker.address for worker in workers])
+        pipeline = Pipeline(backend=backend)
+        tasks = [pipeline.create_task(slow_increment) for _ in range(4)]
+
+        # WHEN one worker dies while running its jobs
+        threading.Timer(0.1, workers[0].close).start()
+        pipeline.run({task: index for index, task in enumerate(tasks)})
+
+        # THEN
+        assert [task.get_result() for task in tasks] == [1, 2, 3, 4]
+        assert [worker.alive for worker in backend.workers] == [False, True]
+        backend.shutdown()
+
+    def test_worker_without_heartbeats_is_dropped(self, workers):
+        silent = SilentWorker().start()
+        backend = DistributedBackend([silent.address, workers[0].address], heartbeat_interval=0.05,
+                                     heartbeat_timeout=0.3)
+        pipeline = Pipeline(backend=backend)
+        tasks = [pipeline.create_task(slow_increment) for _ in range(2)]
+
+        pipeline.run({task: index for index, task in enumerate(tasks)})
+
+        assert [task.get_result() for task in tasks] == [1, 2]
+        assert [worker.alive for worker in backend.workers] == [False, True]
+        backend.shutdown()
+        silent.close()
+
+    def test_lost_result_is_recomputed(self, workers):
+        # GIVEN result of a kept on one of the workers
+        backend = DistributedBackend([worker.address for worker in workers], keep_results=True)
+        pipeline = Pipeline(backend=backend)
+        a = pipeline.create_task(increment)
+        pipeline.run({a: 1})
+
+        # WHEN the worker dies and a new consumer of the result is run
+        holder = next(worker for worker in workers if worker.address == a.get_result().address)
+        holder.close()
+        while all(worker.alive for worker in backend.workers):
+            time.sleep(0.01)
+        b = pipeline.create_task(increment)
+        pipeline.set_dependency(a, b)
+        pipeline.run()
+
+        # THEN the result is recomputed on the remaining worker
+        assert backend.fetch(b.get_result()) == 3
+        assert backend.fetch(a.get_result()) == 2
+        assert backend.get_recovered(a.get_result()).address != holder.address
+        backend.shutdown()
+
+    def test_authentication_key_is_required(self, monkeypatch):
+        monkeypatch.delenv(AUTHKEY_VARIABLE)
+
+        with pytest.raises(ValueError, match="Authentication key is required"):
+            Worker()
+        with pytest.raises(ValueError, match="Authentication key is required"):
+            DistributedBackend([])
+
+class TestWorkerDaemons:
+    @pytest.fixture
+    def addresses(self):
+        daemons = [subprocess.Popen([sys.executable, str(SOURCE_DIRECTORY / "distributed.py"), "--listen",
+                                     "127.0.0.1:0"], stdout=subprocess.PIPE, text=True) for _ in range(3)]
+        addresses = [daemon.stdout.readline().split()[-1] for daemon in daemons]
+        yield addresses
+        for daemon in daemons:
+            daemon.terminate()
+            daemon.wait()
+
+    def test_pipeline_on_worker_daemons(self, addresses):
+        # GIVEN
+        backend = DistributedBackend(addresses, keep_results=True)
+        pipeline = Pipeline(backend=backend)
+        sources = [pipeline.create_task(abs) for _ in range(6)]
+        pairs = [pipeline.create_task(operator.add) for _ in range(3)]
+        for index, pair in enumerate(pairs):
+            pipeline.set_dependency(sources[2 * index], pair)
+            pipeline.set_dependency(sources[2 * index + 1], pair)
+
+        # WHEN
+        pipeline.run({source: -index for index, source in enumerate(sources)})
+
+        # THEN
+        assert backend.resolve([pair.get_result() for pair in pairs]) == [1, 5, 9]
+        assert len({source.get_result().address for source in sources}) == 3
+        backend.shutdown()
+
+    def test_daemon_without_authentication_key(self):
+        environment = {name: value for name, value in os.environ.items() if name != AUTHKEY_VARIABLE}
+
+        daemon = subprocess.run([sys.executable, str(SOURCE_DIRECTORY / "distributed.py"), "--listen", "0.0.0.0:0"],
+                                env=environment, capture_output=True, text=True, timeout=30)
+
+        assert daemon.returncode == 2
+        assert "authentication key is required" in daemon.stderr
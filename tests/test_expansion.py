@@ -0,0 +1,138 @@
+import asyncio
+import functools
+import threading
+
+import pytest
+
+from pipeline import Pipeline
+
+def square(x):
+    return x * x
+
+def total(*parts):
+    return sum(parts)
+
+class TestExpansion:
+    def test_fan_out_depends_on_data(self):
+        # GIVEN a task which adds one task per partition it finds, all feeding a merge task
+        pipeline = Pipeline()
+        threads = set()
+
+        def process(x):
+            threads.add(threading.get_ident())
+            return square(x)
+
+        def discover():
+            partitions = [1, 2, 3, 4]
+            with pipeline.expand():
+                for partition in partitions:
+                    task = pipeline.create_task(functools.partial(process, partition), name=f"part-{partition}")
+                    pipeline.set_dependency(task, merge)
+            return len(partitions)
+
+        source = pipeline.create_task(discover)
+        merge = pipeline.create_task(total)
+        pipeline.set_dependency(source, merge)
+
+        # WHEN
+        pipeline.run()
+
+        # THEN new tasks were executed in the same run before the merge
+        assert source.get_result() == 4
+        assert merge.get_result() == 4 + 1 + 4 + 9 + 16
+        assert len(pipeline.get_tasks()) == 6
+        assert all(task.is_finished() for task in pipeline.get_tasks())
+
+    def test_new_tasks_depend_on_running_task(self):
+        pipeline = Pipeline(release_results=True)
+        results = []
+
+        def split():
+            with pipeline.expand():
+                for index in range(3):
+                    task = pipeline.create_task(functools.partial(lambda index, parts: parts[index], index),
+                                                output=True)
+                    pipeline.set_dependency(source, task)
+                    results.append(task)
+            return [10, 20, 30]
+
+        source = pipeline.create_task(split)
+
+        pipeline.run()
+
+        assert [task.get_result() for task in results] == [10, 20, 30]
+        # result of the expanding task was released after its new consumers finished
+        assert source.get_result() is None
+
+    def test_cycle_is_rejected(self):
+        pipeline = Pipeline()
+
+        def expand():
+            with pipeline.expand():
+                task = pipeline.create_task(square)
+                pipeline.set_dependency(task, sink)
+                pipeline.set_dependency(sink, task)
+
+        source = pipeline.create_task(expand)
+        sink = pipeline.create_task(lambda x: x)
+        pipeline.set_dependency(source, sink)
+
+        with pytest.raises(ValueError, match="would create a cycle"):
+            pipeline.run()
+
+    def test_dependency_of_scheduled_task_is_rejected(self):
+        pipeline = Pipeline()
+        first = pipeline.create_task(lambda: 1)
+
+        def expand():
+            with pipeline.expand():
+                pipeline.set_dependency(pipeline.create_task(lambda: 2), first)
+
+        pipeline.run()
+        pipeline.create_task(expand)
+
+        with pytest.raises(ValueError, match="is already scheduled"):
+            pipeline.run()
+
+    def test_dependency_of_fused_task_is_rejected(self):
+        # GIVEN a fused chain a -> b -> c still running and a task adding an input of c
+        pipeline = Pipeline(fuse_chains=True)
+        expanded = threading.Event()
+
+        def expand():
+            try:
+                with pipeline.expand():
+                    pipeline.set_dependency(pipeline.create_task(lambda: 100), c)
+            finally:
+                expanded.set()
+
+        a = pipeline.create_task(lambda: expanded.wait(1) and 1)
+        b = pipeline.create_task(lambda x: x + 1)
+        c = pipeline.create_task(lambda *inputs: inputs)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(b, c)
+        pipeline.create_task(expand)
+
+        # WHEN / THEN c doesn't run silently without its new input
+        with pytest.raises(ValueError, match="runs in a fused chain"):
+            pipeline.run()
+
+    def test_expansion_of_compiled_pipeline_on_event_loop(self):
+        pipeline = Pipeline()
+
+        async def discover():
+            with pipeline.expand():
+                for value in (2, 3):
+                    task = pipeline.create_task(functools.partial(square, value))
+                    pipeline.set_dependency(task, merge)
+            return 0
+
+        source = pipeline.create_task(discover)
+        merge = pipeline.create_task(total)
+        pipeline.set_dependency(source, merge)
+        pipeline.compile()
+
+        asyncio.run(pipeline.run_async())
+
+        assert merge.get_result() == 13
+        assert not pipeline.is_compiled()
@@ -0,0 +1,219 @@
+import threading
+import time
+
+import pytest
+
+from concurrent.futures import CancelledError
+
+from executor import Executor
+from failures import CONTINUE_INDEPENDENT, TaskTimeoutError, Watchdog, cancellation_requested
+from map_task import MapTask
+from pipeline import Pipeline
+from task import Task
+
+def one():
+    return 1
+
+def increment(x):
+    return x + 1
+
+def fail():
+    raise ValueError("failure")
+
+def hang():
+    time.sleep(60)
+
+def slow_one():
+    time.sleep(1)
+    return 1
+
+class Flaky:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("flaky")
+        return self.calls
+
+class TestFailurePolicies:
+    def test_fail_fast_stops_running_tasks(self):
+        # GIVEN a failing task and a long cooperative task
+        stopped = threading.Event()
+
+        def cooperative():
+            while not cancellation_requested():
+                time.sleep(0.01)
+            stopped.set()
+
+        pipeline = Pipeline(max_workers=2)
+        pipeline.create_task(cooperative)
+        failing = pipeline.create_task(lambda: time.sleep(0.05) or fail())
+        queued = pipeline.create_task(one)
+        pipeline.set_dependency(failing, queued)
+
+        # WHEN
+        with pytest.raises(ValueError, match="failure"):
+            pipeline.run()
+
+        # THEN the running task was asked to stop and the dependent task never ran
+        assert stopped.wait(1)
+        assert queued.is_pending()
+
+    def test_cancel_cancels_queued_chains_batches_and_chunks(self):
+        # GIVEN a single worker busy with a blocking task and queued units of several tasks
+        release = threading.Event()
+        executor = Executor(max_workers=1)
+        executor.submit_for_execution(Task(release.wait), (), lambda task, error: None)
+        errors = []
+        record = lambda task, error, duration=None: errors.append((task.name, type(error)))
+        chain = [Task(one, name="head"), Task(increment, name="tail")]
+        executor.submit_chain(chain, (), [True, True], [(), ()], record)
+        executor.submit_batch([Task(one, name="first"), Task(one, name="second")], [(), ()], record)
+        executor.submit_for_execution(MapTask(increment, name="map"), ([1, 2],), record)
+
+        # WHEN
+        executor.cancel()
+        release.set()
+        executor.shutdown()
+
+        # THEN none of them ran
+        assert sorted(errors) == [("first", CancelledError), ("head", CancelledError), ("map", CancelledError),
+                                  ("second", CancelledError)]
+
+    def test_continue_independent(self):
+        # GIVEN
+        pipeline = Pipeline(failure_policy=CONTINUE_INDEPENDENT)
+        a = pipeline.create_task(fail)
+        b = pipeline.create_task(increment)
+        c = pipeline.create_task(one)
+        d = pipeline.create_task(increment)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(c, d)
+
+        # WHEN
+        with pytest.raises(ValueError, match="failure"):
+            pipeline.run()
+
+        # THEN independent branch finished, descendants of the failed task were skipped
+        assert d.get_result() == 2
+        assert b.is_pending()
+        assert list(pipeline.failed_tasks) == [a]
+
+    def test_unknown_failure_policy(self):
+        with pytest.raises(ValueError, match="Unknown failure policy 'retry'."):
+            Pipeline(failure_policy="retry")
+
+class TestRetriesAndTimeouts:
+    def test_retries_with_backoff(self):
+        flaky = Flaky(failures=2)
+        pipeline = Pipeline(retry_backoff=0.05)
+        task = pipeline.create_task(flaky, retries=2)
+
+        started = time.perf_counter()
+        pipeline.run()
+
+        assert task.get_result() == 3
+        # backoff doubles, 0.05 s and 0.1 s
+        assert time.perf_counter() - started >= 0.15
+
+    def test_failed_redispatch_fails_the_task(self, monkeypatch):
+        # GIVEN inputs of a retried task can't be gathered again
+        pipeline = Pipeline(retries=1, retry_backoff=0.01)
+        flaky = pipeline.create_task(Flaky(1))
+        get_task_inputs = pipeline.get_task_inputs
+        attempts = []
+
+        def failing_get_task_inputs(task):
+            attempts.append(task)
+            if len(attempts) > 1:
+                raise RuntimeError("inputs lost")
+            return get_task_inputs(task)
+
+        monkeypatch.setattr(pipeline, "get_task_inputs", failing_get_task_inputs)
+
+        # WHEN / THEN the run fails instead of waiting for the retry forever
+        with pytest.raises(RuntimeError, match="inputs lost"):
+            pipeline.run()
+        assert not flaky.is_finished()
+
+    def test_retries_are_bounded(self):
+        pipeline = Pipeline(retries=1, retry_backoff=0.01)
+        pipeline.create_task(Flaky(failures=2))
+
+        with pytest.raises(ConnectionError, match="flaky"):
+            pipeline.run()
+
+    def test_timeout_of_thread_task(self):
+        # GIVEN
+        stopped = threading.Event()
+
+        def wait():
+            while not cancellation_requested():
+                time.sleep(0.01)
+            stopped.set()
+
+        pipeline = Pipeline()
+        task = pipeline.create_task(wait, timeout=0.1)
+
+        # WHEN
+        with pytest.raises(TaskTimeoutError, match="Task wait timed out after 0.1 s."):
+            pipeline.run()
+
+        # THEN abandoned thread was asked to stop
+        assert stopped.wait(1)
+        assert not task.is_finished()
+
+    def test_runaway_process_worker_is_killed(self):
+        # GIVEN
+        pipeline = Pipeline(backend="process", max_workers=2, failure_policy=CONTINUE_INDEPENDENT)
+        pipeline.create_task(hang, timeout=0.3)
+        independent = pipeline.create_task(slow_one)
+
+        # WHEN
+        with pytest.raises(TaskTimeoutError):
+            pipeline.run()
+
+        # THEN the hanging worker was killed, the interrupted task was submitted again to new workers
+        assert independent.get_result() == 1
+        assert pipeline.executor.get_backend().pool.submit(one).result(timeout=10) == 1
+        pipeline.shutdown()
+
+    def test_timeout_of_coroutine_task(self):
+        import asyncio
+
+        async def wait():
+            await asyncio.sleep(10)
+
+        pipeline = Pipeline()
+        pipeline.create_task(wait, timeout=0.05)
+
+        with pytest.raises(TaskTimeoutError):
+            asyncio.run(pipeline.run_async())
+
+class TestWatchdog:
+    def test_functions_are_called_in_order_of_deadlines(self):
+        watchdog = Watchdog()
+        calls = []
+        done = threading.Event()
+
+        watchdog.schedule(0.1, lambda: (calls.append("late"), done.set()))
+        cancelled = watchdog.schedule(0.02, lambda: calls.append("cancelled"))
+        watchdog.schedule(0.01, lambda: calls.append("early"))
+        watchdog.cancel(cancelled)
+
+        assert done.wait(1)
+        assert calls == ["early", "late"]
+        watchdog.close()
+
+    def test_failed_function_does_not_stop_watchdog(self):
+        watchdog = Watchdog()
+        done = threading.Event()
+
+        watchdog.schedule(0.01, fail)
+        watchdog.schedule(0.02, done.set)
+
+        assert done.wait(1)
+        watchdog.close()
@@ -0,0 +1,252 @@
+import pytest
+import threading
+import time
+
+import numpy as np
+
+from concurrent.futures import CancelledError
+
+from backends import ThreadBackend
+from failures import CONTINUE_INDEPENDENT, CancellationToken, run_cancellable
+from fusion import BatchSizer, find_chains, run_batch, run_chain
+from graph import DirectAcyclicGraph
+from pipeline import Pipeline
+from task import Task
+from tracing import Tracer
+
+def increment(x):
+    return x + 1
+
+def fail(x):
+    raise ValueError("failure in chain")
+
+class CountingBackend(ThreadBackend):
+    def __init__(self, max_workers=None):
+        super().__init__(max_workers)
+        self.submissions = 0
+
+    def submit(self, function, *args):
+        self.submissions += 1
+        return super().submit(function, *args)
+
+class TestFusion:
+    def build_chain(self, pipeline, length):
+        tasks = [pipeline.create_task(lambda: 0)]
+        for _ in range(length - 1):
+            tasks.append(pipeline.create_task(increment))
+            pipeline.set_dependency(tasks[-2], tasks[-1])
+        return tasks
+
+    def test_find_chains(self):
+        # GIVEN a -> b -> c -> d, c -> e and e -> f
+        graph = DirectAcyclicGraph()
+        a, b, c, d, e, f = [Task(increment) for _ in range(6)]
+        for u, v in [(a, b), (b, c), (c, d), (c, e), (e, f)]:
+            graph.add_edge(u, v)
+
+        # WHEN
+        chains = find_chains(graph, graph.get_nodes(), lambda task: True)
+
+        # THEN c has two consumers, so it ends the first chain
+        assert chains == [[a, b, c], [e, f]]
+
+    def test_chain_is_submitted_once(self):
+        # GIVEN
+        backend = CountingBackend()
+        pipeline = Pipeline(backend=backend, fuse_chains=True)
+        tasks = self.build_chain(pipeline, 10)
+
+        # WHEN
+        pipeline.run()
+        backend.shutdown()
+
+        # THEN every task of the chain is finished with its own result
+        assert backend.submissions == 1
+        assert [task.get_result() for task in tasks] == list(range(10))
+        assert all(task.is_finished() for task in tasks)
+
+    def test_fusion_is_disabled_by_default(self):
+        backend = CountingBackend()
+        pipeline = Pipeline(backend=backend)
+        self.build_chain(pipeline, 5)
+
+        pipeline.run()
+        backend.shutdown()
+
+        assert backend.submissions == 5
+
+    def test_branches_are_not_fused(self):
+        # GIVEN a -> b -> c, a -> d -> e and c, e -> f
+        backend = CountingBackend()
+        pipeline = Pipeline(backend=backend, fuse_chains=True)
+        a = pipeline.create_task(lambda: 1)
+        b, c, d, e = [pipeline.create_task(increment) for _ in range(4)]
+        f = pipeline.create_task(lambda x, y: x * y)
+        for u, v in [(a, b), (b, c), (a, d), (d, e), (c, f), (e, f)]:
+            pipeline.set_dependency(u, v)
+
+        # WHEN
+        pipeline.run()
+        backend.shutdown()
+
+        # THEN a, chains b -> c and d -> e, and f
+        assert backend.submissions == 4
+        assert f.get_result() == 9
+
+    def test_process_backend_chain(self):
+        pipeline = Pipeline(backend="process", max_workers=2, fuse_chains=True)
+        tasks = [pipeline.create_task(np.zeros, cacheable=False)]
+        pipeline.set_source_value(tasks[0], np.zeros(4))
+        for _ in range(3):
+            tasks.append(pipeline.create_task(increment))
+            pipeline.set_dependency(tasks[-2], tasks[-1])
+
+        pipeline.run()
+        pipeline.executor.shutdown()
+
+        assert np.array_equal(tasks[-1].get_result(), np.full(4, 3.0))
+        assert np.array_equal(tasks[1].get_result(), np.ones(4))
+
+    def test_intermediate_results_are_released(self):
+        pipeline = Pipeline(release_results=True, fuse_chains=True)
+        tasks = self.build_chain(pipeline, 4)
+        tasks[-1].output = True
+
+        pipeline.run()
+
+        assert tasks[-1].get_result() == 3
+        assert all(task.get_result() is None for task in tasks[:-1])
+
+    def test_trace_events_of_fused_tasks(self):
+        tracer = Tracer()
+        pipeline = Pipeline(hooks=[tracer], fuse_chains=True)
+        tasks = self.build_chain(pipeline, 3)
+
+        pipeline.run()
+
+        spans = sorted(tracer.spans, key=lambda span: span.started)
+        assert [span.task for span in spans] == tasks
+        assert spans[1].started >= spans[0].finished
+
+    def test_error_in_chain(self):
+        pipeline = Pipeline(fuse_chains=True)
+        tasks = self.build_chain(pipeline, 2)
+        failing = pipeline.create_task(fail)
+        last = pipeline.create_task(increment)
+        pipeline.set_dependency(tasks[-1], failing)
+        pipeline.set_dependency(failing, last)
+
+        with pytest.raises(ValueError, match="failure in chain"):
+            pipeline.run()
+
+        assert all(task.is_finished() for task in tasks)
+        assert not last.is_finished()
+
+    def test_chain_stops_when_run_is_cancelled(self):
+        # GIVEN a chain whose first task cancels the run
+        cancellation = threading.Event()
+        calls = []
+        chain = [Task(lambda: cancellation.set() or 1), Task(calls.append)]
+
+        # WHEN
+        token = CancellationToken(cancellation)
+        traced, error = run_cancellable(token, run_chain, chain, [True, True], [(), ()], False)
+
+        # THEN the rest of the chain is not executed
+        assert [result.result for result in traced] == [1]
+        assert isinstance(error, CancelledError)
+        assert calls == []
+
+    def test_chain_is_fused_again_after_invalidation(self):
+        backend = CountingBackend()
+        pipeline = Pipeline(backend=backend, fuse_chains=True)
+        tasks = self.build_chain(pipeline, 4)
+        pipeline.run()
+
+        pipeline.set_source_value(tasks[0], 10)
+        pipeline.run()
+        backend.shutdown()
+
+        assert backend.submissions == 2
+        assert tasks[-1].get_result() == 13
+
+def fail_alone():
+    raise ValueError("failure in batch")
+
+class TestBatching:
+    def build_fan_out(self, pipeline, width):
+        source = pipeline.create_task(lambda: 1)
+        tasks = [pipeline.create_task(increment) for _ in range(width)]
+        for task in tasks:
+            pipeline.set_dependency(source, task)
+        return source, tasks
+
+    def test_ready_tasks_are_submitted_in_batches(self):
+        # GIVEN
+        backend = CountingBackend(max_workers=2)
+        tracer = Tracer()
+        pipeline = Pipeline(backend=backend, max_workers=2, batch_tasks=True, hooks=[tracer])
+        source, tasks = self.build_fan_out(pipeline, 100)
+
+        # WHEN
+        pipeline.run()
+
+        # THEN tasks are observed one by one but submitted together
+        assert [task.get_result() for task in tasks] == [2] * 100
+        assert backend.submissions < 50
+        assert {span.task for span in tracer.spans} == {source, *tasks}
+        backend.shutdown()
+
+    def test_failure_in_batch(self):
+        pipeline = Pipeline(batch_tasks=True, failure_policy=CONTINUE_INDEPENDENT)
+        tasks = [pipeline.create_task(lambda: 1) for _ in range(3)] + [pipeline.create_task(fail_alone)]
+
+        with pytest.raises(ValueError, match="failure in batch"):
+            pipeline.run()
+
+        assert [task.get_result() for task in tasks[:3]] == [1, 1, 1]
+        assert list(pipeline.failed_tasks) == [tasks[3]]
+
+    def test_batch_stops_when_run_is_cancelled(self):
+        cancellation = threading.Event()
+        calls = []
+        tasks = [Task(lambda: cancellation.set() or 1), Task(lambda: calls.append(1)), Task(lambda: calls.append(2))]
+
+        outcomes = run_cancellable(CancellationToken(cancellation), run_batch, tasks, [(), (), ()], False)
+
+        assert outcomes[0][0].result == 1
+        assert [type(error) for _, error in outcomes[1:]] == [CancelledError, CancelledError]
+        assert calls == []
+
+    def test_batching_resumes_after_slow_tasks(self):
+        # GIVEN slow tasks which turn batching off, followed by many short ones
+        backend = CountingBackend(max_workers=2)
+        pipeline = Pipeline(backend=backend, max_workers=2, batch_tasks=True)
+        slow = [pipeline.create_task(lambda: time.sleep(0.005)) for _ in range(20)]
+        gate = pipeline.create_task(lambda: 1)
+        for task in slow:
+            pipeline.set_dependency(task, gate)
+        tasks = [pipeline.create_task(increment) for _ in range(2000)]
+        for task in tasks:
+            pipeline.set_dependency(gate, task)
+
+        # WHEN
+        pipeline.run()
+
+        # THEN durations of the short tasks running alone brought batching back
+        assert [task.get_result() for task in tasks] == [2] * 2000
+        assert backend.submissions < 500
+        backend.shutdown()
+
+    def test_batch_size_adapts_to_task_duration(self):
+        sizer = BatchSizer(workers=4, target_duration=0.001)
+        assert sizer.get_size(ready=1000) == 8
+
+        sizer.record(0.00001)
+        assert sizer.get_size(ready=1000) == 100
+        # small number of ready tasks is spread over the workers
+        assert sizer.get_size(ready=10) == 3
+
+        for _ in range(50):
+            sizer.record(0.01)
+        assert sizer.get_size(ready=1000) == 1
@@ -0,0 +1,90 @@
+import pytest
+
+from pipeline import Pipeline
+
+class TestIncrementalExecution:
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    def build_pipeline(self, calls, early_cutoff=False):
+        # a -> b -> d, c -> d
+        pipeline = Pipeline(early_cutoff=early_cutoff)
+
+        def a():
+            calls.append("a")
+            return 2
+
+        def b(x):
+            calls.append("b")
+            return x % 2
+
+        def c():
+            calls.append("c")
+            return 10
+
+        def d(x, y):
+            calls.append("d")
+            return x + y
+
+        tasks = [pipeline.create_task(function) for function in (a, b, c, d)]
+        pipeline.set_dependency(tasks[0], tasks[1])
+        pipeline.set_dependency(tasks[1], tasks[3])
+        pipeline.set_dependency(tasks[2], tasks[3])
+        return pipeline, tasks
+
+    def test_only_invalidated_tasks_and_descendants_run_again(self, calls):
+        pipeline, (a, b, c, d) = self.build_pipeline(calls)
+        pipeline.run()
+        calls.clear()
+
+        pipeline.invalidate(b)
+        assert b.is_pending() and d.is_pending() and a.is_finished() and c.is_finished()
+        pipeline.run()
+
+        assert calls == ["b", "d"]
+        assert d.get_result() == 10
+
+    def test_set_source_value(self, calls):
+        pipeline, (a, b, c, d) = self.build_pipeline(calls)
+        pipeline.run()
+        calls.clear()
+
+        pipeline.set_source_value(c, 20)
+        pipeline.run()
+
+        assert calls == ["d"]
+        assert d.get_result() == 20
+
+    def test_set_callable(self, calls):
+        pipeline, (a, b, c, d) = self.build_pipeline(calls)
+        pipeline.run()
+
+        pipeline.set_callable(b, lambda x: x * 10)
+        pipeline.run()
+
+        assert d.get_result() == 30
+
+    def test_early_cutoff_stops_propagation(self, calls):
+        pipeline, (a, b, c, d) = self.build_pipeline(calls, early_cutoff=True)
+        pipeline.run()
+        calls.clear()
+
+        # b computes the same parity for the new value, so d keeps its result
+        pipeline.set_source_value(a, 4)
+        pipeline.run()
+
+        assert calls == ["b"]
+        assert d.is_finished()
+        assert d.get_result() == 10
+
+    def test_early_cutoff_propagates_changes(self, calls):
+        pipeline, (a, b, c, d) = self.build_pipeline(calls, early_cutoff=True)
+        pipeline.run()
+        calls.clear()
+
+        pipeline.set_source_value(a, 3)
+        pipeline.run()
+
+        assert calls == ["b", "d"]
+        assert d.get_result() == 11
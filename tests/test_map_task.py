@@ -0,0 +1,94 @@
+import pytest
+import time
+
+import numpy as np
+
+from map_task import MapTask, StdReducer
+from pipeline import Pipeline
+
+def identity(chunk):
+    return chunk
+
+def scale(chunk, factor):
+    return chunk * factor
+
+class TestMapTask:
+    @pytest.fixture
+    def data(self):
+        return np.random.default_rng(0).integers(0, 10, size=(1000, 4))
+
+    def run_map_task(self, data, *map_task_args, **map_task_kwargs):
+        pipeline = Pipeline()
+        source = pipeline.create_task(lambda: data)
+        task = pipeline.create_map_task(*map_task_args, **map_task_kwargs)
+        pipeline.set_dependency(source, task)
+        pipeline.run()
+        return task.get_result()
+
+    def test_concat(self, data):
+        result = self.run_map_task(data, lambda chunk: chunk * 2, chunk_size=64)
+        assert np.array_equal(result, data * 2)
+
+    @pytest.mark.parametrize("reduce, expected", [
+        ("sum", np.sum), ("min", np.min), ("max", np.max), ("mean", np.mean), ("std", np.std)
+    ])
+    def test_mergeable_reductions(self, data, reduce, expected):
+        result = self.run_map_task(data, identity, reduce=reduce, chunk_size=37)
+        assert result == pytest.approx(expected(data))
+
+    def test_custom_reduction(self, data):
+        result = self.run_map_task(data, lambda chunk: len(chunk), reduce=sum, chunk_size=100)
+        assert result == 1000
+
+    def test_sequence_input(self):
+        result = self.run_map_task(list(range(10)), lambda chunk: [x * x for x in chunk], chunk_size=3)
+        assert result == [x * x for x in range(10)]
+
+    def test_broadcast_inputs(self, data):
+        pipeline = Pipeline()
+        source = pipeline.create_task(lambda: data)
+        factor = pipeline.create_task(lambda: 3)
+        task = pipeline.create_map_task(scale, chunk_size=100)
+        pipeline.set_dependency(source, task)
+        pipeline.set_dependency(factor, task)
+
+        pipeline.run()
+
+        assert np.array_equal(task.get_result(), data * 3)
+
+    def test_chunks_run_in_parallel(self):
+        def slow(chunk):
+            time.sleep(0.2)
+            return chunk
+
+        start = time.perf_counter()
+        result = self.run_map_task(np.arange(4), slow, chunk_size=1)
+
+        assert np.array_equal(result, np.arange(4))
+        assert time.perf_counter() - start < 0.5
+
+    def test_process_backend(self, data):
+        pipeline = Pipeline(backend="process")
+        source = pipeline.create_task(lambda: data, backend="thread")
+        task = pipeline.create_map_task(identity, reduce="std", chunk_size=250)
+        pipeline.set_dependency(source, task)
+
+        pipeline.run()
+        pipeline.executor.shutdown()
+
+        assert task.get_result() == pytest.approx(np.std(data))
+
+    def test_chunk_error_is_raised(self, data):
+        def failing(chunk):
+            raise RuntimeError("chunk failed")
+
+        with pytest.raises(RuntimeError, match="chunk failed"):
+            self.run_map_task(data, failing, chunk_size=100)
+
+    def test_sequential_execute(self, data):
+        task = MapTask(identity, reduce=StdReducer(), chunk_size=7)
+        assert task.execute(data) == pytest.approx(np.std(data))
+
+    def test_unknown_reduction(self):
+        with pytest.raises(ValueError, match="Unknown reduction 'median'."):
+            MapTask(identity, reduce="median")
@@ -0,0 +1,128 @@
+import pytest
+
+from backends import get_shared_backend
+from pipeline import Pipeline
+
+def increment(x):
+    return x + 1
+
+class TestParameterizedRuns:
+    @pytest.fixture
+    def pipeline(self):
+        with Pipeline() as pipeline:
+            yield pipeline
+
+    def build_pipeline(self, pipeline, calls):
+        def scale(x):
+            calls.append("scale")
+            return x * 10
+
+        def offset(x):
+            calls.append("offset")
+            return x + 1
+
+        a = pipeline.create_task(scale)
+        b = pipeline.create_task(offset)
+        c = pipeline.create_task(lambda x, y: x + y, name="total")
+        pipeline.set_dependency(a, c)
+        pipeline.set_dependency(b, c)
+        return a, b, c
+
+    def test_params_are_passed_as_inputs(self, pipeline):
+        a, b, c = self.build_pipeline(pipeline, [])
+
+        pipeline.run({a: 1, b: 2})
+        first = c.get_result()
+        pipeline.run({a: 3, b: 4})
+
+        assert (first, c.get_result()) == (13, 35)
+
+    def test_only_changed_params_are_executed(self, pipeline):
+        # GIVEN
+        calls = []
+        a, b, c = self.build_pipeline(pipeline, calls)
+        pipeline.run({a: 1, b: 2})
+        calls.clear()
+
+        # WHEN
+        pipeline.run({a: 1, b: 5})
+
+        # THEN
+        assert calls == ["offset"]
+        assert c.get_result() == 16
+
+    def test_params_of_fused_chain(self):
+        # GIVEN a chain whose tasks after the first one take parameters
+        with Pipeline(fuse_chains=True) as pipeline:
+            a = pipeline.create_task(lambda: 1)
+            b = pipeline.create_task(lambda offset, x: x + offset)
+            c = pipeline.create_task(lambda scale, x: x * scale)
+            pipeline.set_dependency(a, b)
+            pipeline.set_dependency(b, c)
+
+            # WHEN
+            pipeline.run({b: 2, c: 10})
+            first = c.get_result()
+            pipeline.run({b: 3, c: 10})
+
+        # THEN
+        assert (first, c.get_result()) == (30, 40)
+
+    def test_params_by_task_name(self, pipeline):
+        source = pipeline.create_task(increment, name="source")
+
+        pipeline.run({"source": 41})
+
+        assert source.get_result() == 42
+        with pytest.raises(ValueError, match="Task name 'missing' matches 0 tasks."):
+            pipeline.run({"missing": 1})
+
+    def test_reset(self, pipeline):
+        calls = []
+        a, b, c = self.build_pipeline(pipeline, calls)
+        pipeline.run({a: 1, b: 2})
+
+        pipeline.reset()
+        assert all(task.is_pending() and task.get_result() is None for task in (a, b, c))
+
+        calls.clear()
+        pipeline.run()
+        assert sorted(calls) == ["offset", "scale"]
+        assert c.get_result() == 13
+
+    def test_reset_of_columnar_pipeline(self):
+        with Pipeline(columnar=True) as pipeline:
+            task = pipeline.create_task(increment)
+            pipeline.run({task: 1})
+
+            pipeline.reset()
+
+            assert task.is_pending()
+            assert pipeline.columns.results == [None]
+
+class TestSharedWorkers:
+    def test_pipelines_share_worker_pool(self):
+        # GIVEN
+        first = Pipeline(shared_workers=True)
+        second = Pipeline(shared_workers=True)
+
+        # WHEN
+        with first, second:
+            tasks = [pipeline.create_task(increment) for pipeline in (first, second)]
+            first.run({tasks[0]: 1})
+            second.run({tasks[1]: 2})
+
+        # THEN pools are not created per pipeline and outlive them
+        assert first.executor.get_backend() is second.executor.get_backend() is get_shared_backend("thread")
+        assert [task.get_result() for task in tasks] == [2, 3]
+        assert get_shared_backend("thread").submit(increment, 1).result() == 2
+
+    def test_context_manager_shuts_down_pools(self):
+        with Pipeline() as pipeline:
+            pipeline.create_task(lambda: 1)
+            pipeline.run()
+            backend = pipeline.executor.get_backend()
+
+        assert pipeline.executor.backends == {}
+        with pytest.raises(RuntimeError):
+            backend.submit(increment, 1)
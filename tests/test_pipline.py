@@ -88,3 +88,16 @@ class TestPipeline:
         assert pipeline.are_all_tasks_finished()
 
 
+
+    def test_columnar_pipeline(self):
+        pipeline = Pipeline(backend="process", max_workers=2, columnar=True)
+        task_a = pipeline.create_task(example_callable)
+        pipeline.set_source_value(task_a, 3)
+        task_b = pipeline.create_task(example_callable)
+        pipeline.set_dependency(task_a, task_b)
+
+        pipeline.run()
+        pipeline.executor.shutdown()
+
+        assert pipeline.columns.results == [3, 6]
+        assert pipeline.are_all_tasks_finished()
@@ -0,0 +1,77 @@
+import pytest
+import time
+
+from durations import DurationStore
+from pipeline import Pipeline
+from scheduler import Scheduler
+
+def sleep_task(name, duration):
+    def task(*args):
+        time.sleep(duration)
+    task.__name__ = name
+    return task
+
+class TestPriorityScheduling:
+    def build_pipeline(self, durations):
+        # created in an order which makes plain list scheduling start the long task last
+        pipeline = Pipeline(max_workers=2, durations=durations)
+        pipeline.create_task(sleep_task("s1", 0.2))
+        pipeline.create_task(sleep_task("s2", 0.2))
+        b1 = pipeline.create_task(sleep_task("b1", 0.2))
+        b2 = pipeline.create_task(sleep_task("b2", 0.2))
+        pipeline.create_task(sleep_task("long", 0.8))
+        pipeline.set_dependency(b1, b2)
+        return pipeline
+
+    def test_upward_ranks(self):
+        durations = DurationStore()
+        durations.durations = {"a": 1.0, "b": 2.0, "c": 3.0}
+        pipeline = Pipeline(durations=durations)
+        a = pipeline.create_task(sleep_task("a", 0))
+        b = pipeline.create_task(sleep_task("b", 0))
+        c = pipeline.create_task(sleep_task("c", 0))
+        d = pipeline.create_task(sleep_task("unknown", 0))
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(b, c)
+        pipeline.set_dependency(a, c)
+
+        ranks = Scheduler(pipeline).compute_upward_ranks(pipeline.get_tasks())
+
+        assert ranks == {a: 6.0, b: 5.0, c: 3.0, d: durations.default_duration}
+
+    def test_recorded_durations_shorten_makespan(self, tmp_path):
+        # GIVEN durations recorded by a previous run
+        path = tmp_path / "durations.json"
+        self.build_pipeline(DurationStore(path)).run()
+
+        # WHEN the same topology runs with the persisted estimates
+        pipeline = self.build_pipeline(DurationStore(path))
+        start = time.perf_counter()
+        pipeline.run()
+        makespan = time.perf_counter() - start
+
+        # THEN the long task starts first and the makespan approaches the critical path of 0.8s
+        assert makespan < 1.0
+
+    def test_max_workers_bounds_running_tasks(self):
+        pipeline = Pipeline(max_workers=2)
+        for i in range(4):
+            pipeline.create_task(sleep_task(f"task{i}", 0.2))
+
+        start = time.perf_counter()
+        pipeline.run()
+        makespan = time.perf_counter() - start
+
+        assert 0.4 <= makespan < 0.6
+
+    def test_durations_are_persisted(self, tmp_path):
+        path = tmp_path / "durations.json"
+        pipeline = Pipeline(durations=DurationStore(path))
+
+        def measured():
+            time.sleep(0.1)
+
+        pipeline.create_task(measured)
+        pipeline.run()
+
+        assert DurationStore(path).durations["measured"] == pytest.approx(0.1, abs=0.05)
@@ -0,0 +1,80 @@
+import pytest
+
+import numpy as np
+
+from pipeline import Pipeline
+
+class TestReleaseResults:
+    def build_chain(self, pipeline, length, size):
+        tasks = [pipeline.create_task(lambda: np.zeros(size, dtype=np.uint8))]
+        for _ in range(length - 1):
+            tasks.append(pipeline.create_task(lambda data: data + 1))
+            pipeline.set_dependency(tasks[-2], tasks[-1])
+        return tasks
+
+    def test_results_are_kept_by_default(self):
+        pipeline = Pipeline()
+        tasks = self.build_chain(pipeline, 4, 10)
+
+        pipeline.run()
+
+        assert all(task.get_result() is not None for task in tasks)
+        assert pipeline.peak_result_size is None
+
+    def test_intermediate_results_are_released(self):
+        # GIVEN
+        pipeline = Pipeline(release_results=True)
+        tasks = self.build_chain(pipeline, 10, 10**6)
+        tasks[-1].output = True
+
+        # WHEN
+        pipeline.run()
+
+        # THEN only the output is kept and at most two arrays were resident at once
+        assert np.array_equal(tasks[-1].get_result(), np.full(10**6, 9))
+        assert all(task.get_result() is None for task in tasks[:-1])
+        assert 10**6 <= pipeline.peak_result_size <= 2 * 10**6
+
+    def test_result_is_kept_until_last_consumer_finished(self):
+        pipeline = Pipeline(release_results=True)
+        a = pipeline.create_task(lambda: 1)
+        b = pipeline.create_task(lambda x: x + 1)
+        c = pipeline.create_task(lambda x, y: x + y, output=True)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(a, c)
+        pipeline.set_dependency(b, c)
+
+        pipeline.run()
+
+        assert c.get_result() == 3
+        assert a.get_result() is None
+
+    def test_released_inputs_are_recomputed_for_invalidated_task(self):
+        # GIVEN a run which released the result of a
+        pipeline = Pipeline(release_results=True)
+        a = pipeline.create_task(lambda: 1)
+        b = pipeline.create_task(lambda x: x + 1)
+        c = pipeline.create_task(lambda x: x * 10, output=True)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(b, c)
+        pipeline.run()
+        assert b.get_result() is None
+
+        # WHEN
+        pipeline.invalidate(c)
+        pipeline.run()
+
+        # THEN released ancestors were executed again
+        assert c.get_result() == 20
+        assert a.get_result() is None and b.get_result() is None
+
+    def test_released_inputs_are_recomputed_for_changed_params(self):
+        pipeline = Pipeline(release_results=True)
+        a = pipeline.create_task(lambda: 1)
+        b = pipeline.create_task(lambda param, x: param + x, name="b", output=True)
+        pipeline.set_dependency(a, b)
+        pipeline.run({"b": 1})
+
+        pipeline.run({"b": 10})
+
+        assert b.get_result() == 11
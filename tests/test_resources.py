@@ -0,0 +1,78 @@
+import pytest
+import threading
+import time
+
+from pipeline import Pipeline
+from resources import ResourcePool, normalize_resources
+
+class TestResources:
+    def test_normalize_resources(self):
+        assert normalize_resources(None) is None
+        assert normalize_resources("io") == {"io": 1}
+        assert normalize_resources(["io", "license"]) == {"io": 1, "license": 1}
+        assert normalize_resources({"memory": 4}) == {"memory": 4}
+
+    def test_resource_pool(self):
+        pool = ResourcePool({"memory": 8})
+
+        assert pool.try_acquire({"memory": 6})
+        assert not pool.try_acquire({"memory": 4})
+        assert pool.try_acquire({"disk": 100})  # not limited
+        pool.release({"memory": 6})
+        assert pool.try_acquire({"memory": 8})
+
+    def test_bounded_resource_is_not_oversubscribed(self):
+        # GIVEN
+        pipeline = Pipeline(resources={"memory": 8})
+        lock = threading.Lock()
+        usage = {"current": 0, "peak": 0}
+
+        def heavy():
+            with lock:
+                usage["current"] += 4
+                usage["peak"] = max(usage["peak"], usage["current"])
+            time.sleep(0.1)
+            with lock:
+                usage["current"] -= 4
+
+        for _ in range(6):
+            pipeline.create_task(heavy, resources={"memory": 4})
+
+        # WHEN
+        start = time.perf_counter()
+        pipeline.run()
+        total_time = time.perf_counter() - start
+
+        # THEN two tasks run at a time
+        assert usage["peak"] == 8
+        assert 0.3 <= total_time < 0.5
+
+    def test_cheap_tasks_bypass_blocked_tasks(self):
+        pipeline = Pipeline(resources={"license": 1})
+        finished = []
+
+        def licensed():
+            time.sleep(0.2)
+            finished.append("licensed")
+
+        def cheap():
+            finished.append("cheap")
+
+        pipeline.create_task(licensed, resources="license")
+        pipeline.create_task(licensed, resources="license")
+        pipeline.create_task(cheap)
+
+        pipeline.run()
+
+        assert finished == ["cheap", "licensed", "licensed"]
+
+    def test_request_exceeding_capacity(self):
+        pipeline = Pipeline(resources={"memory": 2})
+
+        def heavy():
+            pass
+
+        pipeline.create_task(heavy, resources={"memory": 4})
+
+        with pytest.raises(ValueError, match="Task heavy requests 4 of resource 'memory', but capacity is 2."):
+            pipeline.run()
@@ -0,0 +1,100 @@
+import pytest
+import threading
+import time
+
+from pipeline import Pipeline
+from scheduler import Scheduler
+
+class TestScheduler:
+    def test_successor_starts_while_independent_task_runs(self):
+        # GIVEN
+        pipeline = Pipeline()
+        child_started = []
+
+        def slow():
+            time.sleep(0.5)
+
+        def parent():
+            return 1
+
+        def child(value):
+            child_started.append(time.perf_counter())
+            return value + 1
+
+        s = pipeline.create_task(slow)
+        p = pipeline.create_task(parent)
+        c = pipeline.create_task(child)
+        pipeline.set_dependency(p, c)
+
+        # WHEN
+        start = time.perf_counter()
+        pipeline.run()
+
+        # THEN child ran long before the slow task finished
+        assert c.get_result() == 2
+        assert s.is_finished()
+        assert child_started[0] - start < 0.25
+
+    def test_long_chain(self):
+        pipeline = Pipeline()
+        tasks = [pipeline.create_task(lambda: 0)]
+        for _ in range(2000):
+            tasks.append(pipeline.create_task(lambda x: x + 1))
+            pipeline.set_dependency(tasks[-2], tasks[-1])
+
+        pipeline.run()
+
+        assert tasks[-1].get_result() == 2000
+        assert pipeline.are_all_tasks_finished()
+
+    def test_wide_fan_out_fan_in(self):
+        pipeline = Pipeline()
+        source = pipeline.create_task(lambda: 1)
+        sink = pipeline.create_task(lambda *values: sum(values))
+        for _ in range(500):
+            middle = pipeline.create_task(lambda x: x * 2)
+            pipeline.set_dependency(source, middle)
+            pipeline.set_dependency(middle, sink)
+
+        pipeline.run()
+
+        assert sink.get_result() == 1000
+
+    def test_finished_tasks_are_not_executed_again(self):
+        pipeline = Pipeline()
+        calls = []
+        a = pipeline.create_task(lambda: calls.append('a'))
+        b = pipeline.create_task(lambda: calls.append('b'))
+        a.set_state_to_finished()
+
+        Scheduler(pipeline).run()
+
+        assert calls == ['b']
+        assert b.is_finished()
+
+    def test_error_is_raised(self):
+        pipeline = Pipeline()
+
+        def failing():
+            raise RuntimeError("task failed")
+
+        a = pipeline.create_task(failing)
+        b = pipeline.create_task(lambda: 1)
+        pipeline.set_dependency(a, b)
+
+        with pytest.raises(RuntimeError, match="task failed"):
+            pipeline.run()
+        assert b.is_pending()
+
+    def test_callbacks_run_concurrently(self):
+        # fan-in of tasks finishing in parallel worker threads must not lose dependency updates
+        pipeline = Pipeline()
+        barrier = threading.Barrier(4)
+        sink = pipeline.create_task(lambda *values: len(values))
+        for _ in range(4):
+            task = pipeline.create_task(lambda: barrier.wait())
+            pipeline.set_dependency(task, sink)
+
+        pipeline.run()
+
+        assert sink.get_result() == 4
@@ -0,0 +1,199 @@
+import pytest
+import threading
+import time
+
+from pipeline import Pipeline
+
+class TestStreamTask:
+    def test_stages_overlap(self):
+        # GIVEN
+        pipeline = Pipeline()
+        events = []
+
+        def produce():
+            for i in range(3):
+                events.append(f"produced {i}")
+                yield i
+                time.sleep(0.1)
+
+        def square(items):
+            for item in items:
+                events.append(f"squared {item}")
+                yield item * item
+
+        def collect(items):
+            return list(items)
+
+        a = pipeline.create_stream_task(produce)
+        b = pipeline.create_stream_task(square)
+        c = pipeline.create_task(collect)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(b, c)
+
+        # WHEN
+        pipeline.run()
+
+        # THEN first item was processed before the producer yielded the next one
+        assert c.get_result() == [0, 1, 4]
+        assert events.index("squared 0") < events.index("produced 1")
+        assert a.get_result() == 3
+
+    def test_backpressure_bounds_queue(self):
+        pipeline = Pipeline()
+        produced = []
+        max_in_flight = []
+
+        def produce():
+            for i in range(50):
+                produced.append(i)
+                yield i
+
+        def slow_sum(items):
+            total = 0
+            for item in items:
+                max_in_flight.append(len(produced) - item)
+                time.sleep(0.005)
+                total += item
+            return total
+
+        a = pipeline.create_stream_task(produce, queue_size=2)
+        b = pipeline.create_task(slow_sum)
+        pipeline.set_dependency(a, b)
+
+        pipeline.run()
+
+        assert b.get_result() == sum(range(50))
+        # producer is at most queue size (+ item being put and item being consumed) ahead of the consumer
+        assert max(max_in_flight) <= 4
+
+    def test_fan_out(self):
+        pipeline = Pipeline()
+        a = pipeline.create_stream_task(lambda: iter(range(100)))
+        b = pipeline.create_task(lambda items: sum(items))
+        c = pipeline.create_task(lambda items: max(items))
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(a, c)
+
+        pipeline.run()
+
+        assert b.get_result() == 4950
+        assert c.get_result() == 99
+
+    def test_regular_input_of_streaming_task(self):
+        pipeline = Pipeline()
+        a = pipeline.create_task(lambda: 3)
+        b = pipeline.create_stream_task(lambda n: iter(range(n)))
+        c = pipeline.create_task(lambda items: list(items))
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(b, c)
+
+        pipeline.run()
+
+        assert c.get_result() == [0, 1, 2]
+
+    def test_producer_error_reaches_consumer(self):
+        pipeline = Pipeline()
+
+        def produce():
+            yield 1
+            raise RuntimeError("producer failed")
+
+        a = pipeline.create_stream_task(produce)
+        b = pipeline.create_task(lambda items: list(items))
+        pipeline.set_dependency(a, b)
+
+        with pytest.raises(RuntimeError, match="producer failed"):
+            pipeline.run()
+
+    def test_failed_consumer_is_not_retried(self):
+        # GIVEN a consumer failing on its first attempt
+        pipeline = Pipeline(retries=1, retry_backoff=0.01)
+        attempts = []
+
+        def consume(items):
+            attempts.append(next(iter(items)))
+            raise ValueError("consumer failed")
+
+        producer = pipeline.create_stream_task(lambda: iter(range(100)))
+        consumer = pipeline.create_task(consume)
+        pipeline.set_dependency(producer, consumer)
+
+        # WHEN / THEN the half drained stream is not consumed again
+        with pytest.raises(ValueError, match="consumer failed"):
+            pipeline.run()
+        assert attempts == [0]
+        assert pipeline.get_retries(consumer) == 0
+
+    def test_consumer_stopping_early_releases_producer(self):
+        pipeline = Pipeline()
+
+        def produce():
+            i = 0
+            while True:
+                yield i
+                i += 1
+                if i > 10000:
+                    raise RuntimeError("producer was not released")
+
+        a = pipeline.create_stream_task(produce, queue_size=1)
+        b = pipeline.create_task(lambda items: next(iter(items)))
+        pipeline.set_dependency(a, b)
+
+        pipeline.run()
+
+        assert b.get_result() == 0
+
+def produce_items():
+    yield from range(100)
+
+def consume(stream):
+    return sum(stream)
+
+def double(items):
+    for item in items:
+        yield 2 * item
+
+class TestStreamStages:
+    def test_stream_with_single_worker(self):
+        # GIVEN a single worker, producer blocks on a full stream until its consumer runs
+        pipeline = Pipeline(max_workers=1)
+        producer = pipeline.create_stream_task(produce_items, queue_size=4)
+        consumer = pipeline.create_task(consume)
+        pipeline.set_dependency(producer, consumer)
+
+        # WHEN
+        pipeline.run()
+
+        # THEN
+        assert consumer.get_result() == sum(range(100))
+
+    def test_stages_longer_than_pool(self):
+        pipeline = Pipeline(max_workers=2)
+        stages = [pipeline.create_stream_task(produce_items, queue_size=2)]
+        for _ in range(4):
+            stages.append(pipeline.create_stream_task(double, queue_size=2))
+            pipeline.set_dependency(stages[-2], stages[-1])
+        consumer = pipeline.create_task(consume)
+        pipeline.set_dependency(stages[-1], consumer)
+
+        pipeline.run()
+
+        assert consumer.get_result() == 16 * sum(range(100))
+
+    def test_stream_in_process_pipeline(self):
+        with Pipeline(backend="process", max_workers=1) as pipeline:
+            producer = pipeline.create_stream_task(produce_items)
+            consumer = pipeline.create_task(consume)
+            pipeline.set_dependency(producer, consumer)
+
+            pipeline.run()
+
+        assert consumer.get_result() == sum(range(100))
+
+    def test_consumer_in_process_backend_is_rejected(self):
+        pipeline = Pipeline()
+        producer = pipeline.create_stream_task(produce_items)
+        consumer = pipeline.create_task(consume, backend="process")
+
+        with pytest.raises(ValueError, match="consumers of streams run in threads"):
+            pipeline.set_dependency(producer, consumer)
@@ -0,0 +1,114 @@
+import pytest
+
+from pipeline import Pipeline
+
+def one():
+    return 1
+
+def increment(x):
+    return x + 1
+
+def double(x):
+    return 2 * x
+
+def produce():
+    yield from range(3)
+
+def consume(stream):
+    return sum(stream)
+
+class TestTargets:
+    def build_pipeline(self, **options):
+        pipeline = Pipeline(**options)
+        a = pipeline.create_task(one, name="a")
+        b = pipeline.create_task(increment, name="b")
+        c = pipeline.create_task(double, name="c")
+        d = pipeline.create_task(increment, name="d")
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(a, c)
+        pipeline.set_dependency(c, d)
+        return pipeline, a, b, c, d
+
+    def test_only_ancestors_of_targets_are_executed(self):
+        # GIVEN
+        pipeline, a, b, c, d = self.build_pipeline()
+
+        # WHEN
+        pipeline.run(targets=["b"])
+
+        # THEN
+        assert a.is_finished() and b.get_result() == 2
+        assert c.is_pending() and d.is_pending()
+
+    def test_remaining_tasks_are_executed_later(self):
+        # GIVEN
+        pipeline, a, b, c, d = self.build_pipeline(release_results=True)
+        d.output = True
+
+        # WHEN
+        pipeline.run(targets=[b])
+
+        # THEN result consumed by a pending task is kept for the next run
+        assert a.get_result() == 1 and b.get_result() is None
+        pipeline.run(targets=[d])
+        assert d.get_result() == 3
+
+    def test_compiled_pipeline(self):
+        pipeline, a, b, c, d = self.build_pipeline()
+        pipeline.compile()
+
+        pipeline.run(targets=[c])
+
+        assert c.get_result() == 2 and b.is_pending() and d.is_pending()
+
+    def test_consumers_of_streams_are_required(self):
+        pipeline = Pipeline()
+        producer = pipeline.create_stream_task(produce)
+        consumers = [pipeline.create_task(consume) for _ in range(2)]
+        for consumer in consumers:
+            pipeline.set_dependency(producer, consumer)
+
+        pipeline.run(targets=[consumers[0]])
+
+        assert [consumer.get_result() for consumer in consumers] == [3, 3]
+
+    def test_unknown_target(self):
+        pipeline, a, b, c, d = self.build_pipeline()
+
+        with pytest.raises(ValueError, match="Task name 'x' matches 0 tasks."):
+            pipeline.run(targets=["x"])
+
+class TestLazyResults:
+    def test_result_is_computed_on_demand(self):
+        # GIVEN
+        pipeline = Pipeline(lazy_results=True)
+        a = pipeline.create_task(one)
+        b = pipeline.create_task(increment)
+        c = pipeline.create_task(double)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(a, c)
+
+        # WHEN
+        result = b.get_result()
+
+        # THEN
+        assert result == 2
+        assert c.is_pending()
+
+    def test_invalidated_result_is_recomputed(self):
+        pipeline = Pipeline(lazy_results=True)
+        a = pipeline.create_task(one)
+        b = pipeline.create_task(increment)
+        pipeline.set_dependency(a, b)
+        assert b.get_result() == 2
+
+        pipeline.set_source_value(a, 5)
+
+        assert b.get_result() == 6
+
+    def test_lazy_task_runs_in_process_worker(self):
+        pipeline = Pipeline(backend="process", max_workers=1, lazy_results=True)
+        a = pipeline.create_task(one)
+
+        assert a.get_result() == 1
+        pipeline.shutdown()
@@ -1,7 +1,8 @@
 import pytest
+import pickle
 import time
 
-from task import Task
+from task import ColumnarTask, Task, TaskColumns, TaskState
 
 def example_callable(x):
     return x * 2
@@ -60,3 +61,70 @@ class TestTask:
 
         total_time = end_time - start_time
         assert total_time >= 0.1
+
+class TestSlottedTask:
+    def test_unique_ids_and_names(self):
+        a = Task(lambda x: x)
+        b = Task(lambda x: x, name="identity")
+
+        assert a.id != b.id
+        assert (a.name, b.name) == ("<lambda>", "identity")
+        assert str(b) == "identity"
+
+    def test_task_has_no_instance_dict(self):
+        task = Task(example_callable)
+
+        assert not hasattr(task, "__dict__")
+        with pytest.raises(AttributeError):
+            task.unknown_attribute = 1
+
+    def test_columnar_task(self):
+        # GIVEN
+        columns = TaskColumns()
+        a = ColumnarTask(example_callable, columns)
+        b = ColumnarTask(example_callable, columns)
+
+        # WHEN
+        a.set_state_to_started()
+        a.set_state_to_finished()
+        a.result = 4
+
+        # THEN
+        assert (a.is_finished(), b.is_pending()) == (True, True)
+        assert columns.results == [4, None]
+        assert columns.count(TaskState.FINISHED) == 1
+
+        columns.reset()
+        assert a.is_pending() and a.get_result() is None
+
+    def test_columnar_task_is_pickled_without_columns(self):
+        columns = TaskColumns()
+        task = ColumnarTask(example_callable, columns, name="double")
+
+        copy = pickle.loads(pickle.dumps(task))
+
+        assert (copy.id, copy.name, copy.columns) == (task.id, "double", None)
+        assert copy.execute(2) == 4
+
+    def test_tasks_share_options(self):
+        # GIVEN
+        a = Task(example_callable, retries=2, resources={"gpu": 1})
+        b = Task(example_callable, retries=2, resources={"gpu": 1})
+        c = Task(example_callable)
+
+        # WHEN
+        c.retries = 2
+        c.resources = {"gpu": 1}
+
+        # THEN
+        assert a.options is b.options is c.options
+        assert (c.retries, c.resources, c.cacheable) == (2, {"gpu": 1}, True)
+        assert Task(example_callable).options is not a.options
+
+    def test_options_survive_pickling(self):
+        task = Task(example_callable, output=True, timeout=1.5)
+
+        copy = pickle.loads(pickle.dumps(task))
+
+        assert (copy.output, copy.timeout, copy.pipeline) == (True, 1.5, None)
+        assert copy.options is task.options
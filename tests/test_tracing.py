@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import time
+
+import numpy as np
+
+from pipeline import Pipeline
+from tracing import Hook, Tracer
+
+def sleep_and_return(value, duration):
+    time.sleep(duration)
+    return value
+
+class TestTracing:
+    def build_diamond(self, pipeline):
+        a = pipeline.create_task(lambda: sleep_and_return(1, 0.01), name="a")
+        b = pipeline.create_task(lambda x: sleep_and_return(x + 1, 0.1), name="b")
+        c = pipeline.create_task(lambda x: sleep_and_return(x + 2, 0.01), name="c")
+        d = pipeline.create_task(lambda x, y: x + y, name="d")
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(a, c)
+        pipeline.set_dependency(b, d)
+        pipeline.set_dependency(c, d)
+        return a, b, c, d
+
+    def test_spans_are_recorded(self):
+        # GIVEN
+        tracer = Tracer()
+        pipeline = Pipeline(hooks=[tracer])
+        a, b, c, d = self.build_diamond(pipeline)
+
+        # WHEN
+        pipeline.run()
+
+        # THEN every task has a consistent span and results are unwrapped
+        assert d.get_result() == 5
+        spans = {span.task: span for span in tracer.spans}
+        assert set(spans) == {a, b, c, d}
+        for span in spans.values():
+            assert span.submitted <= span.started <= span.finished
+            assert span.thread_name
+        assert spans[b].duration >= 0.1
+        assert spans[d].started >= spans[b].finished
+        assert spans[d].result_size > 0
+
+    def test_critical_path(self):
+        tracer = Tracer()
+        pipeline = Pipeline(hooks=[tracer])
+        a, b, c, d = self.build_diamond(pipeline)
+
+        pipeline.run()
+
+        assert [span.task for span in tracer.critical_path()] == [a, b, d]
+        assert tracer.summary().startswith("Critical path: 3 tasks")
+
+    def test_critical_path_of_last_run(self):
+        # GIVEN
+        tracer = Tracer()
+        pipeline = Pipeline(hooks=[tracer])
+        a, b, c, d = self.build_diamond(pipeline)
+        pipeline.run()
+        first_run = list(tracer.spans)
+
+        # WHEN
+        pipeline.reset()
+        pipeline.run()
+
+        # THEN spans of both runs are kept, only the last run is summarized
+        assert len(tracer.spans) == 2 * len(first_run)
+        path = tracer.critical_path()
+        assert [span.task for span in path] == [a, b, d]
+        assert all(span.started >= first_run[-1].finished for span in path)
+        assert sum(span.duration for span in path) <= tracer.run_finished - tracer.run_started
+
+    def test_chrome_trace_export(self, tmp_path):
+        # GIVEN
+        tracer = Tracer()
+        pipeline = Pipeline(hooks=[tracer])
+        self.build_diamond(pipeline)
+        pipeline.run()
+
+        # WHEN
+        path = tmp_path / "trace.json"
+        tracer.export_chrome_trace(path)
+
+        # THEN
+        events = json.loads(path.read_text())["traceEvents"]
+        complete_events = [event for event in events if event["ph"] == "X"]
+        assert sorted(event["name"] for event in complete_events) == ["a", "b", "c", "d"]
+        assert all(event["ts"] >= 0 and event["dur"] >= 0 for event in complete_events)
+        assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in events)
+
+    def test_process_backend_and_map_chunks(self):
+        tracer = Tracer()
+        pipeline = Pipeline(backend="process", max_workers=2, hooks=[tracer])
+        a = pipeline.create_task(np.arange, cacheable=False)
+        pipeline.set_source_value(a, np.arange(10))
+        b = pipeline.create_map_task(np.square, reduce="sum", chunk_size=3)
+        pipeline.set_dependency(a, b)
+
+        pipeline.run()
+        pipeline.executor.shutdown()
+
+        assert b.get_result() == 285
+        chunks = sorted(span.chunk for span in tracer.spans if span.task is b)
+        assert chunks == [0, 1, 2, 3]
+        assert len(tracer.get_task_spans()) == 2
+
+    def test_coroutine_tasks_are_traced(self):
+        async def wait():
+            await asyncio.sleep(0.01)
+            return 1
+
+        tracer = Tracer()
+        pipeline = Pipeline(hooks=[tracer])
+        task = pipeline.create_task(wait)
+
+        asyncio.run(pipeline.run_async())
+
+        assert task.get_result() == 1
+        assert [span.task for span in tracer.spans] == [task]
+        assert tracer.spans[0].duration >= 0.01
+
+    def test_custom_hook(self):
+        class RunCounter(Hook):
+            def __init__(self):
+                self.runs = 0
+                self.tasks = 0
+
+            def on_run_end(self, pipeline):
+                self.runs += 1
+
+            def on_task_finished(self, span):
+                self.tasks += 1
+
+        counter = RunCounter()
+        pipeline = Pipeline()
+        pipeline.add_hook(counter)
+        self.build_diamond(pipeline)
+
+        pipeline.run()
+
+        assert (counter.runs, counter.tasks) == (1, 4)
+
+    def test_inputs_are_not_formatted_without_debug_logging(self, caplog):
+        class Unprintable:
+            def __repr__(self):
+                raise AssertionError("inputs formatted")
+
+        pipeline = Pipeline()
+        a = pipeline.create_task(Unprintable)
+        b = pipeline.create_task(lambda value: 1)
+        pipeline.set_dependency(a, b)
+
+        with caplog.at_level(logging.INFO):
+            pipeline.run()
+
+        assert b.get_result() == 1
@@ -0,0 +1,77 @@
+import pytest
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pipeline import Pipeline
+from transport import SharedArray, share_array, release_shared_result
+
+def generate_data():
+    return np.arange(1_000_000, dtype=np.float64).reshape(1000, 1000)
+
+def normalize_array(data):
+    return (data - data.min()) / (data.max() - data.min())
+
+def is_shared_view(data):
+    return isinstance(data, SharedArray) and data.descriptor is not None
+
+def column_sums(data):
+    return data.sum(axis=0)
+
+def is_unlinked(name):
+    try:
+        shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+class TestTransport:
+    def test_pickle_sends_descriptor_only(self):
+        array = share_array(np.ones((1000, 1000)))
+
+        payload = pickle.dumps(array)
+        restored = pickle.loads(payload)
+
+        assert len(payload) < 1000
+        assert np.array_equal(restored, array)
+        restored[0, 0] = 5  # both arrays are views of the same block
+        assert array[0, 0] == 5
+
+        release_shared_result(array)
+        assert is_unlinked(restored.descriptor.name)
+
+    def test_derived_arrays_are_pickled_by_value(self):
+        array = share_array(np.ones(10))
+        derived = array * 2
+
+        restored = pickle.loads(pickle.dumps(derived))
+
+        assert derived.descriptor is None
+        assert np.array_equal(restored, np.full(10, 2.0))
+        release_shared_result(array)
+
+    def test_shared_memory_pipeline(self):
+        pipeline = Pipeline(backend="process", transport="shared_memory")
+        a = pipeline.create_task(generate_data)
+        b = pipeline.create_task(normalize_array)
+        c = pipeline.create_task(is_shared_view)
+        d = pipeline.create_task(column_sums)
+        pipeline.set_dependency(a, b)
+        pipeline.set_dependency(b, c)
+        pipeline.set_dependency(b, d)
+
+        pipeline.run()
+        pipeline.executor.shutdown()
+
+        # consumer received a view of the shared block instead of a copy
+        assert c.get_result() is True
+        assert np.allclose(d.get_result(), normalize_array(generate_data()).sum(axis=0))
+        # results stay readable while their blocks are unlinked after the last consumer finished
+        assert isinstance(b.get_result(), SharedArray)
+        assert b.get_result().descriptor is None
+        assert np.allclose(b.get_result(), normalize_array(generate_data()))
+
+    def test_unknown_transport(self):
+        with pytest.raises(ValueError, match="Unknown result transport 'pickle'."):
+            Pipeline(transport="pickle")